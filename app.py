@@ -1,50 +1,111 @@
 import streamlit as st
 import pandas as pd
-from generator import TestCaseGenerator
+from generator import LLMClient, TestCaseGenerator
+from jobs import JobQueue, CANCELLED, FINISHED
+from incremental import IncrementalGenerator, SectionStore
 import os
+import glob
+import json
+import hashlib
 from datetime import datetime
-from save_excel import test_cases_to_excel
+from save_excel import COLUMNS, test_cases_to_bytes
+from models import TestSuite
+from suite_index import SuiteIndex
+import extractors
+import metrics
 
 
-def extract_text_from_image(uploaded_file):
+# Counts used for every run - adjust here if you want different defaults
+POSITIVE, NEGATIVE, EDGE = 20, 20, 5
+
+# Process-wide result cache shared by all sessions; bounded by size and entry count
+RESULT_CACHE_MAX_BYTES = int(os.getenv("APP_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("APP_RESULT_CACHE_MAX_ENTRIES", "128"))
+
+# Generation runs on background workers; finished jobs are kept for a day so a reload can reattach
+JOB_DB_PATH = os.getenv("APP_JOB_DB", os.path.join(".cache", "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("APP_JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = 24 * 60 * 60
+JOB_POLL_SECONDS = 1.0
+
+# Reuse stored cases for requirement sections that did not change since an earlier run
+INCREMENTAL = os.getenv("APP_INCREMENTAL", "1") != "0"
+
+# Every finished suite is indexed with its requirement so similar requirements can reuse it
+SUITE_INDEX_PATH = os.getenv("APP_SUITE_INDEX", os.path.join(".cache", "suites.sqlite"))
+
+# Profile generation jobs: "cpu", "memory" or "cpu,memory"; results show up in the run metrics
+PROFILE = os.getenv("APP_PROFILE") or None
+metrics.parse_profile(PROFILE)
+
+
+@st.cache_resource
+def get_llm_client():
+    """One OpenAI client (and HTTP connection pool) for the whole server process."""
+    return LLMClient()
+
+
+@st.cache_resource
+def get_result_cache():
+    return extractors.ExtractionCache(max_bytes=RESULT_CACHE_MAX_BYTES, max_entries=RESULT_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource
+def get_section_store():
+    return SectionStore()
+
+
+@st.cache_resource
+def get_suite_index():
+    """Suite index shared by all sessions; earlier exports in outputs/ are imported once."""
+    index = SuiteIndex(SUITE_INDEX_PATH)
+    index.import_xlsx(sorted(glob.glob(os.path.join("outputs", "*.xlsx"))))
+    return index
+
+
+@st.cache_resource
+def get_job_queue():
+    """One job queue and worker pool for the whole server process, shared by all sessions."""
+    # Resolve shared resources here, on the script thread, not inside the workers
+    llm, store, index = get_llm_client(), get_section_store(), get_suite_index()
+    queue = JobQueue(JOB_DB_PATH, workers=JOB_WORKERS, generator_factory=lambda: _make_generator(llm, store, index),
+                     profile=PROFILE)
+    queue.purge(JOB_RETENTION_SECONDS)
+    return queue.start()
+
+
+def _make_generator(llm, store, index):
+    generator = TestCaseGenerator(llm=llm, index=index)
+    # The app offers similar suites to the user instead of reusing them silently
+    generator.reuse_threshold = None
+    if INCREMENTAL:
+        return IncrementalGenerator(generator, store=store)
+    return generator
+
+
+def extract_text_from_images(uploaded_files):
+    # Images are tiled and OCR'd in parallel; results are cached by image content
     try:
-        from PIL import Image
-        import pytesseract
-    except Exception:
+        texts = extractors.extract_text_from_images(uploaded_files)
+    except ImportError:
         st.error("OCR libraries (Pillow/pytesseract) are not installed. Install them to extract text from images.")
         return ""
-
-    image = Image.open(uploaded_file)
-    text = pytesseract.image_to_string(image)
-    return text
+    except Exception as e:
+        st.error(f"OCR failed: {e}")
+        return ""
+    if len(texts) == 1:
+        return texts[0]
+    return "\n\n".join(f"[Screen {i + 1}: {f.name}]\n{text}" for i, (f, text) in enumerate(zip(uploaded_files, texts)) if text)
 
 
 def extract_text_from_document(uploaded_file):
-    # Try PDF and docx parsing if libraries are available
-    try:
-        import pdfplumber
-    except Exception:
-        pdfplumber = None
+    # PDF pages are parsed in parallel and results are cached by file content,
+    # so reruns with the same upload skip parsing entirely
     try:
-        import docx
+        return extractors.extract_text_from_document(uploaded_file)
     except Exception:
-        docx = None
-
-    content = ""
-    if uploaded_file.type == "application/pdf" and pdfplumber:
-        with pdfplumber.open(uploaded_file) as pdf:
-            pages = [p.extract_text() for p in pdf.pages]
-            content = "\n".join([p for p in pages if p])
-    elif uploaded_file.type in ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword") and docx:
-        document = docx.Document(uploaded_file)
-        content = "\n".join([p.text for p in document.paragraphs])
-    else:
-        try:
-            content = uploaded_file.read().decode("utf-8")
-        except Exception:
-            st.warning("Unable to extract text from the uploaded document. Consider converting it to TXT or ensure required parsing libraries are installed.")
-
-    return content
+        st.warning("Unable to extract text from the uploaded document. Consider converting it to TXT or ensure required parsing libraries are installed.")
+        return ""
 
 
 def main():
@@ -62,19 +123,19 @@ def main():
         input_text = st.text_area("Enter requirement / description:", height=200, placeholder="Describe the feature, screen or user flow here...")
 
     elif "Design" in option or "Image" in option:
-        uploaded = st.file_uploader("Upload image (PNG, JPG, JPEG)", type=["png", "jpg", "jpeg"])
-        if uploaded is not None:
+        uploaded = st.file_uploader("Upload images (PNG, JPG, JPEG)", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
+        if uploaded:
             try:
-                st.image(uploaded, caption="Uploaded image", use_column_width=True)
+                st.image(uploaded, caption=[f.name for f in uploaded], use_column_width=True)
             except Exception:
                 st.write("Uploaded image preview not available.")
-            st.info("Extracting text from the uploaded image (OCR)...")
-            input_text = extract_text_from_image(uploaded)
+            st.info(f"Extracting text from {len(uploaded)} uploaded image(s) (OCR)...")
+            input_text = extract_text_from_images(uploaded)
             if input_text:
-                st.success("Text extracted from image:")
+                st.success("Text extracted from images:")
                 st.text_area("Extracted text:", value=input_text, height=200)
             else:
-                st.warning("No text detected in the image or OCR not available.")
+                st.warning("No text detected in the images or OCR not available.")
 
     elif "Document" in option or "Requirement" in option:
         uploaded = st.file_uploader("Upload document (PDF, DOCX, TXT)", type=["pdf", "docx", "txt"])
@@ -91,114 +152,254 @@ def main():
     st.write("")
     st.info("The generator will automatically produce comprehensive Positive, Negative and Edge test cases for the provided input.")
 
-    if st.button("🚀 Generate Test Cases"):
+    # The job id lives in the URL too, so a browser refresh reattaches to a running job
+    if "job" not in st.session_state and st.query_params.get("job"):
+        st.session_state["job"] = st.query_params["job"]
+    # Collect a finished job before drawing the button, so the button is enabled again on this run
+    if "job" in st.session_state:
+        _collect_job(st.session_state["job"])
+
+    if st.button("🚀 Generate Test Cases", disabled="job" in st.session_state):
         if not input_text or not input_text.strip():
             st.warning("Please provide input via the selected mode first.")
         else:
-            with st.spinner("Generating comprehensive test cases (positive, negative, edge)..."):
-                generator = TestCaseGenerator()
-                # Use automatic comprehensive counts - adjust here if you want different defaults
-                result = generator.generate_test_cases(input_text, positive=20, negative=20, edge=5)
-
-
-                # result may be list(dict) or raw string
-                if not result:
-                    st.error("Failed to generate test cases. Check logs or API quota.")
-                    return
-
-                parsed_list = None
-
-                if isinstance(result, list):
-                    parsed_list = result
-
-                elif isinstance(result, str):
-                    # Try to parse JSON directly
-                    import json as _json
-                    try:
-                        parsed = _json.loads(result)
-                        if isinstance(parsed, list):
-                            parsed_list = parsed
-                        elif isinstance(parsed, dict):
-                            parsed_list = [parsed]
-                    except Exception:
-                        # Try to locate JSON substring
-                        try:
-                            start = result.index('[')
-                            end = result.rindex(']') + 1
-                            json_str = result[start:end]
-                            parsed = _json.loads(json_str)
-                            if isinstance(parsed, list):
-                                parsed_list = parsed
-                            elif isinstance(parsed, dict):
-                                parsed_list = [parsed]
-                        except Exception:
-                            # Try to parse markdown table (| col | col |) into DataFrame
-                            try:
-                                import io
-                                lines = [l.strip() for l in result.splitlines() if l.strip()]
-                                table_lines = [l for l in lines if '|' in l]
-                                if table_lines:
-                                    md = '\n'.join(table_lines)
-                                    # Remove leading/trailing pipes
-                                    md = '\n'.join([ln.strip().strip('|') for ln in md.splitlines()])
-                                    df = pd.read_csv(io.StringIO(md), sep=r'\|', engine='python')
-                                    parsed_list = df.to_dict(orient='records')
-                            except Exception:
-                                parsed_list = None
-
-                if not parsed_list:
-                    # Could not parse into structured list - show raw output so user can inspect
-                    st.subheader("Raw output from model (unstructured)")
-                    st.text_area("Model output", value=result if isinstance(result, str) else str(result), height=800)
-                    return
-
-                # Normalize parsed_list entries into table-friendly dicts
-                rows = []
-                for tc in parsed_list:
-                    if not isinstance(tc, dict):
-                        continue
-                    steps = tc.get('Test Steps') or tc.get('TestSteps') or tc.get('Steps') or []
-                    if isinstance(steps, list):
-                        steps_text = '\n'.join([str(s) for s in steps])
-                    else:
-                        steps_text = str(steps)
-
-                    test_data = tc.get('Test Data') or tc.get('TestData') or ''
-                    if isinstance(test_data, dict):
-                        # Pretty print dict as key: value pairs
-                        td = ', '.join([f"{k}: {v}" for k, v in test_data.items()])
-                    else:
-                        td = str(test_data)
-
-                    rows.append({
-                        'Functionality': tc.get('Functionality', tc.get('Function', '')),
-                        'Test Summary': tc.get('Test Summary', tc.get('Summary', '')),
-                        'Pre Condition': tc.get('Pre Condition', tc.get('Precondition', '')),
-                        'Test Data': td,
-                        'Test Steps': steps_text,
-                        'Expected Result': tc.get('Expected Result', tc.get('Expected', ''))
-                    })
-
-                rows = [row for row in rows if any(str(v).strip() for v in row.values())]
-    
-                if not rows:
-                    st.subheader("Raw output from model (no structured test cases found)")
-                    st.text_area("Model output", value=str(result), height=900)
-                    return
-                
-                df = pd.DataFrame(rows, columns=['Functionality', 'Test Summary', 'Pre Condition', 'Test Data', 'Test Steps', 'Expected Result'])
-                st.subheader("Generated Test Cases (table)")
-                st.dataframe(df, use_container_width=True)
-
-                # Save to excel
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = os.path.join("outputs", f"testcases_{timestamp}.xlsx")
-                saved = test_cases_to_excel(rows, filename)
-                st.success(f"Saved to {saved}")
-
-                # Download button
-                with open(saved, "rb") as fh:
-                    st.download_button("Download Excel", data=fh, file_name=os.path.basename(saved))
+            key = _generation_key(input_text)
+            st.session_state.pop("offer", None)
+            cached = get_result_cache().get(key)
+            if cached is not None:
+                # Same input as an earlier run (from any session): no API calls needed
+                st.session_state["results"] = _load_results(cached)
+                st.session_state.pop("downloads", None)
+            else:
+                matches = get_suite_index().search(input_text)
+                if matches:
+                    st.session_state["offer"] = {"text": input_text, "key": key, "matches": [
+                        (m.id, m.score, len(m.cases), _title(m.requirement)) for m in matches]}
+                else:
+                    _submit(input_text, key)
+
+    if "offer" in st.session_state and "job" not in st.session_state:
+        _offer_reuse(st.session_state["offer"])
+
+    if "job" in st.session_state:
+        _job_progress(st.session_state["job"])
+
+    # Results live in session state, so they survive reruns from other widgets
+    if st.session_state.get("results"):
+        _render_results(st.session_state["results"])
+
+
+def _submit(input_text, key, reuse=None):
+    job_id = get_job_queue().submit(input_text, positive=POSITIVE, negative=NEGATIVE, edge=EDGE, reuse=reuse)
+    st.session_state["job"] = job_id
+    st.session_state["job_key"] = key
+    st.query_params["job"] = job_id
+    # Rerun so the Generate button is drawn disabled and the progress fragment takes over
+    st.rerun()
+
+
+def _title(requirement):
+    lines = [line.strip() for line in requirement.splitlines() if line.strip()]
+    return lines[0][:100] if lines else "(no requirement text)"
+
+
+def _offer_reuse(offer):
+    """Let the user adapt a similar earlier suite (few or no API calls) or start from scratch."""
+    st.subheader("Similar requirements were generated before")
+    st.caption("Reusing a suite keeps its matching test cases and only generates the ones it is missing.")
+    for suite_id, score, count, title in offer["matches"]:
+        if st.button(f"Reuse: {title} ({score:.0%} similar, {count} test cases)", key=f"reuse_{suite_id}"):
+            st.session_state.pop("offer", None)
+            _submit(offer["text"], offer["key"], reuse=suite_id)
+    if st.button("Generate from scratch"):
+        st.session_state.pop("offer", None)
+        _submit(offer["text"], offer["key"])
+
+
+def _collect_job(job_id):
+    """Move a finished background job's results into the session; running jobs are left alone."""
+    job = get_job_queue().get(job_id)
+    if job is None or job["status"] in FINISHED:
+        st.session_state.pop("job", None)
+        st.query_params.pop("job", None)
+        key = st.session_state.pop("job_key", None)
+        if job is None:
+            st.warning("The generation job is no longer available. Please generate again.")
+        elif job["status"] == CANCELLED:
+            st.info("Generation cancelled.")
+        else:
+            # A failed job may still carry the raw model output, which _build_results shows as-is
+            if job["result"]:
+                results = _build_results(job["result"])
+            else:
+                results = {"error": f"Generation failed: {job['error']}"}
+            downloads = {}
+            if results.get("suite"):
+                # The saved workbook doubles as the Excel download
+                downloads["xlsx"] = test_cases_to_bytes(results["suite"], "xlsx")
+                results["saved"] = _save_to_outputs(downloads["xlsx"])
+                # Point the indexed suite at its export so a later bulk import skips the file
+                params = job["params"]
+                # Index the parsed suite: a failed job's result is raw text that _build_results salvaged
+                get_suite_index().add(job["requirement"], results["suite"].to_dicts(),
+                                      (params["positive"], params["negative"], params["edge"]),
+                                      source=os.path.abspath(results["saved"]))
+                if key:
+                    get_result_cache().set(key, _dump_results(results))
+            # Per-run report, not cached: a cache hit costs nothing to measure
+            results["metrics"] = job["metrics"]
+            st.session_state["results"] = results
+            st.session_state["downloads"] = downloads
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_progress(job_id):
+    """Progress and the test cases written so far; only this fragment reruns while the job runs."""
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None or job["status"] in FINISHED:
+        # A full run collects the results and re-enables the Generate button
+        st.rerun()
+
+    done, total = job["done"], job["total"]
+    label = "Queued - waiting for a free worker..." if not total else f"Generating test cases: {done}/{total} batches done"
+    st.progress(done / total if total else 0.0, text=label)
+    if job["cancel_requested"]:
+        st.caption("Cancelling after the current batches finish...")
+    elif st.button("Cancel generation"):
+        queue.cancel(job_id)
+    cases = queue.cases(job_id)
+    if cases:
+        st.caption(f"{len(cases)} test cases so far; duplicates are removed when the job finishes")
+        preview = TestSuite.from_dicts(cases, fill_defaults=False)
+        st.dataframe(pd.DataFrame(preview.columns(), columns=COLUMNS), use_container_width=True)
+
+
+def _generation_key(input_text):
+    payload = json.dumps([input_text, POSITIVE, NEGATIVE, EDGE])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_results(result):
+    """Turn a job result (a stored suite or raw text) into a TestSuite, or keep the raw text."""
+    if not result:
+        return {"error": "Failed to generate test cases. Check logs or API quota."}
+
+    if isinstance(result, list):
+        # A finished job stores the generator's normalized suite; read it back as it is
+        return {"suite": TestSuite.load(result)}
+
+    parsed_list = None
+
+    if isinstance(result, str):
+        # Try to parse JSON directly
+        try:
+            parsed = json.loads(result)
+            if isinstance(parsed, list):
+                parsed_list = parsed
+            elif isinstance(parsed, dict):
+                parsed_list = [parsed]
+        except Exception:
+            # Try to locate JSON substring
+            try:
+                start = result.index('[')
+                end = result.rindex(']') + 1
+                json_str = result[start:end]
+                parsed = json.loads(json_str)
+                if isinstance(parsed, list):
+                    parsed_list = parsed
+                elif isinstance(parsed, dict):
+                    parsed_list = [parsed]
+            except Exception:
+                # Try to parse markdown table (| col | col |) into DataFrame
+                try:
+                    import io
+                    lines = [l.strip() for l in result.splitlines() if l.strip()]
+                    table_lines = [l for l in lines if '|' in l]
+                    if table_lines:
+                        md = '\n'.join(table_lines)
+                        # Remove leading/trailing pipes
+                        md = '\n'.join([ln.strip().strip('|') for ln in md.splitlines()])
+                        df = pd.read_csv(io.StringIO(md), sep=r'\|', engine='python')
+                        parsed_list = df.to_dict(orient='records')
+                except Exception:
+                    parsed_list = None
+
+    if not parsed_list:
+        # Could not parse into structured list - show raw output so user can inspect
+        return {"raw": result if isinstance(result, str) else str(result), "raw_title": "Raw output from model (unstructured)"}
+
+    # Text salvaged from a failed job was never normalized: do it once here for the table and exports
+    suite = TestSuite.from_dicts(parsed_list, fill_defaults=False)
+
+    if not len(suite):
+        return {"raw": str(result), "raw_title": "Raw output from model (no structured test cases found)"}
+    return {"suite": suite}
+
+
+def _dump_results(results):
+    """Serialize results for the shared result cache."""
+    payload = {k: v for k, v in results.items() if k not in ("suite", "metrics")}
+    if results.get("suite") is not None:
+        payload["cases"] = results["suite"].to_dicts()
+    return json.dumps(payload)
+
+
+def _load_results(text):
+    results = json.loads(text)
+    if "cases" in results:
+        results["suite"] = TestSuite.load(results.pop("cases"))
+    return results
+
+
+def _save_to_outputs(xlsx: bytes):
+    # The file on disk is kept only as a record; downloads are served from memory
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = os.path.join("outputs", f"testcases_{timestamp}.xlsx")
+    os.makedirs("outputs", exist_ok=True)
+    with open(filename, "wb") as fh:
+        fh.write(xlsx)
+    return filename
+
+
+def _render_results(results):
+    if results.get("error"):
+        st.error(results["error"])
+        return
+    if results.get("raw"):
+        st.subheader(results["raw_title"])
+        st.text_area("Model output", value=results["raw"], height=800)
+        return
+
+    suite = results["suite"]
+    st.subheader("Generated Test Cases (table)")
+    st.dataframe(pd.DataFrame(suite.columns(), columns=COLUMNS), use_container_width=True)
+    if results.get("saved"):
+        st.success(f"Saved to {results['saved']}")
+
+    # Export once per result set and reuse the bytes on later reruns
+    downloads = st.session_state.setdefault("downloads", {})
+    for fmt in ("xlsx", "csv"):
+        if fmt not in downloads:
+            downloads[fmt] = test_cases_to_bytes(suite, fmt)
+    base = os.path.splitext(os.path.basename(results.get("saved") or "testcases.xlsx"))[0]
+    st.download_button("Download Excel", data=downloads["xlsx"], file_name=f"{base}.xlsx")
+    st.download_button("Download CSV", data=downloads["csv"], file_name=f"{base}.csv", mime="text/csv")
+    if results.get("metrics"):
+        _render_metrics(results["metrics"])
+
+
+def _render_metrics(report):
+    counters = report.get("counters", {})
+    with st.expander("Run metrics"):
+        st.caption(f"{report.get('elapsed_seconds', 0):.1f}s, {counters.get('llm.calls', 0):g} API calls, "
+                   f"{counters.get('llm.prompt_tokens', 0) + counters.get('llm.completion_tokens', 0):g} tokens, "
+                   f"{counters.get('llm.retries', 0):g} retries, {counters.get('parse.failures', 0):g} parse failures")
+        st.json(report, expanded=False)
+        st.download_button("Download process metrics (Prometheus)", data=metrics.REGISTRY.to_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+
+
 if __name__ == "__main__":
     # When run with `streamlit run app.py`, __name__ == "__main__" and main() will execute.
     # This keeps the module import-safe while ensuring the Streamlit app runs when executed.
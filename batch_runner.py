@@ -0,0 +1,205 @@
+# batch_runner.py
+"""Generate test cases for many requirements from a JSONL file.
+
+Each input line is a JSON object with a requirement text under
+``requirement`` (or ``text`` / ``body``) and an optional ``id``. Results are
+appended to a JSONL sink as they finish, and finished ids are recorded in a
+checkpoint file so an interrupted run picks up where it stopped.
+
+    python batch_runner.py requirements.jsonl -o outputs/batch.jsonl --workers 4
+
+Add ``--pack 8`` to share API calls between up to eight small requirements,
+``--metrics run.json`` (or ``run.prom``) for a timing/token report and
+``--profile cpu,memory`` to include profiling data in it.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import metrics
+from generator import TestCaseGenerator
+from models import TestSuite
+from save_excel import test_cases_to_excel
+
+
+def iter_requirements(path: str) -> Iterator[Dict]:
+    """Yield requirement records one line at a time."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"  ✗ Skipping line {line_no}: not valid JSON")
+                continue
+            if isinstance(record, str):
+                record = {"requirement": record}
+            text = record.get("requirement") or record.get("text") or record.get("body")
+            if not text:
+                print(f"  ✗ Skipping line {line_no}: no requirement text")
+                continue
+            record["requirement"] = text
+            record["id"] = str(record.get("id") or record.get("request_id") or f"line-{line_no}")
+            yield record
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as fh:
+        return {line.strip() for line in fh if line.strip()}
+
+
+def run_batch(input_path: str, output_path: str, checkpoint_path: Optional[str] = None, workers: int = 4,
+              positive: int = 3, negative: int = 2, edge: int = 1,
+              generator: Optional[TestCaseGenerator] = None, pack_size: int = 1) -> Dict:
+    """Process every requirement not already in the checkpoint and return run stats.
+
+    With ``pack_size`` > 1, up to that many requirements with the same
+    counts go through ``generate_packed`` together, sharing API calls.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    done = load_checkpoint(checkpoint_path)
+    generator = generator or TestCaseGenerator()
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    stats = {"processed": 0, "skipped": 0, "failed": 0, "test_cases": 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def counts(record: Dict) -> Tuple[int, int, int]:
+        return (int(record.get("positive", positive)), int(record.get("negative", negative)),
+                int(record.get("edge", edge)))
+
+    def record_result(record: Dict, result, elapsed: float) -> None:
+        with lock:
+            if not isinstance(result, TestSuite) or not result:
+                stats["failed"] += 1
+                print(f"  ✗ {record['id']}: no test cases generated")
+                return
+            line = {"id": record["id"], "requirement": record["requirement"], "test_cases": result.to_dicts(),
+                    "elapsed": round(elapsed, 3)}
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+            out.flush()
+            # Only mark finished once the result line is safely written
+            ckpt.write(record["id"] + "\n")
+            ckpt.flush()
+            stats["processed"] += 1
+            stats["test_cases"] += len(result)
+            print(f"  ✓ {record['id']}: {len(result)} test cases")
+
+    def process(records: List[Dict]) -> None:
+        t0 = time.perf_counter()
+        p, n, e = counts(records[0])
+        try:
+            if len(records) == 1:
+                results = [generator.generate_test_cases(records[0]["requirement"], positive=p, negative=n, edge=e)]
+            else:
+                packed = generator.generate_packed({r["id"]: r["requirement"] for r in records},
+                                                   positive=p, negative=n, edge=e)
+                results = [packed[r["id"]] for r in records]
+        except Exception as ex:
+            print(f"  ✗ {', '.join(r['id'] for r in records)}: {ex}")
+            results = [None] * len(records)
+        for record, result in zip(records, results):
+            record_result(record, result, time.perf_counter() - t0)
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as ckpt, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = set()
+        groups: Dict[Tuple[int, int, int], List[Dict]] = {}
+
+        def submit(records: List[Dict]) -> None:
+            nonlocal pending
+            # Keep only a bounded number of requirements in flight
+            if len(pending) >= workers * 2:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(pool.submit(metrics.bind(process), records))
+
+        for record in iter_requirements(input_path):
+            if record["id"] in done:
+                stats["skipped"] += 1
+                continue
+            done.add(record["id"])
+            group = groups.setdefault(counts(record), [])
+            group.append(record)
+            if len(group) >= max(1, pack_size):
+                submit(groups.pop(counts(record)))
+        for group in groups.values():
+            submit(group)
+        wait(pending)
+
+    elapsed = time.perf_counter() - started
+    minutes = elapsed / 60 if elapsed else 0
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["requirements_per_min"] = round(stats["processed"] / minutes, 2) if minutes else 0.0
+    stats["test_cases_per_min"] = round(stats["test_cases"] / minutes, 2) if minutes else 0.0
+    return stats
+
+
+def iter_result_cases(output_path: str) -> Iterator[Dict]:
+    """Yield every test case stored in the JSONL sink, one line at a time."""
+    with open(output_path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield from json.loads(line).get("test_cases") or []
+
+
+def export_xlsx(output_path: str, xlsx_path: str) -> str:
+    """Collect every test case in the JSONL sink into one Excel file."""
+    return test_cases_to_excel(iter_result_cases(output_path), xlsx_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate test cases for every requirement in a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one requirement per line")
+    parser.add_argument("-o", "--output", default="outputs/batch_results.jsonl", help="JSONL results file (appended)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--xlsx", help="also write all results to this Excel file at the end")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="requirements processed at the same time")
+    parser.add_argument("--batch-workers", type=int, default=4, help="concurrent API calls per requirement")
+    parser.add_argument("--pack", type=int, default=1,
+                        help="pack up to this many small requirements into shared API calls")
+    parser.add_argument("--positive", type=int, default=3)
+    parser.add_argument("--negative", type=int, default=2)
+    parser.add_argument("--edge", type=int, default=1)
+    parser.add_argument("--metrics", help="write the run's metrics report here (.json, or .prom for Prometheus text)")
+    parser.add_argument("--profile", help="profile the run: cpu, memory or cpu,memory (reported in --metrics)")
+    parser.add_argument("--profile-out", help="also save the CPU profile here for pstats / snakeviz")
+    args = parser.parse_args()
+
+    generator = TestCaseGenerator(max_workers=args.batch_workers)
+    with metrics.run(args.profile) as report:
+        stats = run_batch(args.input, args.output, args.checkpoint, workers=args.workers,
+                          positive=args.positive, negative=args.negative, edge=args.edge, generator=generator,
+                          pack_size=args.pack)
+    if args.xlsx:
+        print(f"Saved to {export_xlsx(args.output, args.xlsx)}")
+
+    print("\n=== Batch Summary ===")
+    print(f"Processed:        {stats['processed']}")
+    print(f"Skipped (resume): {stats['skipped']}")
+    print(f"Failed:           {stats['failed']}")
+    print(f"Test cases:       {stats['test_cases']}")
+    print(f"Elapsed:          {stats['elapsed_seconds']}s")
+    print(f"Requirements/min: {stats['requirements_per_min']}")
+    print(f"Test cases/min:   {stats['test_cases_per_min']}")
+    tokens = report.counters.get("llm.prompt_tokens", 0) + report.counters.get("llm.completion_tokens", 0)
+    print(f"API calls:        {report.counters.get('llm.calls', 0):g} ({tokens:g} tokens, "
+          f"{report.counters.get('llm.retries', 0):g} retries)")
+    if args.metrics:
+        print(f"Metrics:          {metrics.write_report(report, args.metrics)}")
+    if args.profile_out and report.profiler is not None:
+        report.profiler.dump(args.profile_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks/bench_pipeline.py
+"""Offline performance benchmarks for the generation pipeline.
+
+Everything runs against mock_server.MockOpenAIServer, so no API key or
+network access is needed.
+
+    python benchmarks/bench_pipeline.py                  # full run
+    python benchmarks/bench_pipeline.py --quick          # smaller sizes
+    python benchmarks/bench_pipeline.py --json out.json  # save results
+    python benchmarks/bench_pipeline.py --baseline out.json --tolerance 0.25
+
+With --baseline, any timing more than ``tolerance`` slower than the saved
+run is reported and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from mock_server import MockOpenAIServer, synthetic_test_cases
+from models import TestSuite
+
+
+def _best_of(fn: Callable[[], object], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _generator_for(server: MockOpenAIServer, max_workers: int):
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY") or "bench-key"
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["LLM_CACHE"] = "0"
+    from generator import TestCaseGenerator
+    return TestCaseGenerator(max_workers=max_workers)
+
+
+def bench_generate(latency: float, workers: int, positive: int = 20, negative: int = 20, edge: int = 5,
+                   **server_options) -> Dict:
+    """Wall time and request rate of one generate_test_cases run."""
+    with MockOpenAIServer(latency=latency, **server_options) as server:
+        gen = _generator_for(server, workers)
+        start = time.perf_counter()
+        result = gen.generate_test_cases("User login feature", positive=positive, negative=negative, edge=edge)
+        elapsed = time.perf_counter() - start
+        requests = server.request_count
+    return {"seconds": elapsed, "requests": requests, "requests_per_sec": requests / elapsed if elapsed else 0.0,
+            "test_cases": len(result) if isinstance(result, TestSuite) else 0}
+
+
+def bench_retry_overhead(latency: float, workers: int) -> Dict:
+    """Extra wall time and requests caused by unparseable replies."""
+    clean = bench_generate(latency, workers)
+    messy = bench_generate(latency, workers, garbage_rate=0.3, seed=7)
+    return {"clean_seconds": clean["seconds"], "seconds": messy["seconds"],
+            "overhead_ratio": messy["seconds"] / clean["seconds"] if clean["seconds"] else 0.0,
+            "extra_requests": messy["requests"] - clean["requests"]}
+
+
+def bench_parse(sizes) -> Dict:
+    """_try_parse throughput on large clean and messy replies, and parse_structured on schema replies."""
+    from generator import TestCaseGenerator
+    from structured import parse_structured
+    parser = TestCaseGenerator.__new__(TestCaseGenerator)
+    out = {}
+    for n in sizes:
+        cases = synthetic_test_cases(n)
+        clean = json.dumps(cases, indent=2)
+        messy = "Here are your test cases:\n```json\n" + clean + "\n```\nLet me know if you need more!"
+        structured = json.dumps({"test_cases": cases})
+        for label, text, parse in (("clean", clean, parser._try_parse), ("messy", messy, parser._try_parse),
+                                   ("structured", structured, parse_structured)):
+            seconds = _best_of(lambda: parse(text))
+            out[f"{label}_{n}"] = {"seconds": seconds, "mb_per_sec": len(text) / 1e6 / seconds if seconds else 0.0}
+    return out
+
+
+def bench_export(sizes) -> Dict:
+    """Export time per format at several suite sizes, written to memory."""
+    import save_excel
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            cases = synthetic_test_cases(n)
+            path = os.path.join(tmp, f"bench_{n}.xlsx")
+            out[str(n)] = {"seconds": _best_of(lambda: save_excel.test_cases_to_excel(cases, path), repeat=1)}
+            for fmt in ("csv", "parquet"):
+                out[str(n)][f"{fmt}_seconds"] = _best_of(lambda: save_excel.test_cases_to_bytes(iter(cases), fmt),
+                                                         repeat=1)
+    return out
+
+
+def run_all(quick: bool = False) -> Dict:
+    latency = 0.05 if quick else 0.2
+    export_sizes = [100, 1000] if quick else [100, 1000, 10000]
+    parse_sizes = [10, 100] if quick else [10, 100, 1000]
+    return {
+        "generate_serial": bench_generate(latency, workers=1),
+        "generate_concurrent": bench_generate(latency, workers=8),
+        "retry_overhead": bench_retry_overhead(latency, workers=8),
+        "parse": bench_parse(parse_sizes),
+        "export": bench_export(export_sizes),
+    }
+
+
+def _timings(results: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_timings(value, name + "."))
+        elif key.endswith("seconds"):
+            flat[name] = value
+    return flat
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> list:
+    """Return a description of every timing slower than baseline by more than tolerance."""
+    current, previous = _timings(results), _timings(baseline)
+    regressions = []
+    for name, seconds in current.items():
+        before = previous.get(name)
+        if before and seconds > before * (1 + tolerance):
+            regressions.append(f"{name}: {before:.4f}s -> {seconds:.4f}s (+{(seconds / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline benchmarks for the test case generator.")
+    parser.add_argument("--quick", action="store_true", help="use smaller sizes and latencies")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run_all(args.quick)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for line in regressions:
+                print(f"  ✗ {line}")
+            sys.exit(1)
+        print("\n✓ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
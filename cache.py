@@ -0,0 +1,129 @@
+# cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+def make_cache_key(model: str, system_prompt: str, prompt: str, temperature: float, max_tokens: int,
+                   response_format: Optional[Dict] = None) -> str:
+    """Content-addressed key over everything that shapes a completion."""
+    parts = [model, system_prompt, prompt, float(temperature), int(max_tokens)]
+    if response_format is not None:
+        parts.append(response_format)
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with TTL and LRU eviction.
+
+    Entries expire after ``ttl_seconds`` (0 disables expiry). When the cache
+    grows past ``max_entries`` or ``max_bytes`` the least recently used
+    entries are dropped first.
+    """
+
+    def __init__(self, path: str = ".cache/llm_responses.sqlite", max_entries: int = 5000,
+                 max_bytes: int = 200 * 1024 * 1024, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total <= self.max_bytes):
+            return
+        # Walk from least recently used and drop until both limits hold
+        drop = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total <= self.max_bytes):
+                break
+            drop.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", drop)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """Build the default cache from LLM_CACHE_* environment variables.
+
+    Set LLM_CACHE=0 to turn caching off.
+    """
+    if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return ResponseCache(
+        path=os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite"),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    )
@@ -0,0 +1,137 @@
+# chunking.py
+import re
+from typing import List, NamedTuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+# Markdown headings, numbered headings ("2.", "3.1 Login"), ALL CAPS lines and short "Title:" lines
+_HEADING_RE = re.compile(
+    r"^\s*(#{1,6}\s+\S.*"
+    r"|\d+(\.\d+)*\.?\s+[A-Z].{0,80}"
+    r"|[A-Z][A-Z0-9 /&()-]{2,80}"
+    r"|[A-Z][^.!?]{0,60}:)\s*$"
+)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+class Section(NamedTuple):
+    title: str
+    text: str
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, else a 4-characters-per-token estimate."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def _is_heading(line: str) -> bool:
+    return len(line) <= 100 and bool(_HEADING_RE.match(line))
+
+
+def _blocks(text: str) -> List[tuple]:
+    """Split text into (is_heading, block) pieces on headings and blank lines."""
+    blocks = []
+    para = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or _is_heading(stripped):
+            if para:
+                blocks.append((False, "\n".join(para)))
+                para = []
+            if stripped:
+                blocks.append((True, stripped))
+            continue
+        para.append(line.rstrip())
+    if para:
+        blocks.append((False, "\n".join(para)))
+    return blocks
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Break one paragraph that is over budget on sentences, then on words."""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_RE.split(block):
+        candidate = f"{current} {sentence}".strip()
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            candidate = sentence
+        if estimate_tokens(candidate) > max_tokens:
+            words, current = candidate.split(), ""
+            for word in words:
+                if current and estimate_tokens(current + " " + word) > max_tokens:
+                    pieces.append(current)
+                    current = word
+                else:
+                    current = f"{current} {word}".strip()
+            continue
+        current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sections(text: str, max_tokens: int = 3000) -> List[Section]:
+    """Split requirement text into sections on heading/paragraph boundaries.
+
+    Each section stays within ``max_tokens``. A new section starts at every
+    heading once the current one holds at least a quarter of the budget, so
+    tiny sections are merged with their neighbours.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    if estimate_tokens(text) <= max_tokens:
+        return [Section(_first_line(text), text, estimate_tokens(text))]
+
+    sections = []
+    title, parts, used = "", [], 0
+
+    def flush():
+        if parts:
+            body = "\n\n".join(parts)
+            sections.append(Section(title or _first_line(body), body, estimate_tokens(body)))
+
+    for is_heading, block in _blocks(text):
+        tokens = estimate_tokens(block)
+        if is_heading and used >= max_tokens // 4:
+            flush()
+            title, parts, used = block, [], 0
+        elif is_heading and not parts:
+            title = block
+        pieces = [block] if tokens <= max_tokens else _split_oversized(block, max_tokens)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if parts and used + piece_tokens > max_tokens:
+                flush()
+                parts, used = [], 0
+            parts.append(piece)
+            used += piece_tokens
+    flush()
+    return sections
+
+
+def _first_line(text: str) -> str:
+    return text.strip().splitlines()[0][:80] if text.strip() else ""
+
+
+def allocate_counts(total: int, weights: List[int]) -> List[int]:
+    """Split ``total`` across ``weights`` proportionally (largest remainder)."""
+    if not weights:
+        return []
+    weight_sum = sum(weights)
+    if total <= 0 or weight_sum <= 0:
+        return [0] * len(weights)
+    shares = [total * w / weight_sum for w in weights]
+    counts = [int(s) for s in shares]
+    leftover = total - sum(counts)
+    order = sorted(range(len(weights)), key=lambda i: (shares[i] - counts[i], weights[i]), reverse=True)
+    for i in order[:leftover]:
+        counts[i] += 1
+    return counts
@@ -0,0 +1,99 @@
+# dedup.py
+import re
+import zlib
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from models import TestCase
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Mersenne prime used for the MinHash permutations
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def case_text(tc: Union[Dict, TestCase]) -> str:
+    """The parts of a test case that decide whether two cases are the same scenario."""
+    if isinstance(tc, TestCase):
+        return f"{tc.summary} {' '.join(tc.steps)} {tc.test_data}".lower()
+    steps = tc.get("Test Steps") or []
+    if isinstance(steps, list):
+        steps = " ".join(str(s) for s in steps)
+    data = tc.get("Test Data") or ""
+    if isinstance(data, dict):
+        data = " ".join(f"{k} {v}" for k, v in data.items())
+    return f"{tc.get('Test Summary') or ''} {steps} {data}".lower()
+
+
+def shingles(text: str, size: int = 2) -> np.ndarray:
+    """Hashed word n-grams of ``text`` as a uint64 array."""
+    words = _WORD_RE.findall(text)
+    if len(words) < size:
+        grams = [" ".join(words)] if words else [""]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)))
+
+
+class Deduplicator:
+    """MinHash/LSH index that drops near-duplicate test cases.
+
+    Cases are compared within their Category on the summary, steps and test
+    data. Two cases count as duplicates when their estimated Jaccard
+    similarity reaches ``threshold``. Candidate pairs come from LSH buckets,
+    so the cost per case stays constant as the index grows.
+    """
+
+    def __init__(self, threshold: float = 0.75, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # a, b < 2**32 so a * x + b never overflows uint64 for 32-bit shingle hashes
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+        self.seen = 0
+        self.dropped = 0
+
+    def signature(self, tc: Union[Dict, TestCase]) -> np.ndarray:
+        hashes = shingles(case_text(tc))
+        # All (shingle, permutation) hashes in one shot, then the column minimum
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    def add(self, tc: Union[Dict, TestCase]) -> bool:
+        """Index ``tc`` and return True, or return False if it duplicates an indexed case."""
+        self.seen += 1
+        sig = self.signature(tc)
+        category = tc.category if isinstance(tc, TestCase) else tc.get("Category") or ""
+        keys = [(category, band, sig[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+        candidates = {idx for key in keys for idx in self._buckets.get(key, ())}
+        for idx in candidates:
+            if np.count_nonzero(self._signatures[idx] == sig) / self.num_perm >= self.threshold:
+                self.dropped += 1
+                return False
+        idx = len(self._signatures)
+        self._signatures.append(sig)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(idx)
+        return True
+
+    def filter(self, cases: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split ``cases`` into (kept, dropped)."""
+        kept, dropped = [], []
+        for tc in cases:
+            (kept if self.add(tc) else dropped).append(tc)
+        return kept, dropped
+
+    def stats(self) -> Dict:
+        return {
+            "seen": self.seen,
+            "duplicates": self.dropped,
+            "duplicate_rate": (self.dropped / self.seen) if self.seen else 0.0,
+        }
@@ -1,30 +1,295 @@
-import pytesseract
-from PIL import Image
-import pdfplumber
-from docx import Document
+import hashlib
+import io
+import multiprocessing
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
 
-# Path to your installed tesseract.exe
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+import metrics
 
-def extract_text_from_image(uploaded_file):
-    image = Image.open(uploaded_file)
-    text = pytesseract.image_to_string(image, config='--psm 6')
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+# Path to your installed tesseract executable; TESSERACT_CMD wins, then the usual Windows
+# install location, otherwise pytesseract looks it up on PATH
+_WINDOWS_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+if pytesseract is not None:
+    if os.getenv("TESSERACT_CMD"):
+        pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD")
+    elif os.path.exists(_WINDOWS_TESSERACT):
+        pytesseract.pytesseract.tesseract_cmd = _WINDOWS_TESSERACT
+
+PDF_TYPES = ("application/pdf",)
+DOCX_TYPES = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword")
+
+# PDFs with fewer pages than this are read in-process; spawning workers costs more than it saves
+PARALLEL_MIN_PAGES = 16
+PAGES_PER_TASK = 8
+
+# OCR preprocessing: resample to this DPI (never wider than OCR_MAX_WIDTH) and cut tall
+# screenshots into tiles of roughly OCR_TILE_HEIGHT pixels along blank rows
+OCR_TARGET_DPI = 300
+OCR_MAX_WIDTH = 2000
+# Images are only scaled down by default; upscaling 96 DPI screenshots triples the pixels tesseract reads
+# and rarely helps on crisp UI text (OCR_UPSCALE=1 turns it on for small or blurry scans)
+OCR_UPSCALE = os.getenv("OCR_UPSCALE", "0").lower() in ("1", "true", "yes")
+OCR_TILE_HEIGHT = 1600
+OCR_CONFIG = "--psm 6"
+
+
+class ExtractionCache:
+    """Thread-safe LRU cache of extracted text keyed by content hash, bounded by total size."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 256):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._items.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def set(self, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._size -= len(self._items.pop(key).encode("utf-8"))
+            self._items[key] = text
+            self._size += size
+            while self._items and (self._size > self.max_bytes or len(self._items) > self.max_entries):
+                _, old = self._items.popitem(last=False)
+                self._size -= len(old.encode("utf-8"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+_cache = ExtractionCache(
+    max_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "256")),
+)
+
+
+def read_bytes(uploaded_file) -> bytes:
+    """Return the raw bytes of a path, bytes object, file object or Streamlit upload."""
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
+    if isinstance(uploaded_file, str):
+        with open(uploaded_file, "rb") as fh:
+            return fh.read()
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    pos = uploaded_file.tell() if hasattr(uploaded_file, "tell") else None
+    data = uploaded_file.read()
+    if pos is not None:
+        uploaded_file.seek(pos)
+    return data
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _cached(kind: str, data: bytes, extract) -> str:
+    key = f"{kind}:{content_hash(data)}"
+    text = _cache.get(key)
+    if text is None:
+        with metrics.span(f"extract.{kind}"):
+            text = extract(data)
+        _cache.set(key, text)
+    else:
+        metrics.count("extract.cache_hits")
     return text
 
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # Never fork: the app process runs job threads and holds SQLite connections, and a forked
+    # child can inherit a lock another thread held. forkserver starts workers from a clean
+    # single-threaded process (spawn where it is unavailable, e.g. Windows)
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def _pdf_page_range(data: bytes, start: int, end: int) -> List[str]:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages(data: bytes, workers: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of every page in order, spreading large PDFs across processes."""
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        page_count = len(pdf.pages)
+        if page_count < PARALLEL_MIN_PAGES or workers == 1:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+            return
+
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+    workers = workers or min(os.cpu_count() or 1, len(ranges))
+    with _process_pool(workers) as pool:
+        futures = [pool.submit(_pdf_page_range, data, start, end) for start, end in ranges]
+        for future in futures:
+            yield from future.result()
+
+
+def _pdf_text(data: bytes) -> str:
+    return "\n".join(text for text in iter_pdf_pages(data) if text)
+
+
+def _docx_text(data: bytes) -> str:
+    from docx import Document
+
+    doc = Document(io.BytesIO(data))
+    return "\n".join(p.text for p in doc.paragraphs)
+
+
+def _otsu_threshold(histogram: List[int]) -> int:
+    total = sum(histogram)
+    weighted = sum(i * h for i, h in enumerate(histogram))
+    best, best_var, w_bg, sum_bg = 127, -1.0, 0, 0.0
+    for level, count in enumerate(histogram):
+        w_bg += count
+        if w_bg == 0 or w_bg == total:
+            continue
+        sum_bg += level * count
+        mean_bg = sum_bg / w_bg
+        mean_fg = (weighted - sum_bg) / (total - w_bg)
+        between = w_bg * (total - w_bg) * (mean_bg - mean_fg) ** 2
+        if between > best_var:
+            best, best_var = level, between
+    return best
+
+
+def preprocess_image(image, target_dpi: int = OCR_TARGET_DPI, max_width: int = OCR_MAX_WIDTH,
+                     upscale: Optional[bool] = None):
+    """Grayscale, resample towards ``target_dpi`` and binarize an image for OCR.
+
+    Images are never enlarged unless ``upscale`` (default OCR_UPSCALE) is set.
+    """
+    image = image.convert("L")
+    source_dpi = image.info.get("dpi", (96, 96))[0] or 96
+    scale = min(target_dpi / float(source_dpi), max_width / float(image.width))
+    if not (OCR_UPSCALE if upscale is None else upscale):
+        scale = min(scale, 1.0)
+    if abs(scale - 1) > 0.05:
+        size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC)
+    threshold = _otsu_threshold(image.histogram())
+    return image.point(lambda p: 255 if p > threshold else 0, mode="1").convert("L")
+
+
+def split_tiles(image, tile_height: int = OCR_TILE_HEIGHT, search: int = 200) -> List:
+    """Cut a tall binarized image into horizontal tiles, cutting on blank rows where possible."""
+    if image.height <= tile_height * 1.5:
+        return [image]
+    import numpy as np
+
+    # Rows with no dark pixels are safe places to cut without splitting a line of text
+    blank = (np.asarray(image) < 128).sum(axis=1) == 0
+    tiles, top = [], 0
+    while image.height - top > tile_height * 1.5:
+        target = top + tile_height
+        window = range(max(top + 1, target - search), min(image.height - 1, target + search))
+        cut = min((row for row in window if blank[row]), key=lambda row: abs(row - target), default=target)
+        tiles.append(image.crop((0, top, image.width, cut)))
+        top = cut
+    tiles.append(image.crop((0, top, image.width, image.height)))
+    return tiles
+
+
+def _ocr_png(png: bytes) -> str:
+    return pytesseract.image_to_string(Image.open(io.BytesIO(png)), config=OCR_CONFIG)
+
+
+def _image_tiles(data: bytes) -> List[bytes]:
+    tiles = []
+    for tile in split_tiles(preprocess_image(Image.open(io.BytesIO(data))), OCR_TILE_HEIGHT):
+        buf = io.BytesIO()
+        tile.save(buf, format="PNG")
+        tiles.append(buf.getvalue())
+    return tiles
+
+
+def extract_text_from_images(uploaded_files, workers: Optional[int] = None) -> List[str]:
+    """OCR several images at once and return their text in the same order.
+
+    Every image is preprocessed and tiled, then all uncached tiles share one
+    process pool; tile text is joined top to bottom. Results are cached by
+    image hash.
+    """
+    if pytesseract is None or Image is None:
+        raise ImportError("OCR needs Pillow and pytesseract. Install them to extract text from images.")
+    blobs = [read_bytes(f) for f in uploaded_files]
+    keys = [f"ocr:{content_hash(data)}" for data in blobs]
+    results = [_cache.get(key) for key in keys]
+    pending = [i for i, text in enumerate(results) if text is None]
+    metrics.count("extract.cache_hits", len(results) - len(pending))
+    if not pending:
+        return results
+    with metrics.span("extract.ocr"):
+        tiles = {i: _image_tiles(blobs[i]) for i in pending}
+        jobs = [(i, png) for i in pending for png in tiles[i]]
+        workers = workers or min(os.cpu_count() or 1, len(jobs))
+        if workers <= 1 or len(jobs) == 1:
+            texts = [_ocr_png(png) for _, png in jobs]
+        else:
+            with _process_pool(workers) as pool:
+                texts = list(pool.map(_ocr_png, [png for _, png in jobs]))
+
+    per_image = {i: [] for i in pending}
+    for (i, _), text in zip(jobs, texts):
+        per_image[i].append(text.strip("\n"))
+    for i in pending:
+        results[i] = "\n".join(t for t in per_image[i] if t)
+        _cache.set(keys[i], results[i])
+    return results
+
+
+def extract_text_from_image(uploaded_file):
+    return extract_text_from_images([uploaded_file])[0]
+
 def extract_text_from_pdf(uploaded_file):
-    text = ""
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
+    return _cached("pdf", read_bytes(uploaded_file), _pdf_text)
 
 def extract_text_from_docx(uploaded_file):
-    doc = Document(uploaded_file)
-    return "\n".join([p.text for p in doc.paragraphs])
+    return _cached("docx", read_bytes(uploaded_file), _docx_text)
+
+def extract_text_from_document(uploaded_file) -> str:
+    """Extract text from a PDF, DOCX or plain-text upload, reusing earlier results."""
+    mime = getattr(uploaded_file, "type", "") or ""
+    name = (getattr(uploaded_file, "name", "") or "").lower()
+    if mime in PDF_TYPES or name.endswith(".pdf"):
+        return extract_text_from_pdf(uploaded_file)
+    if mime in DOCX_TYPES or name.endswith(".docx"):
+        return extract_text_from_docx(uploaded_file)
+    with metrics.span("extract.txt"):
+        return read_bytes(uploaded_file).decode("utf-8")
 
 def clean_text(raw_text):
     text = raw_text.replace('\n', ' ')
     text = ' '.join(text.split())
     return text
-
@@ -1,81 +1,973 @@
 # generator.py
-from openai import OpenAI
 import os
 import json
-from typing import List, Dict
+import queue
+import threading
+import time
+import openai
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from cache import ResponseCache, cache_from_env, make_cache_key
+from stream_parser import JSONArrayStreamParser
+from chunking import allocate_counts, estimate_tokens, split_sections
+from dedup import Deduplicator
+from transport import Transport, default_transport
+from structured import JSON_OBJECT_FORMAT, PACKED_RESPONSE_FORMAT, RESPONSE_FORMAT, parse_structured
+from packing import Pack, create_packed_prompt, plan_packs, split_reply
+from models import TestCase, TestSuite, normalize
+import metrics
+from suite_index import SuiteIndex, SuiteMatch, index_from_env
 
 load_dotenv()
 
+# Sentinel so LLMClient(cache=None) can switch caching off explicitly
+_DEFAULT_CACHE = object()
+
+class GenerationCancelled(Exception):
+    """Raised by generate_test_cases when its should_cancel callback asks it to stop."""
+
+
+class ResponseFormatRejected(Exception):
+    """Raised by LLMClient when the model does not accept the requested response_format.
+
+    The prompt was written for that format, so the caller rebuilds it for
+    the next format the client still supports instead of resending it as is.
+    """
+
+
+class LLMRequestFailed(Exception):
+    """Raised by LLMClient when a request has failed for good.
+
+    The transport has already retried transient errors, so sending the same
+    request again straight away would only repeat the failure. A
+    ``request_specific`` failure (a 400 such as an overflowing context
+    window) concerns this prompt only; anything else (auth, quota, an API
+    that stays down) would fail every other request of the run as well.
+    """
+
+    def __init__(self, error: Exception):
+        super().__init__(f"{error.__class__.__name__}: {error}")
+        self.request_specific = isinstance(error, (openai.BadRequestError, openai.UnprocessableEntityError))
+
+
+SYSTEM_PROMPT = "You are a QA expert who creates comprehensive test cases with detailed steps."
+
+
 class LLMClient:
-    def __init__(self):
+    def __init__(self, model: Optional[str] = None, cache: Optional[ResponseCache] = _DEFAULT_CACHE,
+                 transport: Optional[Transport] = None):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in .env file")
-        self.client = OpenAI(api_key=self.api_key)
+        # Clients share one connection pool, rate limiter and retry policy per process
+        self.transport = transport or default_transport()
+        self.client = self.transport.client(self.api_key, os.getenv("OPENAI_BASE_URL"))
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.system_prompt = SYSTEM_PROMPT
+        self.cache = cache_from_env() if cache is _DEFAULT_CACHE else cache
+        # response_format types ("json_schema", "json_object") the model has rejected
+        self.rejected_formats = set()
+
+    @property
+    def supports_response_format(self) -> bool:
+        return self.supports(RESPONSE_FORMAT)
 
-    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> str:
+    def supports(self, response_format: Dict) -> bool:
+        return response_format["type"] not in self.rejected_formats
+
+    @metrics.timed("llm.generate")
+    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000,
+                 validate: Optional[Callable[[str], object]] = None,
+                 response_format: Optional[Dict] = None) -> str:
+        """Return the model's reply, serving repeats from the response cache.
+
+        Only replies for which ``validate`` returns something truthy are
+        stored, so unparseable output is never replayed. Raises
+        ResponseFormatRejected if the model does not accept ``response_format``
+        and LLMRequestFailed if the request fails otherwise.
+        """
+        self._check_format(response_format)
+        key = None
+        if self.cache is not None:
+            key = make_cache_key(self.model, self.system_prompt, prompt, temperature, max_tokens, response_format)
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics.count("llm.cache_hits")
+                return cached
+        reserved = self._reserve(prompt, max_tokens)
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a QA expert who creates comprehensive test cases with detailed steps."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
+            response = self.transport.call(lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
                 temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+                max_tokens=max_tokens,
+                **self._format_options(response_format)
+            ), reserved)
+            self.transport.settle(reserved, getattr(response, "usage", None))
+            self._record_usage(getattr(response, "usage", None), time.perf_counter() - started)
+            content = response.choices[0].message.content
+        except openai.BadRequestError as e:
+            if response_format is not None and _rejects_format(e):
+                self._response_format_rejected(response_format, e)
+            self._request_failed("generating", e)
         except Exception as e:
-            print(f"Error generating content: {e}")
-            return None
+            self._request_failed("generating", e)
+        if key is not None and content and (validate is None or validate(content)):
+            self.cache.set(key, content)
+        return content
+
+    def stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000,
+               validate: Optional[Callable[[str], object]] = None,
+               response_format: Optional[Dict] = None) -> Iterator[str]:
+        """Yield the model's reply chunk by chunk as it is produced.
+
+        A cached reply is yielded as a single chunk; a completed stream is
+        cached under the same rules as ``generate``, and failures raise the
+        same exceptions, also when the stream breaks off part way.
+        """
+        self._check_format(response_format)
+        key = None
+        if self.cache is not None:
+            key = make_cache_key(self.model, self.system_prompt, prompt, temperature, max_tokens, response_format)
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics.count("llm.cache_hits")
+                yield cached
+                return
+        parts = []
+        reserved = self._reserve(prompt, max_tokens)
+        started = time.perf_counter()
+        try:
+            response = self.transport.call(lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+                **self._format_options(response_format)
+            ), reserved)
+            # llm.request only covers opening the stream; the body is read here
+            for event in metrics.timed_iter("llm.stream", response):
+                if getattr(event, "usage", None):
+                    self.transport.settle(reserved, event.usage)
+                    self._record_usage(event.usage, time.perf_counter() - started)
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except openai.BadRequestError as e:
+            if response_format is not None and not parts and _rejects_format(e):
+                self._response_format_rejected(response_format, e)
+            self._request_failed("streaming", e)
+        except Exception as e:
+            self._request_failed("streaming", e)
+        content = "".join(parts)
+        if key is not None and content and (validate is None or validate(content)):
+            self.cache.set(key, content)
+
+    @staticmethod
+    def _format_options(response_format: Optional[Dict]) -> Dict:
+        return {"response_format": response_format} if response_format else {}
+
+    def _record_usage(self, usage, seconds: float) -> None:
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        metrics.count("llm.calls")
+        metrics.count("llm.prompt_tokens", prompt_tokens)
+        metrics.count("llm.completion_tokens", completion_tokens)
+        metrics.record_call(model=self.model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                            seconds=round(seconds, 3))
+
+    def _check_format(self, response_format: Optional[Dict]) -> None:
+        # Also catches prompts built before another thread saw the rejection
+        if response_format is not None and not self.supports(response_format):
+            raise ResponseFormatRejected(response_format["type"])
+
+    def _response_format_rejected(self, response_format: Dict, error: Exception) -> None:
+        self.rejected_formats.add(response_format["type"])
+        print(f"Model {self.model} rejected response_format {response_format['type']}: {error}")
+        raise ResponseFormatRejected(response_format["type"]) from error
+
+    @staticmethod
+    def _request_failed(action: str, error: Exception) -> None:
+        print(f"Error {action} content: {error}")
+        raise LLMRequestFailed(error) from error
+
+    def _reserve(self, prompt: str, max_tokens: int) -> int:
+        # Rate limits count max_tokens up front; usage settles the difference afterwards
+        return estimate_tokens(self.system_prompt) + estimate_tokens(prompt) + max_tokens
+
+    def _messages(self, prompt: str) -> List[Dict]:
+        return [
+            {
+                "role": "system",
+                "content": self.system_prompt
+            },
+            {"role": "user", "content": prompt}
+        ]
+
+def _parse_categories(text: Optional[str], count: int) -> Optional[List[str]]:
+    """A reply to ``TestCaseGenerator._classify``: ``count`` labels in order, or None if it does not line up."""
+    if not text or "[" not in text or "]" not in text:
+        return None
+    try:
+        labels = json.loads(text[text.index("["):text.rindex("]") + 1])
+    except ValueError:
+        return None
+    if not isinstance(labels, list) or len(labels) != count:
+        return None
+    categories = [str(label).strip().title() for label in labels]
+    return [c if c in ("Positive", "Negative", "Edge") else "" for c in categories]
+
+
+def _rejects_format(error: openai.BadRequestError) -> bool:
+    """Whether a 400 is about response_format, rather than the prompt or another parameter."""
+    if getattr(error, "param", None) == "response_format":
+        return True
+    message = str(getattr(error, "message", None) or error)
+    return "response_format" in message or "json_schema" in message
+
+
+class _ParseOnce:
+    """``validate`` callback that keeps its result.
+
+    LLMClient parses a new reply to decide whether to cache it; ``result``
+    hands that parse to the caller instead of repeating it. Cache hits are
+    not validated, so they are parsed there.
+    """
+
+    def __init__(self, parse: Callable[[str], object]):
+        self._parse = parse
+        self._text = None
+        self._result = None
+
+    def __call__(self, text: str):
+        self._text, self._result = text, self._parse(text)
+        return self._result
+
+    def result(self, text: Optional[str]):
+        if self._text is None or text != self._text:
+            return self._parse(text)
+        return self._result
+
 
 class TestCaseGenerator:
-    def __init__(self):
-        self.llm = LLMClient()
+    def __init__(self, max_workers: int = 4, max_section_tokens: int = 3000, dedupe_threshold: Optional[float] = 0.75,
+                 llm: Optional[LLMClient] = None, structured_output: Optional[bool] = None,
+                 index: Optional[SuiteIndex] = None):
+        # Pass a shared LLMClient to reuse one HTTP connection pool and response cache
+        self.llm = llm or LLMClient()
+        # Ask for schema-constrained JSON (needs a model with json_schema support); LLM_STRUCTURED_OUTPUT=1 turns it on
+        if structured_output is None:
+            structured_output = os.getenv("LLM_STRUCTURED_OUTPUT", "0").lower() in ("1", "true", "yes")
+        self.structured_output = structured_output
+        # Number of batches sent to the API at the same time
+        self.max_workers = max(1, int(max_workers))
+        # Longer requirements are split into sections of at most this many tokens
+        self.max_section_tokens = max_section_tokens
+        self.last_raw = None
+        # The LLMRequestFailed that ended the last run (or its last batch), if any
+        self.last_error = None
+        # Cases requested per call; shrinks when replies keep hitting max_tokens and grows back after clean ones
+        self.batch_sizes = {"Positive": 5, "Negative": 5, "Edge": 3}
+        self.max_batch_sizes = dict(self.batch_sizes)
+        # Truncated replies in a row before a category's batch size is halved,
+        # and clean full-size replies in a row before it grows by one again
+        self.truncation_limit = 2
+        self.recovery_replies = 3
+        # category -> (truncated replies in a row, clean full-size replies in a row)
+        self._reply_streaks = {}
+        self._sizes_lock = threading.Lock()
+        # Cases per packed request; requirements that fit in one section share their categories'
+        # prompts the way generate_packed shares them between requirements (False: one request per batch)
+        self.max_pack_cases = 12
+        self.pack_categories = True
+        # Similarity at which two cases count as duplicates (None turns dedup off)
+        self.dedupe_threshold = dedupe_threshold
+        self.dedupe_rounds = 1
+        # Earlier suites to reuse for similar requirements (LLM_SUITE_INDEX=<path> turns it on by default)
+        self.index = index if index is not None else index_from_env()
+        # Similarity at which the closest stored suite is reused without asking (None: only on request)
+        self.reuse_threshold = 0.9
+        self.last_run_stats = {}
+        self._progress = None
+        self._should_cancel = None
+        self._emit = None
+        self._batches_done = 0
+        self._batches_total = 0
+
+    def generate_test_cases(self, requirement_text: str, positive: int = 3, negative: int = 2, edge: int = 1,
+                            progress: Optional[Callable[[int, int], None]] = None,
+                            should_cancel: Optional[Callable[[], bool]] = None,
+                            reuse: Optional[int] = None, emit: Optional[Callable[[Dict], None]] = None):
+        """Generate the suite as a TestSuite; see ``iter_test_cases`` for a streaming variant.
+
+        A requirement that fits in one section has its categories packed
+        into shared requests (unless ``pack_categories`` is off); longer ones
+        are split into sections and sent in per-category batches.
+        ``progress(done, total)`` is called as batches finish. When
+        ``should_cancel()`` turns true, pending batches are skipped and
+        ``GenerationCancelled`` is raised. With an index, the stored suite
+        ``reuse`` (or one close enough to the requirement) is adapted
+        instead of generating from scratch. ``emit(tc)`` previews every case
+        as soon as the model finishes writing it (replies are then streamed),
+        as the raw dict, before dedup and normalization. If nothing parses,
+        the last raw reply is returned instead.
+        """
+        match = self.prior_match(requirement_text, reuse)
+        packed = (not match and self.pack_categories
+                  and estimate_tokens(requirement_text) <= self.max_section_tokens)
+        jobs = [] if match or packed else self._plan_jobs(requirement_text, positive, negative, edge)
+        for category, count in [("Positive", positive), ("Negative", negative), ("Edge", edge)]:
+            if count and not match:
+                print(f"Generating {count} {category} test cases...")
+
+        self._progress, self._should_cancel, self._emit = progress, should_cancel, emit
+        self._batches_done, self._batches_total = 0, 0
+        self.last_error = None
+        try:
+            if match:
+                cases = self._adapt(match, requirement_text, positive, negative, edge)
+            elif packed:
+                buckets, last_raw = self._run_packed([("", requirement_text)], (positive, negative, edge))
+                cases = self._packed_suite(buckets, "", requirement_text, last_raw)
+            else:
+                cases = self._collect(jobs, self._run_jobs(jobs))
+        finally:
+            self._progress, self._should_cancel, self._emit = None, None, None
+        self.remember(requirement_text, (positive, negative, edge), cases)
+        return cases
+
+    def find_prior(self, requirement_text: str, limit: int = 3, min_score: float = 0.3) -> List[SuiteMatch]:
+        """Stored suites for similar requirements, best first (empty without an index)."""
+        if self.index is None:
+            return []
+        return self.index.search(requirement_text, limit=limit, min_score=min_score)
+
+    def prior_match(self, requirement_text: str, reuse: Optional[int] = None) -> Optional[SuiteMatch]:
+        """The stored suite to build on: ``reuse`` by id, else the closest one above ``reuse_threshold``."""
+        if self.index is None:
+            return None
+        if reuse is not None:
+            return self.index.get(reuse)
+        if self.reuse_threshold is None:
+            return None
+        matches = self.find_prior(requirement_text, limit=1, min_score=self.reuse_threshold)
+        return matches[0] if matches else None
+
+    def remember(self, requirement_text: str, counts: Tuple[int, int, int], cases, source: Optional[str] = None) -> None:
+        """Add a finished suite to the index so later, similar requirements can reuse it."""
+        if self.index is not None and isinstance(cases, TestSuite) and len(cases):
+            self.index.add(requirement_text, cases.to_dicts(), counts, source=source)
+
+    def _adapt(self, match: SuiteMatch, requirement_text: str, positive: int, negative: int,
+               edge: int) -> TestSuite:
+        """Reuse a stored suite, generating only the cases it is short of.
+
+        Cases are taken per category up to the requested counts. A suite
+        with no categories at all (an older export) is classified by the
+        model in one request and the labels are stored back in the index;
+        cases left without a category are not reused. Missing cases are generated with the reused
+        summaries listed as ones not to repeat.
+        """
+        pools = {"Positive": [], "Negative": [], "Edge": []}
+        cases = [dict(tc) for tc in match.cases]
+        loose = [tc for tc in cases if tc.get("Category") not in pools]
+        if loose and len(loose) == len(cases):
+            for tc, category in zip(loose, self._classify(loose)):
+                tc["Category"] = category
+            if any(tc["Category"] for tc in loose):
+                self.index.add(match.requirement, cases, match.counts, source=match.source)
+        for tc in cases:
+            if tc.get("Category") in pools:
+                pools[tc["Category"]].append(tc)
+        kept, jobs = [], []
+        for category, count in [("Positive", positive), ("Negative", negative), ("Edge", edge)]:
+            taken = pools[category][:count]
+            kept.extend(taken)
+            summaries = [self._summary(tc) for tc in taken]
+            for batch in self._plan_batches(**{category.lower(): count - len(taken)}):
+                jobs.append((requirement_text,) + batch + (summaries,))
+        print(f"Reusing {len(kept)} test cases from suite #{match.id}; generating {sum(job[3] for job in jobs)} more")
+        if self._emit is not None:
+            for tc in kept:
+                self._emit(dict(tc))
+        for parsed_batch, _ in self._run_jobs(jobs):
+            kept.extend(parsed_batch or [])
+        order = {"Positive": 0, "Negative": 1, "Edge": 2}
+        kept.sort(key=lambda tc: order.get(tc['Category'], len(order)))
+        return TestSuite(self._normalize(kept))
 
-    def generate_test_cases(self, requirement_text: str, positive: int = 3, negative: int = 2, edge: int = 1) -> List[Dict]:
+    def _classify(self, cases: List[Dict]) -> List[str]:
+        """Ask the model for the category of each case in one request ("" for any it does not settle)."""
+        print(f"Classifying {len(cases)} test cases without a category...")
+        listed = "\n".join(f"{i}. {tc.get('Functionality') or ''}: {self._summary(tc)} -> {tc.get('Expected Result') or ''}"
+                           for i, tc in enumerate(cases, 1))
+        prompt = ("Classify each numbered test case below as \"Positive\", \"Negative\" or \"Edge\".\n\n"
+                  "IMPORTANT:\n"
+                  f"- Output ONLY a JSON array of {len(cases)} strings, one per test case in the same order, "
+                  "NO explanation.\n\n"
+                  f"Test cases:\n{listed}")
+        parse = _ParseOnce(lambda text: _parse_categories(text, len(cases)))
+        if not self._halted():
+            self._check_cancel()
+            try:
+                raw = self.llm.generate(prompt, temperature=0.0, max_tokens=50 + 5 * len(cases), validate=parse)
+                categories = parse.result(raw)
+                if categories is not None:
+                    return categories
+                print("  ✗ Could not parse the categories; those cases are generated afresh")
+            except LLMRequestFailed as e:
+                self._request_failed(e)
+        return [""] * len(cases)
+
+    def generate_sections(self, sections: List[Tuple[str, Tuple[int, int, int]]],
+                          progress: Optional[Callable[[int, int], None]] = None,
+                          should_cancel: Optional[Callable[[], bool]] = None,
+                          emit: Optional[Callable[[Dict], None]] = None) -> List[Optional[List[TestCase]]]:
+        """Generate cases for several independent texts in one worker pool.
+
+        ``sections`` holds (text, (positive, negative, edge)) pairs; the
+        result has one list per text, or None where nothing parsed (the raw
+        reply is then kept in ``last_raw``). Dedup runs within each text.
+        """
+        jobs, owners = [], []
+        for i, (text, counts) in enumerate(sections):
+            for batch in self._plan_batches(*counts):
+                jobs.append((text,) + batch)
+                owners.append(i)
+        self._progress, self._should_cancel, self._emit = progress, should_cancel, emit
+        self._batches_done, self._batches_total = 0, 0
+        self.last_error = None
+        try:
+            per_section = [[] for _ in sections]
+            for owner, (parsed_batch, raw) in zip(owners, self._run_jobs(jobs)):
+                per_section[owner].extend(parsed_batch or [])
+                if not parsed_batch and raw:
+                    self.last_raw = raw
+            results = []
+            for (text, _), cases in zip(sections, per_section):
+                if not cases:
+                    results.append(None)
+                    continue
+                filled = self._normalize(cases)
+                results.append(filled if self.dedupe_threshold is None else self._dedupe(filled, [text] * len(filled)))
+            return results
+        finally:
+            self._progress, self._should_cancel, self._emit = None, None, None
+
+    def _collect(self, jobs: List[Tuple], results: List[Tuple]):
         all_test_cases = []
-        categories = [("Positive", positive), ("Negative", negative), ("Edge", edge)]
-        for category, count in categories:
+        sources = []
+        last_raw = None
+        for job, (parsed_batch, raw) in zip(jobs, results):
+            if parsed_batch:
+                all_test_cases.extend(parsed_batch)
+                sources.extend([job[0]] * len(parsed_batch))
+            elif raw:
+                last_raw = raw
+        if not all_test_cases:
+            print("ERROR: No test cases generated. Check prompts and try reducing batch size.")
+            # Hand the unparsed model output back so callers can show or parse it
+            return last_raw
+        filled = self._normalize(all_test_cases)
+        if self.dedupe_threshold is None:
+            return TestSuite(filled)
+        return TestSuite(self._dedupe(filled, sources))
+
+    def _run_jobs(self, jobs: List[Tuple]) -> List[Tuple[Optional[List[Dict]], Optional[str]]]:
+        # Every batch retries on its own; results are collected in plan order
+        self._batches_total += len(jobs)
+        if self.max_workers == 1 or len(jobs) <= 1:
+            results = []
+            for job in jobs:
+                results.append(self._run_batch(*job))
+                self._batch_finished()
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            futures = [pool.submit(metrics.bind(self._run_batch), *job) for job in jobs]
+            for _ in as_completed(futures):
+                self._batch_finished()
+            return [f.result() for f in futures]
+
+    def _batch_finished(self) -> None:
+        self._batches_done += 1
+        if self._progress is not None:
+            self._progress(self._batches_done, self._batches_total)
+
+    def _request_failed(self, error: LLMRequestFailed) -> None:
+        # A failure that stops the run is kept over later, request-specific ones
+        if not self._halted():
+            self.last_error = error
+
+    def _halted(self) -> bool:
+        """Whether a failed request has stopped the run; later batches would only fail the same way."""
+        return self.last_error is not None and not self.last_error.request_specific
+
+    def _check_cancel(self) -> None:
+        if self._should_cancel is not None and self._should_cancel():
+            raise GenerationCancelled("Generation was cancelled")
+
+    def _dedupe(self, cases: List[TestCase], sources: List[str]) -> List[TestCase]:
+        """Drop near-duplicates and ask for replacements, distinct from what was kept."""
+        dedup = Deduplicator(self.dedupe_threshold)
+        kept = []
+        dropped = {}
+        for tc, source in zip(cases, sources):
+            if dedup.add(tc):
+                kept.append(tc)
+            else:
+                key = (source, tc.category)
+                dropped[key] = dropped.get(key, 0) + 1
+        duplicates = dedup.dropped
+        replaced = 0
+        for _ in range(self.dedupe_rounds):
+            if not dropped:
+                break
+            print(f"Requesting {sum(dropped.values())} replacements for duplicate test cases...")
+            jobs = [(source, category, 0, count, self._recent_summaries(kept, category))
+                    for (source, category), count in dropped.items()]
+            dropped = {}
+            for job, (parsed_batch, _) in zip(jobs, self._run_jobs(jobs)):
+                for tc in self._normalize(parsed_batch or [], start=len(kept)):
+                    if dedup.add(tc):
+                        kept.append(tc)
+                        replaced += 1
+                    else:
+                        key = (job[0], tc.category)
+                        dropped[key] = dropped.get(key, 0) + 1
+        # Keep the suite grouped by category after replacements were appended
+        order = {"Positive": 0, "Negative": 1, "Edge": 2}
+        kept.sort(key=lambda tc: order.get(tc.category, len(order)))
+        self.last_run_stats = {
+            "generated": dedup.seen,
+            "duplicates": dedup.dropped,
+            "duplicate_rate": (duplicates / len(cases)) if cases else 0.0,
+            "replacements": replaced,
+            "kept": len(kept),
+        }
+        print(f"Dedup: {duplicates} of {len(cases)} first-pass cases were duplicates "
+              f"({self.last_run_stats['duplicate_rate']:.0%}), {replaced} replaced")
+        return kept
+
+    @staticmethod
+    def _recent_summaries(cases: List[TestCase], category: str, limit: int = 40) -> List[str]:
+        return [tc.summary for tc in cases if tc.category == category][-limit:]
+
+    def generate_packed(self, requirements: Dict[str, str], positive: int = 3, negative: int = 2,
+                        edge: int = 1) -> Dict[str, object]:
+        """Generate suites for many small requirements with as few API calls as possible.
+
+        ``requirements`` maps an id to its text; the result maps each id to
+        what ``generate_test_cases`` would return for it. Categories and
+        requirements share prompts up to ``max_section_tokens`` of text and
+        ``max_pack_cases`` cases; anything a packed reply misses is requested
+        with the normal per-category batches.
+        """
+        self.last_error = None
+        small = [(key, text) for key, text in requirements.items() if estimate_tokens(text) <= self.max_section_tokens]
+        packed_keys = {key for key, _ in small}
+        # Long requirements are split into sections by the regular path instead
+        results = {key: self.generate_test_cases(text, positive, negative, edge)
+                   for key, text in requirements.items() if key not in packed_keys}
+        buckets, last_raw = self._run_packed(small, (positive, negative, edge))
+        for key, text in small:
+            results[key] = self._packed_suite(buckets, key, text, last_raw)
+        return {key: results[key] for key in requirements}
+
+    def _run_packed(self, requirements: List[Tuple[str, str]], counts: Tuple[int, int, int]
+                    ) -> Tuple[Dict[Tuple[str, str], List[Dict]], Dict[str, str]]:
+        """Send packed requests for (key, text) requirements, then fill what the replies missed.
+
+        Returns the cases per (key, category) and the last raw reply per key.
+        """
+        packs = plan_packs(requirements, {key: counts for key, _ in requirements},
+                           self.max_section_tokens, self.max_pack_cases)
+        print(f"Packed {len(requirements)} requirement(s) into {len(packs)} requests")
+        self._batches_total += len(packs)
+        if len(packs) <= 1 or self.max_workers == 1:
+            replies = []
+            for pack in packs:
+                replies.append(self._run_pack(pack))
+                self._batch_finished()
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(packs))) as pool:
+                futures = [pool.submit(metrics.bind(self._run_pack), pack) for pack in packs]
+                for _ in as_completed(futures):
+                    self._batch_finished()
+                replies = [f.result() for f in futures]
+
+        buckets = {(key, category): [] for key, _ in requirements for category in ("Positive", "Negative", "Edge")}
+        wanted = dict.fromkeys(buckets, 0)
+        last_raw = {}
+        for pack, (split, raw) in zip(packs, replies):
+            for item, cases in split.items():
+                buckets[item].extend(cases)
+            for key, category, count in pack.items:
+                wanted[(key, category)] += count
+                if raw:
+                    last_raw[key] = raw
+
+        # Whatever the packed replies left out goes through the regular batch path
+        texts = dict(requirements)
+        jobs, job_items = [], []
+        for (key, category), cases in buckets.items():
+            missing = wanted[(key, category)] - len(cases)
+            if missing > 0:
+                existing = [self._summary(tc) for tc in cases]
+                for batch_start in range(0, missing, self.batch_sizes[category]):
+                    count = min(self.batch_sizes[category], missing - batch_start)
+                    jobs.append((texts[key], category, len(cases) + batch_start, count, existing))
+                    job_items.append((key, category))
+        if jobs:
+            print(f"Requesting {sum(job[3] for job in jobs)} cases the packed replies missed...")
+        for item, (parsed_batch, raw) in zip(job_items, self._run_jobs(jobs)):
+            buckets[item].extend(parsed_batch or [])
+            if raw:
+                last_raw[item[0]] = raw
+        return buckets, last_raw
+
+    def _packed_suite(self, buckets: Dict[Tuple[str, str], List[Dict]], key: str, text: str,
+                      last_raw: Dict[str, str]):
+        """One requirement's TestSuite from ``_run_packed`` buckets, or its last raw reply if nothing parsed."""
+        cases = [tc for category in ("Positive", "Negative", "Edge") for tc in buckets[(key, category)]]
+        if not cases:
+            print("ERROR: No test cases generated. Check prompts and try reducing batch size.")
+            return last_raw.get(key)
+        filled = self._normalize(cases)
+        return TestSuite(filled if self.dedupe_threshold is None else self._dedupe(filled, [text] * len(filled)))
+
+    def _run_pack(self, pack: Pack) -> Tuple[Dict[Tuple[str, str], List[Dict]], Optional[str]]:
+        """Send one packed prompt and split the reply; no retries, gaps are filled by the caller."""
+        # Packed prompts ask for a bare array, so only the schema (which overrides that) is worth sending
+        response_format = PACKED_RESPONSE_FORMAT if self._response_format() is RESPONSE_FORMAT else None
+        prompt = create_packed_prompt(pack)
+        if self._halted():
+            return split_reply(pack, []), None
+        self._check_cancel()
+        try:
+            try:
+                raw, cases = self._request_batch(prompt, None, response_format, None)
+            except ResponseFormatRejected:
+                raw, cases = self._request_batch(prompt, None, None, None)
+        except LLMRequestFailed as e:
+            self._request_failed(e)
+            return split_reply(pack, []), None
+        if cases is None:
+            cases, _ = self._salvage_parse(raw)
+        return split_reply(pack, cases or []), raw
+
+    def iter_test_cases(self, requirement_text: str, positive: int = 3, negative: int = 2, edge: int = 1) -> Iterator[TestCase]:
+        """Stream test cases as soon as the model finishes writing each one.
+
+        Batches run concurrently like ``generate_test_cases``; cases are
+        yielded in arrival order as normalized TestCase objects.
+        If nothing parses, ``self.last_raw`` holds the last raw reply.
+        """
+        jobs = self._plan_jobs(requirement_text, positive, negative, edge)
+        self.last_raw, self.last_error = None, None
+        if not jobs:
+            return
+        done = object()
+        events = queue.Queue()
+        dedup = Deduplicator(self.dedupe_threshold) if self.dedupe_threshold is not None else None
+        dropped = {}
+        kept = []
+
+        def worker(job):
+            try:
+                self._stream_batch(*job, emit=lambda tc: events.put((job[0], tc)))
+            finally:
+                events.put(done)
+
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)))
+        try:
+            for job in jobs:
+                pool.submit(metrics.bind(worker), job)
+            remaining, rounds = len(jobs), 0
+            while remaining:
+                item = events.get()
+                if item is done:
+                    remaining -= 1
+                    if not remaining and dropped and rounds < self.dedupe_rounds:
+                        # Replace the duplicates once every first-pass batch is in
+                        rounds += 1
+                        for (source, category), count in dropped.items():
+                            pool.submit(metrics.bind(worker),
+                                        (source, category, 0, count, self._recent_summaries(kept, category)))
+                            remaining += 1
+                        dropped = {}
+                    continue
+                source, tc = item
+                tc = normalize(tc, len(kept))
+                if dedup is not None and not dedup.add(tc):
+                    key = (source, tc.category)
+                    dropped[key] = dropped.get(key, 0) + 1
+                    continue
+                kept.append(tc)
+                yield tc
+        finally:
+            # Stop queued batches if the consumer walks away early
+            pool.shutdown(wait=False, cancel_futures=True)
+            if dedup is not None:
+                self.last_run_stats = dict(dedup.stats(), kept=len(kept))
+
+    def _stream_batch(self, requirement_text: str, category: str, batch_start: int, batch_count: int,
+                      existing: Optional[List[str]] = None, emit: Callable[[Dict], None] = None) -> int:
+        summaries = []
+        failures = 0
+        while len(summaries) < batch_count and failures < 3 and not self._halted():  # retry logic
+            needed = min(batch_count - len(summaries), self.batch_sizes[category])
+            response_format = self._response_format()
+            prompt = self._create_batch_prompt(requirement_text, category, needed, existing=(existing or []) + summaries,
+                                               response_format=response_format)
+            # A structured reply wraps the array in {"test_cases": [...]}; the parser starts at the first '['
+            parser = JSONArrayStreamParser()
+            chunks = []
+            got = 0
+            try:
+                # The stream parser has seen the whole reply by the time it is validated for the cache
+                for chunk in self.llm.stream(prompt, temperature=0.2, max_tokens=4000,
+                                             validate=lambda _: parser.complete, response_format=response_format):
+                    chunks.append(chunk)
+                    for tc in parser.feed(chunk):
+                        if got >= needed:
+                            continue
+                        tc['Category'] = category
+                        summaries.append(self._summary(tc))
+                        emit(tc)
+                        got += 1
+            except ResponseFormatRejected:
+                # Not a failed attempt: the prompt is rebuilt for the next format the model accepts
+                continue
+            except LLMRequestFailed as e:
+                # Already retried by the transport: end the batch with what it streamed so far
+                self._request_failed(e)
+                break
+            # A reply without a single case says nothing about whether the batch size fits
+            if got or parser.truncated:
+                self._note_reply(category, needed, parser.truncated)
+            if got:
+                print(f"  ✓ Streamed {got} {category} cases")
+                continue
+            failures += 1
+            metrics.count("parse.failures")
+            self.last_raw = "".join(chunks) or self.last_raw
+            print(f"  ✗ Could not parse streamed {category} batch at {batch_start}, attempt {failures}")
+        if len(summaries) < batch_count:
+            print(f"  ✗ Warning: {category} batch at {batch_start} produced {len(summaries)} of {batch_count} cases")
+        return len(summaries)
+
+    def _plan_jobs(self, requirement_text: str, positive: int, negative: int, edge: int) -> List[Tuple[str, str, int, int]]:
+        """Plan (prompt text, category, batch start, batch count) jobs.
+
+        Requirements over ``max_section_tokens`` are split into sections and
+        each category's count is shared out in proportion to section size, so
+        no prompt carries the whole document.
+        """
+        sections = split_sections(requirement_text, self.max_section_tokens)
+        if len(sections) <= 1:
+            return [(requirement_text,) + batch for batch in self._plan_batches(positive, negative, edge)]
+
+        print(f"Requirement split into {len(sections)} sections")
+        weights = [section.tokens for section in sections]
+        texts = [f"[Section {i + 1} of {len(sections)}: {section.title}]\n{section.text}"
+                 for i, section in enumerate(sections)]
+        jobs = []
+        for category, count in [("Positive", positive), ("Negative", negative), ("Edge", edge)]:
+            for text, share in zip(texts, allocate_counts(count, weights)):
+                jobs.extend((text,) + batch for batch in self._plan_batches(**{category.lower(): share}))
+        return jobs
+
+    def _plan_batches(self, positive: int = 0, negative: int = 0, edge: int = 0) -> List[Tuple[str, int, int]]:
+        batches = []
+        for category, count in [("Positive", positive), ("Negative", negative), ("Edge", edge)]:
             if count == 0:
                 continue
-            print(f"Generating {count} {category} test cases...")
-            batch_size = 3 if category == "Edge" else 5
+            batch_size = self.batch_sizes[category]
             for batch_start in range(0, count, batch_size):
-                batch_count = min(batch_size, count - batch_start)
-                success = False
-                for attempt in range(3):  # retry logic
-                    prompt = self._create_batch_prompt(requirement_text, category, batch_count)
-                    raw = self.llm.generate(prompt, temperature=0.2, max_tokens=4000)
-                    parsed_batch = self._try_parse(raw)
-                    if parsed_batch:
-                        for tc in parsed_batch:
-                            if isinstance(tc, dict):
-                                tc['Category'] = category
-                        all_test_cases.extend(parsed_batch)
-                        print(f"  ✓ Successfully generated {len(parsed_batch)} {category} cases")
-                        success = True
-                        break
-                    else:
-                        print(f"  ✗ Could not parse {category} batch at {batch_start}, attempt {attempt+1}. Raw response excerpt:\n{raw[:250]}\n")
-                if not success:
-                    print(f"  ✗ Warning: Could not parse {category} batch after 3 attempts")
-        if not all_test_cases:
-            print("ERROR: No test cases generated. Check prompts and try reducing batch size.")
-        return self._fill_missing_fields(all_test_cases)
+                batches.append((category, batch_start, min(batch_size, count - batch_start)))
+        return batches
 
-    def _create_batch_prompt(self, requirement_text, category, count):
+    def _run_batch(self, requirement_text: str, category: str, batch_start: int, batch_count: int,
+                   existing: Optional[List[str]] = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """Generate one batch, keeping partial output and asking only for what is missing.
+
+        ``existing`` lists summaries of cases the model must not repeat.
+        """
+        collected = []
+        raw = None
+        failures = 0
+        while len(collected) < batch_count and failures < 3 and not self._halted():  # retry logic
+            needed = min(batch_count - len(collected), self.batch_sizes[category])
+            summaries = (existing or []) + [self._summary(tc) for tc in collected]
+            response_format = self._response_format()
+            prompt = self._create_batch_prompt(requirement_text, category, needed, existing=summaries,
+                                               response_format=response_format)
+            self._check_cancel()
+            try:
+                # Only the first reply is taken whole, so only that one may preview more than needed
+                raw, parsed_batch = self._request_batch(prompt, category, response_format,
+                                                        None if not collected else needed)
+            except ResponseFormatRejected:
+                # Not a failed attempt: the prompt is rebuilt for the next format the model accepts
+                continue
+            except LLMRequestFailed as e:
+                # Already retried by the transport, so not a parse failure worth another attempt
+                self._request_failed(e)
+                break
+            truncated = False
+            if parsed_batch is None:
+                parsed_batch, truncated = self._salvage_parse(raw)
+                if parsed_batch:
+                    metrics.count("parse.salvaged", len(parsed_batch))
+                    print(f"  ~ Salvaged {len(parsed_batch)} {category} cases from a broken reply")
+            parsed_batch = [tc for tc in parsed_batch or [] if isinstance(tc, dict)]
+            # A reply without a single case says nothing about whether the batch size fits
+            if parsed_batch or truncated:
+                self._note_reply(category, needed, truncated)
+            # The first full reply is taken as-is; follow-ups only fill the gap
+            if collected:
+                parsed_batch = parsed_batch[:needed]
+            if parsed_batch:
+                for tc in parsed_batch:
+                    tc['Category'] = category
+                collected.extend(parsed_batch)
+                print(f"  ✓ Successfully generated {len(parsed_batch)} {category} cases")
+                continue
+            failures += 1
+            metrics.count("parse.failures")
+            print(f"  ✗ Could not parse {category} batch at {batch_start}, attempt {failures}. Raw response excerpt:\n{(raw or '')[:250]}\n")
+        if not collected:
+            if failures:
+                print(f"  ✗ Warning: Could not parse {category} batch after {failures} attempts")
+            return None, raw
+        return collected, raw
+
+    def _request_batch(self, prompt: str, category: Optional[str], response_format: Optional[Dict],
+                       limit: Optional[int]) -> Tuple[Optional[str], Optional[List[Dict]]]:
+        """Return the raw reply to one batch prompt and its parse (None if it does not parse).
+
+        The reply is streamed when cases are previewed through ``emit``, with
+        ``category`` set on each (a packed reply, ``category`` None, keeps
+        the model's own). Either way it is parsed once, not again when it is cached.
+        """
+        if self._emit is None:
+            parse = _ParseOnce(self._parse_reply)
+            raw = self.llm.generate(prompt, temperature=0.2, max_tokens=4000, validate=parse,
+                                    response_format=response_format)
+            return raw, parse.result(raw)
+        parser = JSONArrayStreamParser()
+        chunks = []
+        for chunk in self.llm.stream(prompt, temperature=0.2, max_tokens=4000, validate=lambda _: parser.complete,
+                                     response_format=response_format):
+            chunks.append(chunk)
+            for tc in parser.feed(chunk):
+                if limit is not None and limit <= 0:
+                    continue
+                if isinstance(tc, dict):
+                    preview = {k: v for k, v in tc.items() if k != "Requirement"}
+                    if category is not None:
+                        preview["Category"] = category
+                    self._emit(preview)
+                    limit = None if limit is None else limit - 1
+        raw = "".join(chunks) or None
+        return raw, self._parse_reply(raw)
+
+    @staticmethod
+    def _summary(tc: Dict) -> str:
+        return str(tc.get('Test Summary') or tc.get('Functionality') or "")
+
+    def _note_reply(self, category: str, requested: int, truncated: bool) -> None:
+        """Halve a category's batch size after ``truncation_limit`` truncated replies in a row,
+        and grow it back by one after ``recovery_replies`` clean replies at full size."""
+        if truncated:
+            metrics.count("llm.truncated")
+        # Batches of one category run on several threads at once
+        with self._sizes_lock:
+            size = self.batch_sizes[category]
+            truncations, clean = self._reply_streaks.get(category, (0, 0))
+            if truncated:
+                truncations, clean = truncations + 1, 0
+                if truncations >= self.truncation_limit and size > 1:
+                    self.batch_sizes[category] = max(1, size // 2)
+                    truncations = 0
+                    print(f"  ~ {category} replies keep being truncated; batch size lowered to {self.batch_sizes[category]}")
+            else:
+                truncations = 0
+                # Smaller follow-up requests say nothing about whether the full size fits
+                if requested >= size:
+                    clean += 1
+                    if clean >= self.recovery_replies and size < self.max_batch_sizes.get(category, size):
+                        self.batch_sizes[category] = size + 1
+                        clean = 0
+                        print(f"  ~ {category} replies fit again; batch size raised to {self.batch_sizes[category]}")
+            self._reply_streaks[category] = (truncations, clean)
+
+    def _response_format(self) -> Optional[Dict]:
+        """The strictest response_format the model still accepts, or None for plain text."""
+        if self.structured_output:
+            for response_format in (RESPONSE_FORMAT, JSON_OBJECT_FORMAT):
+                if self.llm.supports(response_format):
+                    return response_format
+        return None
+
+    def _create_batch_prompt(self, requirement_text, category, count, existing=None, response_format=None):
+        avoid = ""
+        if existing:
+            listed = "\n".join(f"  - {s}" for s in existing if s)
+            avoid = f"- These {category} test cases already exist; every new one must be distinct from them:\n{listed}\n"
+        if response_format is RESPONSE_FORMAT:
+            # The response schema fixes the shape, so the prompt only needs the content rules
+            return (f"Generate exactly {count} {category} test cases for the requirement below.\n\n"
+                    "IMPORTANT:\n"
+                    "- Put every test case in the test_cases array; Test Steps is a list of short steps.\n"
+                    f"- Every test's Category must be \"{category}\"\n"
+                    f"{avoid}\n"
+                    f"Requirement:\n{requirement_text}")
+        if response_format is JSON_OBJECT_FORMAT:
+            # JSON mode only guarantees valid JSON (and requires the word in the prompt), so the shape is spelled out
+            return (f"Generate exactly {count} {category} test cases for the requirement below.\n\n"
+                    "IMPORTANT:\n"
+                    "- Reply with a JSON object of the form {\"test_cases\": [...]}, NO explanation.\n"
+                    "- Each test case must have: Functionality, Test Summary, Pre Condition, Test Data, Test Steps (array), Expected Result, Category\n"
+                    f"- Every test's Category must be \"{category}\"\n"
+                    f"{avoid}\n"
+                    f"Requirement:\n{requirement_text}")
         return (f"Generate exactly {count} {category} test cases as a JSON array for the requirement below.\n\n"
                 "IMPORTANT:\n"
                 "- Output ONLY a JSON array, NO explanation, NO markdown.\n"
                 "- Each object must have: Functionality, Test Summary, Pre Condition, Test Data, Test Steps (array), Expected Result, Category\n"
-                f"- Every test's Category must be \"{category}\"\n\n"
+                f"- Every test's Category must be \"{category}\"\n"
+                f"{avoid}\n"
                 f"Requirement:\n{requirement_text}")
 
+    @metrics.timed("parse.salvage")
+    def _salvage_parse(self, text: str) -> Tuple[List[Dict], bool]:
+        """Recover every well-formed object from a truncated or partly broken array.
+
+        Returns the objects found and whether the reply stopped mid-array.
+        """
+        if not text:
+            return [], False
+        parser = JSONArrayStreamParser()
+        objects = parser.feed(text)
+        return objects, parser.truncated
+
+    @metrics.timed("parse")
+    def _parse_reply(self, text: str) -> Optional[List[Dict]]:
+        """Parse a reply, taking the schema fast path first when structured output is on."""
+        if self.structured_output:
+            cases = parse_structured(text)
+            if cases is not None:
+                return cases
+        return self._try_parse(text)
+
     def _try_parse(self, text: str) -> List[Dict]:
         if not text or not text.strip():
             return None
@@ -107,28 +999,7 @@ class TestCaseGenerator:
             return None
         return None
 
-    def _fill_missing_fields(self, items: List[Dict]) -> List[Dict]:
-        filled = []
-        for idx, tc in enumerate(items):
-            if not isinstance(tc, dict):
-                tc = {}
-            func = tc.get('Functionality') or ""
-            summary = tc.get('Test Summary') or ""
-            pre = tc.get('Pre Condition') or ""
-            test_data = tc.get('Test Data') or ""
-            steps = tc.get('Test Steps') or []
-            expected = tc.get('Expected Result') or ""
-            category = tc.get('Category') or ""
-            if not func: func = f"Test Case {idx + 1}"
-            if not summary: summary = f"Verify {func}"
-            if not expected: expected = f"System should behave as expected for {func}."
-            filled.append({
-                'Functionality': func,
-                'Test Summary': summary,
-                'Pre Condition': pre,
-                'Test Data': test_data,
-                'Test Steps': steps,
-                'Expected Result': expected,
-                'Category': category
-            })
-        return filled
+    @metrics.timed("normalize")
+    def _normalize(self, items: List[Dict], start: int = 0) -> List[TestCase]:
+        # The only normalization pass; the app and exporters read the resulting TestCase values as they are
+        return [normalize(tc, idx) for idx, tc in enumerate(items, start)]
@@ -0,0 +1,188 @@
+# incremental.py
+"""Incremental regeneration for requirements that are edited between runs.
+
+The requirement is split into sections and each section's test cases are
+stored under a hash of its text. On the next run only new or changed
+sections go to the LLM; unchanged sections reuse their stored cases and
+cases of sections that disappeared are simply not carried over.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from chunking import Section, allocate_counts, split_sections
+from dedup import Deduplicator
+from generator import TestCaseGenerator
+from models import TestCase, TestSuite
+
+CATEGORY_ORDER = {"Positive": 0, "Negative": 1, "Edge": 2}
+
+
+def section_hash(section: Section) -> str:
+    """Hash of a section's text, ignoring whitespace-only edits."""
+    normalized = " ".join(f"{section.title}\n{section.text}".split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SectionStore:
+    """SQLite store of the test cases generated for each section.
+
+    Entries are keyed by section hash and the requested (positive,
+    negative, edge) totals; ``max_entries`` bounds the table, dropping the
+    least recently used sections first. Documents record their current
+    section list so removed sections can be reported.
+    """
+
+    def __init__(self, path: str = ".cache/sections.sqlite", max_entries: int = 20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " hash TEXT NOT NULL, counts TEXT NOT NULL, cases TEXT NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (hash, counts))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sections_accessed ON sections(accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS documents (doc_id TEXT PRIMARY KEY, hashes TEXT NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def _counts_key(counts: Tuple[int, int, int]) -> str:
+        return "/".join(str(int(c)) for c in counts)
+
+    def get(self, digest: str, counts: Tuple[int, int, int]) -> Optional[List[TestCase]]:
+        key = self._counts_key(counts)
+        with self._lock:
+            row = self._conn.execute("SELECT cases FROM sections WHERE hash = ? AND counts = ?", (digest, key)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE sections SET accessed = ? WHERE hash = ? AND counts = ?", (time.time(), digest, key))
+            self._conn.commit()
+        return [TestCase.from_dict(tc) for tc in json.loads(row[0])]
+
+    def set(self, digest: str, counts: Tuple[int, int, int], cases: List[TestCase]) -> None:
+        payload = json.dumps([tc.to_dict() for tc in cases], ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sections (hash, counts, cases, accessed) VALUES (?, ?, ?, ?)",
+                               (digest, self._counts_key(counts), payload, time.time()))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sections").fetchone()
+            if count > self.max_entries:
+                self._conn.execute("DELETE FROM sections WHERE rowid IN "
+                                   "(SELECT rowid FROM sections ORDER BY accessed LIMIT ?)", (count - self.max_entries,))
+            self._conn.commit()
+
+    def document(self, doc_id: str) -> List[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT hashes FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def set_document(self, doc_id: str, hashes: List[str]) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO documents (doc_id, hashes) VALUES (?, ?)", (doc_id, json.dumps(hashes)))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class IncrementalGenerator:
+    """Drop-in for TestCaseGenerator.generate_test_cases that reuses unchanged sections.
+
+    Sections are at most ``section_tokens`` long, smaller than a normal
+    prompt budget, so a small edit only invalidates the section it touches.
+    Counts are shared out across sections in proportion to their size;
+    reused sections keep the cases they had, so totals can drift by a few
+    cases after large edits.
+    """
+
+    def __init__(self, generator: Optional[TestCaseGenerator] = None, store: Optional[SectionStore] = None,
+                 section_tokens: int = 800):
+        self.generator = generator or TestCaseGenerator()
+        self.store = store or SectionStore()
+        self.section_tokens = section_tokens
+        self.last_run_stats = {}
+
+    @property
+    def last_raw(self):
+        return self.generator.last_raw
+
+    @property
+    def last_error(self):
+        return self.generator.last_error
+
+    def generate_test_cases(self, requirement_text: str, positive: int = 3, negative: int = 2, edge: int = 1,
+                            progress: Optional[Callable[[int, int], None]] = None,
+                            should_cancel: Optional[Callable[[], bool]] = None,
+                            doc_id: Optional[str] = None, reuse: Optional[int] = None,
+                            emit: Optional[Callable[[Dict], None]] = None):
+        """Return the merged suite; only new or changed sections cost API calls.
+
+        Pass ``doc_id`` to have sections that disappeared since the last run
+        of the same document counted in ``last_run_stats["removed"]``.
+        ``reuse`` adapts a stored suite from the generator's index instead;
+        the index is also consulted when no section has been seen before.
+        ``emit`` previews cases as in TestCaseGenerator.generate_test_cases,
+        starting with those of unchanged sections.
+        """
+        counts = (positive, negative, edge)
+        sections = split_sections(requirement_text, self.section_tokens)
+        hashes = [section_hash(section) for section in sections]
+        stored = [self.store.get(digest, counts) for digest in hashes]
+        changed = [i for i, cases in enumerate(stored) if cases is None]
+
+        # Edits to a known document stay incremental; only wholly new text falls back to similar suites
+        if reuse is not None or len(changed) == len(sections):
+            match = self.generator.prior_match(requirement_text, reuse)
+            if match is not None:
+                self.last_run_stats = {"sections": len(sections), "reused": 0, "regenerated": 0, "removed": 0,
+                                       "prior_suite": match.id}
+                return self.generator.generate_test_cases(requirement_text, positive, negative, edge, progress=progress,
+                                                          should_cancel=should_cancel, reuse=match.id, emit=emit)
+
+        weights = [section.tokens for section in sections]
+        shares = list(zip(*(allocate_counts(total, weights) for total in counts))) if sections else []
+        texts = [f"[Section {i + 1} of {len(sections)}: {section.title}]\n{section.text}" if len(sections) > 1
+                 else section.text for i, section in enumerate(sections)]
+        if emit is not None:
+            for cases in stored:
+                for tc in cases or []:
+                    emit(tc.to_dict())
+        if changed:
+            print(f"Regenerating {len(changed)} of {len(sections)} sections")
+            generated = self.generator.generate_sections([(texts[i], shares[i]) for i in changed],
+                                                         progress=progress, should_cancel=should_cancel, emit=emit)
+            for i, cases in zip(changed, generated):
+                stored[i] = cases or []
+                # Empty results are not stored, so a failed section is retried next time
+                if cases:
+                    self.store.set(hashes[i], counts, cases)
+
+        removed = 0
+        if doc_id is not None:
+            removed = len(set(self.store.document(doc_id)) - set(hashes))
+            self.store.set_document(doc_id, hashes)
+        self.last_run_stats = {"sections": len(sections), "reused": len(sections) - len(changed),
+                               "regenerated": len(changed), "removed": removed}
+
+        merged = self._merge(stored)
+        if not merged:
+            return self.generator.last_raw
+        self.generator.remember(requirement_text, counts, merged)
+        return merged
+
+    def _merge(self, per_section: List[List[TestCase]]) -> TestSuite:
+        """Concatenate sections, drop cross-section duplicates and group by category."""
+        cases = [tc for section_cases in per_section for tc in section_cases]
+        if self.generator.dedupe_threshold is not None:
+            cases, _ = Deduplicator(self.generator.dedupe_threshold).filter(cases)
+        cases.sort(key=lambda tc: CATEGORY_ORDER.get(tc.category, len(CATEGORY_ORDER)))
+        return TestSuite(cases)
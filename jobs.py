@@ -0,0 +1,225 @@
+# jobs.py
+"""SQLite-backed background job queue for test case generation.
+
+Jobs survive page reloads and process restarts: the UI submits a job,
+keeps only its id, and polls ``get`` for progress and results, and
+``cases`` for the test cases written so far. A job left "running" by a
+process that died is put back in the queue on start-up.
+"""
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import metrics
+from generator import GenerationCancelled, TestCaseGenerator
+from models import TestSuite
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """Persistent queue plus a pool of worker threads that run generation jobs.
+
+    ``generator_factory`` builds the TestCaseGenerator for each job, so
+    callers can share one LLMClient across all workers. Every job stores
+    its metrics report; ``profile`` ("cpu", "memory" or both, see
+    metrics.run) adds profiling data to it.
+    """
+
+    def __init__(self, path: str = ".cache/jobs.sqlite", workers: int = 2,
+                 generator_factory: Optional[Callable[[], TestCaseGenerator]] = None,
+                 poll_interval: float = 1.0, profile: Optional[str] = None):
+        self.path = path
+        self.workers = workers
+        self.generator_factory = generator_factory or TestCaseGenerator
+        self.poll_interval = poll_interval
+        # Fail here, at start-up, rather than in every job
+        metrics.parse_profile(profile)
+        self.profile = profile
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, requirement TEXT NOT NULL, params TEXT NOT NULL,"
+            " done INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0,"
+            " cancel_requested INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT,"
+            " created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created)")
+        # Cases of running jobs as the model writes them; cleared once the job's result is stored
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_cases ("
+            " job_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "metrics" not in columns:
+            # Databases created before job metrics were recorded
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN metrics TEXT")
+        # Anything still marked running was orphaned by a previous process
+        self._conn.execute("UPDATE jobs SET status = ?, done = 0 WHERE status = ?", (QUEUED, RUNNING))
+        self._conn.commit()
+
+    def _execute(self, sql: str, args=()) -> sqlite3.Cursor:
+        with self._lock:
+            cur = self._conn.execute(sql, args)
+            self._conn.commit()
+            return cur
+
+    def start(self) -> "JobQueue":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def submit(self, requirement_text: str, positive: int = 3, negative: int = 2, edge: int = 1,
+               reuse: Optional[int] = None) -> str:
+        """Queue a generation; ``reuse`` is the id of a stored suite to adapt (see suite_index.py)."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        params = {"positive": positive, "negative": negative, "edge": edge}
+        if reuse is not None:
+            params["reuse"] = reuse
+        params = json.dumps(params)
+        self._execute("INSERT INTO jobs (id, status, requirement, params, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                      (job_id, QUEUED, requirement_text, params, now, now))
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return the job as a dict (status, done, total, result, error, ...) or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["metrics"] = json.loads(job["metrics"]) if job["metrics"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def cases(self, job_id: str, start: int = 0) -> List[Dict]:
+        """Preview cases of a running job in arrival order, from the ``start``-th on (not deduplicated)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM job_cases WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                                      (job_id, start)).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job at once, or ask a running one to stop after its current batches."""
+        now = time.time()
+        cur = self._execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ?",
+                            (CANCELLED, now, job_id, QUEUED))
+        if cur.rowcount:
+            return True
+        cur = self._execute("UPDATE jobs SET cancel_requested = 1, updated = ? WHERE id = ? AND status = ?",
+                            (now, job_id, RUNNING))
+        return bool(cur.rowcount)
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than ``older_than`` seconds ago."""
+        cur = self._execute(f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND updated < ?",
+                            FINISHED + (time.time() - older_than,))
+        self._execute("DELETE FROM job_cases WHERE job_id NOT IN (SELECT id FROM jobs)")
+        return cur.rowcount
+
+    def _claim(self) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            cur = self._conn.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ?",
+                                     (RUNNING, time.time(), row["id"], QUEUED))
+            self._conn.commit()
+            if not cur.rowcount:
+                return None
+        return self.get(row["id"])
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict) -> None:
+        job_id = job["id"]
+        # A job restarted after a crash previews its cases from scratch
+        self._execute("DELETE FROM job_cases WHERE job_id = ?", (job_id,))
+        seq = itertools.count()
+
+        def progress(done: int, total: int) -> None:
+            self._execute("UPDATE jobs SET done = ?, total = ?, updated = ? WHERE id = ?",
+                          (done, total, time.time(), job_id))
+
+        def emit(tc: Dict) -> None:
+            self._execute("INSERT INTO job_cases (job_id, seq, data) VALUES (?, ?, ?)",
+                          (job_id, next(seq), json.dumps(tc, ensure_ascii=False)))
+
+        def should_cancel() -> bool:
+            return self._stop.is_set() or self._cancel_requested(job_id)
+
+        report = None
+        try:
+            generator = self.generator_factory()
+            with metrics.run(self.profile) as report:
+                result = generator.generate_test_cases(job["requirement"], progress=progress,
+                                                       should_cancel=should_cancel, emit=emit, **job["params"])
+        except GenerationCancelled:
+            # A shutdown is not a user cancel: leave the job for the next process
+            status = CANCELLED if self._cancel_requested(job_id) else QUEUED
+            self._finish(job_id, "status = ?, metrics = ?", (status, _report_json(report)))
+            return
+        except Exception as e:
+            self._finish(job_id, "status = ?, error = ?, metrics = ?", (FAILED, str(e), _report_json(report)))
+            return
+        status, error = DONE, None
+        if isinstance(result, TestSuite):
+            result = result.to_dicts()
+        if not isinstance(result, list):
+            status, error = FAILED, "No structured test cases could be parsed from the model output."
+            if getattr(generator, "last_error", None) is not None:
+                error = f"The API request failed: {generator.last_error}"
+        self._finish(job_id, "status = ?, result = ?, error = ?, metrics = ?",
+                     (status, json.dumps(result, ensure_ascii=False), error, _report_json(report)))
+
+    def _finish(self, job_id: str, assignments: str, args: tuple) -> None:
+        # The stored result (or the next run) replaces the preview
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments}, updated = ? WHERE id = ?", args + (time.time(), job_id))
+            self._conn.execute("DELETE FROM job_cases WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+
+def _report_json(report: Optional[metrics.Metrics]) -> Optional[str]:
+    return json.dumps(report.snapshot()) if report is not None else None
+
@@ -0,0 +1,302 @@
+# metrics.py
+"""Timing spans, counters and profiling hooks for the generation pipeline.
+
+Everything is recorded into the process-wide ``REGISTRY`` and, inside a
+``run()`` block, into that run's own report. The run follows the work into
+worker threads whose callables are wrapped with ``bind``, so concurrent
+runs in one process (app jobs) keep separate reports. Reports export as
+JSON or Prometheus text.
+"""
+import contextvars
+import cProfile
+import functools
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class Metrics:
+    """Thread-safe counters, span timings and (optionally) per-call records."""
+
+    def __init__(self, max_calls: int = 1000):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        # name -> [count, total seconds, max seconds]
+        self.spans: Dict[str, List[float]] = {}
+        self.calls: List[Dict] = []
+        self.max_calls = max_calls
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.profile: Optional[Dict] = None
+        self.profiler: Optional["Profiler"] = None
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def record_call(self, record: Dict) -> None:
+        with self._lock:
+            if len(self.calls) < self.max_calls:
+                self.calls.append(record)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            report = {
+                "elapsed_seconds": round((self.finished or time.time()) - self.started, 3),
+                "counters": dict(self.counters),
+                "spans": {name: {"count": int(c), "total_seconds": round(total, 6), "max_seconds": round(peak, 6)}
+                          for name, (c, total, peak) in sorted(self.spans.items())},
+            }
+            if self.max_calls:
+                report["calls"] = list(self.calls)
+            if self.profile is not None:
+                report["profile"] = self.profile
+        return report
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "testgen") -> str:
+        """Counters as ``<prefix>_<name>_total`` and spans as a ``<prefix>_span_seconds`` summary."""
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        if snap["spans"]:
+            lines.append(f"# TYPE {prefix}_span_seconds summary")
+            for name, stats in snap["spans"].items():
+                lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {stats["count"]}')
+                lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {stats["total_seconds"]:g}')
+            lines.append(f"# TYPE {prefix}_span_seconds_max gauge")
+            for name, stats in snap["spans"].items():
+                lines.append(f'{prefix}_span_seconds_max{{span="{name}"}} {stats["max_seconds"]:g}')
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+# Process totals since start-up; per-call records are only kept per run
+REGISTRY = Metrics(max_calls=0)
+_run: contextvars.ContextVar = contextvars.ContextVar("metrics_run", default=None)
+_profiler: contextvars.ContextVar = contextvars.ContextVar("metrics_profiler", default=None)
+
+
+def _targets():
+    report = _run.get()
+    return (REGISTRY, report) if report is not None else (REGISTRY,)
+
+
+def count(name: str, value: float = 1) -> None:
+    for target in _targets():
+        target.count(name, value)
+
+
+def observe(name: str, seconds: float) -> None:
+    for target in _targets():
+        target.observe(name, seconds)
+
+
+def record_call(**record) -> None:
+    """Keep one LLM call's details (tokens, seconds, ...) in the current run's report."""
+    report = _run.get()
+    if report is not None:
+        report.record_call(record)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def timed_iter(name: str, items: Iterable) -> Iterator:
+    """Iterate ``items``, recording the time spent waiting for them as one ``name`` span.
+
+    Unlike a ``span`` around the loop, the consumer's work between items is left out.
+    """
+    waited = 0.0
+    iterator = iter(items)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                waited += time.perf_counter() - start
+            yield item
+    finally:
+        observe(name, waited)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of ``span``."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind(fn: Callable) -> Callable:
+    """Wrap ``fn`` to run in another thread as part of the current run (and profile).
+
+    Call once per task: each call copies the current context, and a context
+    can only be entered by one thread at a time.
+    """
+    context = contextvars.copy_context()
+    profiler = _profiler.get()
+    if profiler is None:
+        return functools.partial(context.run, fn)
+    return functools.partial(context.run, profiler.call, fn)
+
+
+class Profiler:
+    """cProfile and/or tracemalloc for one run.
+
+    cProfile only sees the thread it is enabled on, so every task started
+    through ``bind`` is profiled on its own and merged into the run's stats.
+    tracemalloc is process-wide: allocations of other threads are included.
+    """
+
+    def __init__(self, cpu: bool = True, memory: bool = False, top: int = 25):
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+        self._main: Optional[cProfile.Profile] = None
+        self._started_tracing = False
+
+    def start(self) -> None:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.cpu:
+            self._main = self._enable()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        profile = self._enable() if self.cpu else None
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._merge(profile)
+
+    def stop(self) -> Dict:
+        report = {}
+        if self._main is not None:
+            self._main.disable()
+            self._merge(self._main)
+        if self._stats is not None:
+            report["cpu"] = self._top_functions()
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            report["memory"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [{"where": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                        for stat in snapshot.statistics("lineno")[:self.top]],
+            }
+            if self._started_tracing:
+                tracemalloc.stop()
+        return report
+
+    def dump(self, path: str) -> None:
+        """Write the merged CPU profile for pstats / snakeviz."""
+        if self._stats is not None:
+            self._stats.dump_stats(path)
+
+    @staticmethod
+    def _enable() -> Optional[cProfile.Profile]:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return None
+        return profile
+
+    def _merge(self, profile: Optional[cProfile.Profile]) -> None:
+        if profile is None:
+            return
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def _top_functions(self) -> List[Dict]:
+        rows = []
+        for (filename, line, func), (_, calls, total, cumulative, _) in self._stats.stats.items():
+            rows.append({"function": f"{filename}:{line}({func})", "calls": calls,
+                         "total_seconds": round(total, 6), "cumulative_seconds": round(cumulative, 6)})
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return rows[:self.top]
+
+
+def parse_profile(value: Optional[str]) -> Optional[Profiler]:
+    """Profiler for a "cpu", "memory" or "cpu,memory" setting ("1"/"all" mean both), or None."""
+    parts = {part.strip().lower() for part in (value or "").split(",") if part.strip()}
+    if not parts or parts & {"0", "off", "false", "no"}:
+        return None
+    if parts & {"1", "all", "true", "yes"}:
+        parts = {"cpu", "memory"}
+    unknown = parts - {"cpu", "memory"}
+    if unknown:
+        raise ValueError(f"Unknown profile mode(s): {', '.join(sorted(unknown))}. Use cpu, memory or both.")
+    return Profiler(cpu="cpu" in parts, memory="memory" in parts)
+
+
+@contextmanager
+def run(profile: Optional[str] = None) -> Iterator[Metrics]:
+    """Collect a report for the work done inside the block (see ``parse_profile`` for ``profile``)."""
+    report = Metrics()
+    profiler = parse_profile(profile)
+    run_token = _run.set(report)
+    profiler_token = _profiler.set(profiler)
+    if profiler is not None:
+        profiler.start()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            report.profile = profiler.stop()
+            report.profiler = profiler
+        _profiler.reset(profiler_token)
+        _run.reset(run_token)
+        report.finished = time.time()
+
+
+def write_report(report: Metrics, path: str) -> str:
+    """Save a report as Prometheus text (.prom / .txt) or JSON (anything else)."""
+    text = report.to_prometheus() if path.endswith((".prom", ".txt")) else report.to_json()
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    return path
@@ -0,0 +1,292 @@
+# mock_server.py
+"""Offline stand-in for the OpenAI chat completions endpoint.
+
+Point the client at it with ``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``.
+Replies are synthetic test-case arrays sized from the "exactly N <Category>"
+phrase in the prompt, or canned texts cycled in order. Latency, server
+errors, 429s and streaming are all configurable.
+
+    python mock_server.py --port 8765 --latency 0.5 --rate-limit-rate 0.1
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Union
+
+_COUNT_RE = re.compile(r"exactly (\d+) (\w+) test cases")
+# Count lines of a packed prompt: "  - R2: 3 Negative"
+_PACK_RE = re.compile(r"^\s*- (R\d+): (\d+) (\w+)$", re.MULTILINE)
+
+
+_ACTIONS = ["login", "logout", "reset password", "update profile", "search", "checkout", "signup", "upload avatar"]
+_DETAILS = ["empty", "maximum length", "unicode", "expired", "locked", "duplicate", "mixed case", "whitespace",
+            "special character", "boundary", "slow network", "mobile viewport", "stale session", "disabled",
+            "international", "trailing space", "numeric", "missing", "oversized", "concurrent"]
+_FIELDS = ["email", "password", "username", "phone number", "address", "card number", "search term", "file"]
+
+
+def synthetic_test_cases(count: int, category: str = "Positive", seed: int = 0) -> List[Dict]:
+    """Build ``count`` plausible, mutually distinct test-case objects."""
+    rnd = random.Random(seed)
+    cases = []
+    for i in range(count):
+        action = rnd.choice(_ACTIONS)
+        detail, other = rnd.sample(_DETAILS, 2)
+        field = rnd.choice(_FIELDS)
+        cases.append({
+            "Functionality": f"{action.title()} {i + 1}",
+            "Test Summary": f"Verify {category.lower()} {action} with {detail} {field} and {other} state",
+            "Pre Condition": "User is on the application home page",
+            "Test Data": {field: f"{detail}-{rnd.randint(1000, 9999)}"},
+            "Test Steps": [f"Open the {action} screen", f"Enter a {detail} {field}", f"Put the app in {other} state",
+                           "Submit the form"],
+            "Expected Result": f"The {action} flow handles the {detail} {field} as specified",
+            "Category": category,
+        })
+    return cases
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _usage(body: Dict, text: str) -> Dict:
+    prompt_tokens = sum(_estimate_tokens(m.get("content") or "") for m in body.get("messages", []))
+    completion_tokens = _estimate_tokens(text)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+class MockOpenAIServer:
+    """Threaded HTTP server speaking the chat completions wire format.
+
+    ``latency`` is the mean response delay in seconds (with ``jitter`` as a
+    +/- fraction), ``error_rate`` and ``rate_limit_rate`` are the share of
+    requests answered with HTTP 500 and 429, and ``garbage_rate`` the share
+    of successful replies that contain no JSON at all. Streaming replies are
+    split into ``chunk_size`` character deltas sent ``chunk_delay`` seconds
+    apart. Requests with a ``response_format`` get their cases wrapped in
+    ``{"test_cases": [...]}``, or a 400 when ``reject_response_format`` is
+    True or lists the format's type. Prompts longer than ``max_prompt_chars``
+    get the 400 of an exceeded context window. With ``api_key`` set, requests
+    carrying any other key get a 401.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 0.0,
+                 garbage_rate: float = 0.0, responses: Optional[List[str]] = None, chunk_size: int = 40,
+                 chunk_delay: float = 0.0, seed: int = 0,
+                 reject_response_format: Union[bool, Iterable[str]] = False, max_prompt_chars: int = 0,
+                 api_key: Optional[str] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.garbage_rate = garbage_rate
+        self.responses = list(responses or [])
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_delay = chunk_delay
+        self.reject_response_format = (reject_response_format if isinstance(reject_response_format, bool)
+                                       else frozenset(reject_response_format))
+        self.max_prompt_chars = max_prompt_chars
+        self.api_key = api_key
+        self.request_count = 0
+        self.error_count = 0
+        self.requests: List[Dict] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _next_outcome(self, body: Dict, api_key: Optional[str] = None):
+        """Pick the status and reply text for one request."""
+        with self._lock:
+            index = self.request_count
+            self.request_count += 1
+            self.requests.append(body)
+            if self.api_key and api_key != self.api_key:
+                return 401, None, 0.0
+            if self._rejects(body.get("response_format")):
+                return 400, "response_format", 0.0
+            prompt = (body.get("messages") or [{}])[-1].get("content", "")
+            if self.max_prompt_chars and len(prompt) > self.max_prompt_chars:
+                return 400, "messages", 0.0
+            roll = self._random.random()
+            delay = self.latency * (1 + self.jitter * (2 * self._random.random() - 1)) if self.latency else 0.0
+            if roll < self.rate_limit_rate:
+                self.error_count += 1
+                return 429, None, delay
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.error_count += 1
+                return 500, None, delay
+            if self.responses:
+                return 200, self.responses[index % len(self.responses)], delay
+            if self._random.random() < self.garbage_rate:
+                return 200, "Sorry, I cannot produce test cases for that.", delay
+            seed = self._random.randint(0, 1 << 30)
+        packed = _PACK_RE.findall(prompt)
+        if packed:
+            cases = []
+            for i, (tag, count, category) in enumerate(packed):
+                cases.extend(dict(tc, Requirement=tag) for tc in synthetic_test_cases(int(count), category, seed + i))
+        else:
+            match = _COUNT_RE.search(prompt)
+            count, category = (int(match.group(1)), match.group(2)) if match else (3, "Positive")
+            cases = synthetic_test_cases(count, category, seed)
+        format_type = (body.get("response_format") or {}).get("type")
+        if format_type == "json_schema":
+            # The schema types Test Data as a string
+            for tc in cases:
+                tc["Test Data"] = ", ".join(f"{k}: {v}" for k, v in tc["Test Data"].items())
+        if format_type in ("json_schema", "json_object"):
+            return 200, json.dumps({"test_cases": cases}, ensure_ascii=False), delay
+        return 200, json.dumps(cases, ensure_ascii=False), delay
+
+    def _rejects(self, response_format: Optional[Dict]) -> bool:
+        if not response_format or not self.reject_response_format:
+            return False
+        return self.reject_response_format is True or response_format.get("type") in self.reject_response_format
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                auth = self.headers.get("Authorization") or ""
+                status, text, delay = server._next_outcome(body, auth[len("Bearer "):] if auth.startswith("Bearer ") else None)
+                if delay:
+                    time.sleep(delay)
+                if status == 429:
+                    return self._json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                                      {"Retry-After": str(server.retry_after)})
+                if status == 400 and text == "response_format":
+                    kind = body["response_format"].get("type")
+                    return self._json(400, {"error": {"message": f"Invalid parameter: 'response_format' of type '{kind}' is not supported with this model.",
+                                                      "type": "invalid_request_error", "param": "response_format"}})
+                if status == 400:
+                    return self._json(400, {"error": {"message": "This model's maximum context length has been exceeded.",
+                                                      "type": "invalid_request_error", "param": "messages",
+                                                      "code": "context_length_exceeded"}})
+                if status == 401:
+                    return self._json(401, {"error": {"message": "Incorrect API key provided.",
+                                                      "type": "invalid_request_error", "code": "invalid_api_key"}})
+                if status != 200:
+                    return self._json(status, {"error": {"message": "Internal server error", "type": "server_error"}})
+                if body.get("stream"):
+                    return self._stream(body, text)
+                self._json(200, {
+                    "id": f"chatcmpl-mock-{server.request_count}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}],
+                    "usage": _usage(body, text),
+                })
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                base = {"id": "chatcmpl-mock-stream", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": body.get("model", "mock")}
+                for i in range(0, len(text), server.chunk_size):
+                    chunk = dict(base, choices=[{"index": 0, "delta": {"content": text[i:i + server.chunk_size]},
+                                                 "finish_reason": None}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                final = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    usage = dict(base, choices=[], usage=_usage(body, text))
+                    self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an offline chat completions stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- fraction applied to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--garbage-rate", type=float, default=0.0, help="share of replies with no JSON in them")
+    parser.add_argument("--response-file", help="JSON file holding a list of canned reply texts")
+    args = parser.parse_args()
+
+    responses = None
+    if args.response_file:
+        with open(args.response_file, "r", encoding="utf-8") as fh:
+            responses = json.load(fh)
+    server = MockOpenAIServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                              retry_after=args.retry_after, garbage_rate=args.garbage_rate, responses=responses)
+    print(f"Mock OpenAI server listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
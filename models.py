@@ -0,0 +1,205 @@
+# models.py
+"""Typed test-case record, a column-oriented suite, and the one normalization path.
+
+Model replies and fallback-parsed tables pass through ``normalize``, which
+maps key aliases, flattens Test Data and Test Steps and applies defaults
+once. The generator returns TestSuite objects and consumers (the app
+table, the exporters) read them directly. Dicts only appear where suites
+are stored as JSON; ``TestSuite.load`` reads those back without
+normalizing them again.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+FIELDS = ("Functionality", "Test Summary", "Pre Condition", "Test Data", "Test Steps", "Expected Result", "Category")
+# Exported columns; Category comes last so suites imported back into the index keep it
+COLUMNS = list(FIELDS)
+
+# Keys seen in model output for each field, most common first
+ALIASES = {
+    "Functionality": ("Functionality", "Function", "Feature"),
+    "Test Summary": ("Test Summary", "Summary", "TestSummary", "Title", "Test Objective"),
+    "Pre Condition": ("Pre Condition", "Precondition", "Preconditions", "Pre-Condition", "PreCondition"),
+    "Test Data": ("Test Data", "TestData", "Data"),
+    "Test Steps": ("Test Steps", "TestSteps", "Steps"),
+    "Expected Result": ("Expected Result", "Expected", "ExpectedResult", "Expected Results"),
+    "Category": ("Category", "Type"),
+}
+
+
+@dataclass(slots=True)
+class TestCase:
+    __test__ = False  # not a pytest test class
+
+    functionality: str = ""
+    summary: str = ""
+    pre_condition: str = ""
+    test_data: str = ""
+    steps: Tuple[str, ...] = ()
+    expected: str = ""
+    category: str = ""
+
+    def to_dict(self) -> Dict:
+        return {
+            "Functionality": self.functionality,
+            "Test Summary": self.summary,
+            "Pre Condition": self.pre_condition,
+            "Test Data": self.test_data,
+            "Test Steps": list(self.steps),
+            "Expected Result": self.expected,
+            "Category": self.category,
+        }
+
+    @classmethod
+    def from_dict(cls, tc: Dict) -> "TestCase":
+        """Inverse of ``to_dict``, for dicts that already went through ``normalize``."""
+        return cls(tc["Functionality"], tc["Test Summary"], tc["Pre Condition"], tc["Test Data"],
+                   tuple(tc["Test Steps"]), tc["Expected Result"], tc["Category"])
+
+    def row(self) -> List[str]:
+        """Cell values in COLUMNS order, steps one per line."""
+        return [self.functionality, self.summary, self.pre_condition, self.test_data, "\n".join(self.steps),
+                self.expected, self.category]
+
+    def is_empty(self) -> bool:
+        return not any((self.functionality, self.summary, self.pre_condition, self.test_data, self.steps,
+                        self.expected))
+
+
+def _alias(tc: Dict, field: str):
+    # Only reached when the field's own key is missing or empty
+    for key in ALIASES[field][1:]:
+        value = tc.get(key)
+        if value:
+            return value
+    return None
+
+
+def _text(value) -> str:
+    if value.__class__ is str:
+        return value.strip()
+    return str(value) if value else ""
+
+
+def normalize(tc: Dict, index: int = 0, fill_defaults: bool = True) -> TestCase:
+    """Build a TestCase from any test-case dict the model or a parser produced.
+
+    Aliased keys are mapped, a Test Data dict becomes "key: value" pairs and
+    Test Steps becomes a tuple of strings. With ``fill_defaults`` a missing
+    Functionality, Test Summary or Expected Result is derived from the
+    case's position ``index``.
+    """
+    if not isinstance(tc, dict):
+        tc = {}
+    get = tc.get
+    data = get("Test Data") or _alias(tc, "Test Data")
+    if isinstance(data, dict):
+        data = ", ".join([f"{k}: {v}" for k, v in data.items()])
+    steps = get("Test Steps") or _alias(tc, "Test Steps")
+    if isinstance(steps, (list, tuple)):
+        steps = tuple([s if s.__class__ is str else str(s) for s in steps])
+    else:
+        steps = (str(steps),) if steps else ()
+    case = TestCase(_text(get("Functionality") or _alias(tc, "Functionality")),
+                    _text(get("Test Summary") or _alias(tc, "Test Summary")),
+                    _text(get("Pre Condition") or _alias(tc, "Pre Condition")), _text(data), steps,
+                    _text(get("Expected Result") or _alias(tc, "Expected Result")),
+                    _text(get("Category") or _alias(tc, "Category")))
+    if fill_defaults:
+        if not case.functionality:
+            case.functionality = f"Test Case {index + 1}"
+        if not case.summary:
+            case.summary = f"Verify {case.functionality}"
+        if not case.expected:
+            case.expected = f"System should behave as expected for {case.functionality}."
+    return case
+
+
+class TestSuite:
+    """Column-oriented collection of test cases: one list per field, no per-case dicts."""
+
+    __test__ = False
+    __slots__ = ("functionality", "summary", "pre_condition", "test_data", "steps", "expected", "category")
+
+    def __init__(self, cases: Iterable[TestCase] = ()):
+        for name in self.__slots__:
+            setattr(self, name, [])
+        self.extend(cases)
+
+    @classmethod
+    def from_dicts(cls, items: Iterable[Dict], fill_defaults: bool = True, start: int = 0) -> "TestSuite":
+        """Normalize raw dicts into a suite; non-dicts are skipped, and so are
+        cases with no content when ``fill_defaults`` is off."""
+        suite = cls()
+        for tc in items:
+            if not isinstance(tc, dict):
+                continue
+            case = normalize(tc, start + len(suite), fill_defaults)
+            if fill_defaults or not case.is_empty():
+                suite.append(case)
+        return suite
+
+    @classmethod
+    def load(cls, items: Iterable[Dict]) -> "TestSuite":
+        """Inverse of ``to_dicts``: rebuild a stored suite without normalizing it again."""
+        suite = cls()
+        for tc in items:
+            suite.functionality.append(tc["Functionality"])
+            suite.summary.append(tc["Test Summary"])
+            suite.pre_condition.append(tc["Pre Condition"])
+            suite.test_data.append(tc["Test Data"])
+            suite.steps.append(tuple(tc["Test Steps"]))
+            suite.expected.append(tc["Expected Result"])
+            suite.category.append(tc["Category"])
+        return suite
+
+    def append(self, case: TestCase) -> None:
+        self.functionality.append(case.functionality)
+        self.summary.append(case.summary)
+        self.pre_condition.append(case.pre_condition)
+        self.test_data.append(case.test_data)
+        self.steps.append(case.steps)
+        self.expected.append(case.expected)
+        self.category.append(case.category)
+
+    def extend(self, cases: Iterable[TestCase]) -> None:
+        for case in cases:
+            self.append(case)
+
+    def __len__(self) -> int:
+        return len(self.summary)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TestSuite):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __getitem__(self, index: int) -> TestCase:
+        return TestCase(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def __iter__(self) -> Iterator[TestCase]:
+        for values in zip(*(getattr(self, name) for name in self.__slots__)):
+            yield TestCase(*values)
+
+    def rows(self) -> Iterator[List[str]]:
+        """Cell values per case in COLUMNS order, without building TestCase objects."""
+        for func, summary, pre, data, steps, expected, category in zip(
+                self.functionality, self.summary, self.pre_condition, self.test_data, self.steps, self.expected,
+                self.category):
+            yield [func, summary, pre, data, "\n".join(steps), expected, category]
+
+    def columns(self, names: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Display columns keyed by COLUMNS name, e.g. for pd.DataFrame or pyarrow."""
+        columns = {
+            "Functionality": self.functionality,
+            "Test Summary": self.summary,
+            "Pre Condition": self.pre_condition,
+            "Test Data": self.test_data,
+            "Test Steps": ["\n".join(steps) for steps in self.steps],
+            "Expected Result": self.expected,
+            "Category": self.category,
+        }
+        return {name: columns[name] for name in (names or COLUMNS)}
+
+    def to_dicts(self) -> List[Dict]:
+        return [case.to_dict() for case in self]
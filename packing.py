@@ -0,0 +1,94 @@
+# packing.py
+"""Pack several categories and small requirements into one LLM request.
+
+Every request repeats the system prompt, instructions and requirement text,
+so for short requirements the fixed cost per call outweighs the output.
+``plan_packs`` fills each prompt up to a token budget and a case limit; the
+model tags every case with its requirement, and ``split_reply`` sorts the
+cases back into (requirement, category) buckets.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from chunking import estimate_tokens
+
+CATEGORIES = ("Positive", "Negative", "Edge")
+
+
+class Pack:
+    """The requirements and (requirement, category, count) items sharing one prompt."""
+
+    def __init__(self):
+        self.requirements: Dict[str, str] = {}
+        self.items: List[Tuple[str, str, int]] = []
+        self.tokens = 0
+        self.cases = 0
+
+    def tag(self, key: str) -> str:
+        return f"R{list(self.requirements).index(key) + 1}"
+
+    def add(self, key: str, text: str, tokens: int, category: str, count: int) -> None:
+        if key not in self.requirements:
+            self.requirements[key] = text
+            self.tokens += tokens
+        self.items.append((key, category, count))
+        self.cases += count
+
+
+def plan_packs(requirements: Sequence[Tuple[str, str]], counts: Dict[str, Tuple[int, int, int]],
+               max_prompt_tokens: int = 3000, max_cases: int = 12) -> List[Pack]:
+    """Bin (key, text) requirements into packs, in input order.
+
+    ``counts`` maps each key to its (positive, negative, edge) counts. A
+    pack holds at most ``max_cases`` cases and ``max_prompt_tokens`` of
+    requirement text; a requirement's categories stay together where they fit.
+    """
+    packs = []
+    current = Pack()
+    for key, text in requirements:
+        tokens = estimate_tokens(text)
+        for category, count in zip(CATEGORIES, counts[key]):
+            while count > 0:
+                over_budget = key not in current.requirements and current.tokens + tokens > max_prompt_tokens
+                if current.cases >= max_cases or (current.items and over_budget):
+                    packs.append(current)
+                    current = Pack()
+                take = min(count, max_cases - current.cases)
+                current.add(key, text, tokens, category, take)
+                count -= take
+    if current.items:
+        packs.append(current)
+    return packs
+
+
+def create_packed_prompt(pack: Pack) -> str:
+    requirements = "\n\n".join(f"[{pack.tag(key)}]\n{text}" for key, text in pack.requirements.items())
+    wanted = "\n".join(f"  - {pack.tag(key)}: {count} {category}" for key, category, count in pack.items)
+    total = sum(count for _, _, count in pack.items)
+    return (f"Generate exactly {total} test cases as a JSON array for the tagged requirements below.\n\n"
+            "IMPORTANT:\n"
+            "- Output ONLY a JSON array, NO explanation, NO markdown.\n"
+            "- Each object must have: Requirement, Functionality, Test Summary, Pre Condition, Test Data, Test Steps (array), Expected Result, Category\n"
+            "- Requirement is the tag of the requirement the case tests, e.g. \"R1\"\n"
+            "- Category is one of \"Positive\", \"Negative\" or \"Edge\"\n"
+            f"- Produce exactly these counts:\n{wanted}\n\n"
+            f"Requirements:\n{requirements}")
+
+
+def split_reply(pack: Pack, cases: List[Dict]) -> Dict[Tuple[str, str], List[Dict]]:
+    """Sort tagged cases back into (key, category) buckets, dropping extras and strays."""
+    by_tag = {pack.tag(key): key for key in pack.requirements}
+    wanted = {}
+    for key, category, count in pack.items:
+        wanted[(key, category)] = wanted.get((key, category), 0) + count
+    buckets = {item: [] for item in wanted}
+    for tc in cases:
+        if not isinstance(tc, dict):
+            continue
+        tag = str(tc.pop("Requirement", "") or "").strip().strip("[]")
+        # With a single requirement in the pack an untagged case can only belong to it
+        key = by_tag.get(tag) or (next(iter(pack.requirements)) if len(pack.requirements) == 1 else None)
+        item = (key, str(tc.get("Category") or "").strip().title())
+        if item in buckets and len(buckets[item]) < wanted[item]:
+            tc["Category"] = item[1]
+            buckets[item].append(tc)
+    return buckets
@@ -1,8 +1,15 @@
 from generator import TestCaseGenerator
+import argparse
 import json
+import metrics
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate test cases for a sample login requirement.")
+    parser.add_argument("--metrics", help="write the run's metrics report here (.json, or .prom for Prometheus text)")
+    parser.add_argument("--profile", help="profile the run: cpu, memory or cpu,memory (reported in --metrics)")
+    args = parser.parse_args()
+
     generator = TestCaseGenerator()
 
     requirement = """
@@ -13,7 +20,10 @@ def main():
     """
 
     print("\n=== Generating Test Cases ===\n")
-    result = generator.generate_test_cases(requirement)
+    with metrics.run(args.profile) as report:
+        result = generator.generate_test_cases(requirement)
+    if args.metrics:
+        print(f"Metrics report: {metrics.write_report(report, args.metrics)}")
 
     if not result:
         print("Error: Failed to generate test cases")
@@ -23,7 +33,7 @@ def main():
         print(result)
     else:
         # pretty print JSON table
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(json.dumps(result.to_dicts(), indent=2, ensure_ascii=False))
 
 
 if __name__ == "__main__":
@@ -1,13 +1,110 @@
 # save_excel.py
-import pandas as pd
+import csv
+import io
 import os
-from typing import List, Dict
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Union
 
+import metrics
+from models import COLUMNS, TestCase, TestSuite, normalize
 
-def test_cases_to_excel(test_cases: List[Dict], filename: str = "outputs/testcases.xlsx") -> str:
-    """Save structured test cases (list of dicts) to an Excel file.
+# Rows buffered per Parquet row group
+PARQUET_BATCH_ROWS = 1000
 
-    Expected keys in each test case dict:
+
+def _rows(test_cases: Iterable[Union[Dict, TestCase]]) -> Iterator[List[str]]:
+    """Cell values in COLUMNS order for a TestSuite, TestCase objects or raw dicts."""
+    if isinstance(test_cases, TestSuite):
+        yield from test_cases.rows()
+        return
+    for tc in test_cases:
+        yield (tc if isinstance(tc, TestCase) else normalize(tc, fill_defaults=False)).row()
+
+
+def _write_xlsx(test_cases: Iterable[Dict], out: Union[str, BinaryIO]) -> None:
+    from openpyxl import Workbook
+
+    # write_only workbooks stream rows to disk instead of keeping cells in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(COLUMNS)
+    for row in _rows(test_cases):
+        ws.append(row)
+    wb.save(out)
+
+
+def _write_csv(test_cases: Iterable[Dict], out: Union[str, BinaryIO]) -> None:
+    if isinstance(out, str):
+        fh = open(out, "w", encoding="utf-8", newline="")
+    else:
+        fh = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    try:
+        writer = csv.writer(fh)
+        writer.writerow(COLUMNS)
+        writer.writerows(_rows(test_cases))
+    finally:
+        if isinstance(out, str):
+            fh.close()
+        else:
+            # Leave the caller's buffer open
+            fh.detach()
+
+
+def _write_parquet(test_cases: Iterable[Dict], out: Union[str, BinaryIO]) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow. Install it with `pip install pyarrow`.")
+
+    schema = pa.schema([(name, pa.string()) for name in COLUMNS])
+    with pq.ParquetWriter(out, schema) as writer:
+        if isinstance(test_cases, TestSuite):
+            # Already column-oriented: slice the columns into row groups
+            columns = list(test_cases.columns().values())
+            for start in range(0, len(test_cases), PARQUET_BATCH_ROWS):
+                writer.write_table(pa.table([c[start:start + PARQUET_BATCH_ROWS] for c in columns], schema=schema))
+            return
+        batch = [[] for _ in COLUMNS]
+        for row in _rows(test_cases):
+            for column, value in zip(batch, row):
+                column.append(value)
+            if len(batch[0]) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.table(batch, schema=schema))
+                batch = [[] for _ in COLUMNS]
+        if batch[0]:
+            writer.write_table(pa.table(batch, schema=schema))
+
+
+_WRITERS = {"xlsx": _write_xlsx, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def write_test_cases(test_cases: Iterable[Dict], out: Union[str, BinaryIO], fmt: str = "xlsx") -> Union[str, BinaryIO]:
+    """Stream test cases to a file path or binary buffer without building a DataFrame.
+
+    ``test_cases`` may be a TestSuite or any iterable of dicts or TestCase
+    objects, including a generator, and is consumed once. ``fmt`` is one of "xlsx", "csv" or "parquet".
+    """
+    writer = _WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {fmt}. Use one of {', '.join(_WRITERS)}")
+    if isinstance(out, str) and os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with metrics.span(f"export.{fmt}"):
+        writer(test_cases, out)
+    return out
+
+
+def test_cases_to_bytes(test_cases: Iterable[Dict], fmt: str = "xlsx") -> bytes:
+    """Export test cases to an in-memory file, e.g. for st.download_button."""
+    buf = io.BytesIO()
+    write_test_cases(test_cases, buf, fmt)
+    return buf.getvalue()
+
+
+def test_cases_to_excel(test_cases: Iterable[Dict], filename: str = "outputs/testcases.xlsx") -> str:
+    """Save structured test cases (a TestSuite, or test case dicts) to an Excel file.
+
+    Dicts go through models.normalize, so the usual key aliases work:
     - Functionality
     - Test Summary
     - Pre Condition
@@ -15,25 +112,4 @@ def test_cases_to_excel(test_cases: List[Dict], filename: str = "outputs/testcas
     - Test Steps (list or string)
     - Expected Result
     """
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    rows = []
-    for tc in test_cases:
-        steps = tc.get("Test Steps") or tc.get("TestSteps") or []
-        if isinstance(steps, list):
-            steps_text = "\n".join(steps)
-        else:
-            steps_text = str(steps)
-
-        rows.append({
-            "Functionality": tc.get("Functionality", ""),
-            "Test Summary": tc.get("Test Summary", ""),
-            "Pre Condition": tc.get("Pre Condition", ""),
-            "Test Data": tc.get("Test Data", ""),
-            "Test Steps": steps_text,
-            "Expected Result": tc.get("Expected Result", "")
-        })
-
-    df = pd.DataFrame(rows, columns=["Functionality", "Test Summary", "Pre Condition", "Test Data", "Test Steps", "Expected Result"])
-    df.to_excel(filename, index=False)
-    return filename
-
+    return write_test_cases(test_cases, filename, "xlsx")
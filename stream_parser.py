@@ -0,0 +1,91 @@
+# stream_parser.py
+import json
+from typing import Dict, Iterable, Iterator, List
+
+
+class JSONArrayStreamParser:
+    """Incrementally parse a JSON array of objects from streamed text chunks.
+
+    Text before the opening ``[`` (markdown fences, chatter) is skipped. Each
+    top-level object is decoded as soon as its closing brace arrives, so
+    callers can act on test cases while the model is still writing.
+    """
+
+    def __init__(self):
+        self.started = False    # seen the opening '['
+        self.finished = False   # seen the matching ']'
+        self.failed = 0         # top-level objects that did not decode
+        self.decoded = 0        # top-level objects that did
+        self._depth = 0         # brace/bracket depth inside the array
+        self._in_string = False
+        self._escape = False
+        self._buf: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict]:
+        out = []
+        if not chunk or self.finished:
+            return out
+        for ch in chunk:
+            if not self.started:
+                if ch == '[':
+                    self.started = True
+                continue
+            if self._depth == 0:
+                # Between elements: only an object start or the array end matter
+                if ch == '{':
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == ']':
+                    self.finished = True
+                    break
+                continue
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._decode(''.join(self._buf))
+                    self._buf = []
+                    if obj is not None:
+                        out.append(obj)
+        return out
+
+    def _decode(self, text: str):
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            self.failed += 1
+            return None
+        if isinstance(obj, dict):
+            self.decoded += 1
+            return obj
+        self.failed += 1
+        return None
+
+    @property
+    def truncated(self) -> bool:
+        """True when the stream stopped inside the array."""
+        return self.started and not self.finished
+
+    @property
+    def complete(self) -> bool:
+        """True when the array closed with at least one object and none that failed to decode."""
+        return self.finished and self.decoded > 0 and not self.failed
+
+
+def iter_objects(chunks: Iterable[str]) -> Iterator[Dict]:
+    """Yield every complete object found in a stream of text chunks."""
+    parser = JSONArrayStreamParser()
+    for chunk in chunks:
+        for obj in parser.feed(chunk):
+            yield obj
@@ -0,0 +1,81 @@
+# structured.py
+"""JSON schema for structured-output replies and a strict parser for them.
+
+With ``response_format`` set to RESPONSE_FORMAT the API must reply with
+``{"test_cases": [...]}`` matching TEST_CASE_SCHEMA, so the reply parses on
+the first try and no text scanning is needed. JSON_OBJECT_FORMAT (JSON mode)
+is the fallback for models without json_schema support.
+"""
+import copy
+import json
+from typing import Dict, List, Optional
+
+from models import FIELDS
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _DECODE_ERRORS = (orjson.JSONDecodeError, ValueError)
+except ImportError:
+    _loads = json.loads
+    _DECODE_ERRORS = (ValueError,)
+
+CATEGORIES = ("Positive", "Negative", "Edge")
+
+TEST_CASE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "test_cases": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "Functionality": {"type": "string"},
+                    "Test Summary": {"type": "string"},
+                    "Pre Condition": {"type": "string"},
+                    "Test Data": {"type": "string"},
+                    "Test Steps": {"type": "array", "items": {"type": "string"}},
+                    "Expected Result": {"type": "string"},
+                    "Category": {"type": "string", "enum": list(CATEGORIES)},
+                },
+                "required": list(FIELDS),
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["test_cases"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "test_cases", "strict": True, "schema": TEST_CASE_SCHEMA},
+}
+
+# JSON mode, for models without json_schema support: valid JSON, but the shape is up to the prompt
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# Packed prompts (see packing.py) also tag every case with its requirement
+PACKED_RESPONSE_FORMAT = copy.deepcopy(RESPONSE_FORMAT)
+_packed_item = PACKED_RESPONSE_FORMAT["json_schema"]["schema"]["properties"]["test_cases"]["items"]
+_packed_item["properties"]["Requirement"] = {"type": "string"}
+_packed_item["required"].insert(0, "Requirement")
+
+
+def parse_structured(text: str) -> Optional[List[Dict]]:
+    """Return the test cases from a structured reply, or None if it does not match the schema."""
+    if not text:
+        return None
+    try:
+        data = _loads(text)
+    except _DECODE_ERRORS:
+        return None
+    cases = data.get("test_cases") if isinstance(data, dict) else None
+    if not isinstance(cases, list):
+        return None
+    for tc in cases:
+        if not isinstance(tc, dict) or any(field not in tc for field in FIELDS):
+            return None
+        if not isinstance(tc["Test Steps"], list):
+            return None
+    return cases
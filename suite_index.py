@@ -0,0 +1,232 @@
+# suite_index.py
+"""Searchable index of previously generated test suites.
+
+Every suite is stored with the requirement it was generated for. Requirement
+texts are indexed with SQLite FTS5; candidates from the full-text search are
+re-ranked by cosine similarity of their word counts, so a new requirement
+that closely matches an earlier one can reuse that suite instead of paying
+for a fresh generation. Exported ``outputs/*.xlsx`` files can be imported in
+bulk; they carry no requirement text, so their functionality and summaries
+are indexed in its place.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from models import TestSuite
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "the and for with that this are from into when then than should must can will not all any has have was were "
+    "been being its their they them user users".split()
+)
+# Terms sent to FTS per query; long requirements are trimmed to their first distinct terms
+MAX_QUERY_TERMS = 64
+# Full-text candidates re-ranked by similarity per search
+CANDIDATES = 20
+
+
+class SuiteMatch(NamedTuple):
+    id: int
+    score: float
+    requirement: str
+    cases: List[Dict]
+    counts: Optional[Tuple[int, int, int]]
+    source: Optional[str]
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased content words of ``text``, in order."""
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def similarity(a: str, b: str) -> float:
+    """Cosine similarity of the word counts of two texts, between 0 and 1."""
+    va, vb = Counter(terms(a)), Counter(terms(b))
+    if not va or not vb:
+        return 0.0
+    dot = sum(count * vb[word] for word, count in va.items() if word in vb)
+    return dot / math.sqrt(sum(c * c for c in va.values()) * sum(c * c for c in vb.values()))
+
+
+def _digest(requirement: str, counts: Optional[Tuple[int, int, int]]) -> str:
+    normalized = " ".join(requirement.split())
+    return hashlib.sha256(json.dumps([normalized, counts]).encode("utf-8")).hexdigest()
+
+
+class SuiteIndex:
+    """SQLite store of generated suites with a full-text index on their requirements.
+
+    Adding the same requirement with the same (positive, negative, edge)
+    counts again replaces the stored suite instead of adding a new one.
+    """
+
+    def __init__(self, path: str = ".cache/suites.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS suites ("
+            " id INTEGER PRIMARY KEY, digest TEXT NOT NULL UNIQUE, requirement TEXT NOT NULL, counts TEXT,"
+            " cases TEXT NOT NULL, source TEXT, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS suites_source ON suites(source)")
+        # External-content FTS table: only the index is stored, the text stays in suites
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS suites_fts USING fts5("
+                           "requirement, content='suites', content_rowid='id')")
+        self._conn.commit()
+
+    def add(self, requirement: str, cases: List[Dict], counts: Optional[Tuple[int, int, int]] = None,
+            source: Optional[str] = None) -> int:
+        """Store a suite and return its id; ``cases`` must be a list of test case dicts."""
+        if not isinstance(cases, list) or not all(isinstance(tc, dict) for tc in cases):
+            raise TypeError(f"cases must be a list of test case dicts, not {type(cases).__name__}")
+        digest = _digest(requirement, list(counts) if counts else None)
+        payload = json.dumps(cases, ensure_ascii=False)
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM suites WHERE digest = ?", (digest,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE suites SET cases = ?, source = COALESCE(?, source), created = ? WHERE id = ?",
+                                   (payload, source, time.time(), row[0]))
+                self._conn.commit()
+                return row[0]
+            cur = self._conn.execute(
+                "INSERT INTO suites (digest, requirement, counts, cases, source, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, requirement, json.dumps(list(counts)) if counts else None, payload, source, time.time()))
+            self._conn.execute("INSERT INTO suites_fts (rowid, requirement) VALUES (?, ?)", (cur.lastrowid, requirement))
+            self._conn.commit()
+            return cur.lastrowid
+
+    def get(self, suite_id: int) -> Optional[SuiteMatch]:
+        with self._lock:
+            row = self._conn.execute("SELECT id, requirement, counts, cases, source FROM suites WHERE id = ?",
+                                     (suite_id,)).fetchone()
+        return self._match(row, 1.0) if row else None
+
+    def search(self, requirement: str, limit: int = 3, min_score: float = 0.3) -> List[SuiteMatch]:
+        """Stored suites whose requirement resembles ``requirement``, best first."""
+        words = list(dict.fromkeys(terms(requirement)))[:MAX_QUERY_TERMS]
+        if not words:
+            return []
+        query = " OR ".join(f'"{word}"' for word in words)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.id, s.requirement, s.counts, s.cases, s.source FROM suites_fts"
+                " JOIN suites s ON s.id = suites_fts.rowid WHERE suites_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, CANDIDATES)).fetchall()
+        scored = [(similarity(requirement, row[1]), row) for row in rows]
+        scored = [(score, row) for score, row in scored if score >= min_score]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [self._match(row, score) for score, row in scored[:limit]]
+
+    def has_source(self, source: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM suites WHERE source = ?", (source,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM suites").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _match(row, score: float) -> SuiteMatch:
+        suite_id, requirement, counts, cases, source = row
+        return SuiteMatch(suite_id, score, requirement, json.loads(cases),
+                          tuple(json.loads(counts)) if counts else None, source)
+
+    def import_xlsx(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Index exported workbooks; files already imported or without test cases are skipped."""
+        stats = {"imported": 0, "skipped": 0, "failed": 0}
+        for path in paths:
+            source = os.path.abspath(path)
+            if self.has_source(source):
+                stats["skipped"] += 1
+                continue
+            try:
+                cases = read_xlsx(path)
+            except Exception as e:
+                print(f"  ✗ Could not read {path}: {e}")
+                stats["failed"] += 1
+                continue
+            if not cases:
+                stats["skipped"] += 1
+                continue
+            self.add(describe(cases), cases, source=source)
+            stats["imported"] += 1
+        return stats
+
+
+def index_from_env() -> Optional[SuiteIndex]:
+    """The index at LLM_SUITE_INDEX, or None when the variable is unset or 0."""
+    path = os.getenv("LLM_SUITE_INDEX", "")
+    if path.lower() in ("", "0", "false", "no", "off"):
+        return None
+    return SuiteIndex(path)
+
+
+def read_xlsx(path: str) -> List[Dict]:
+    """Test cases from an exported workbook, whatever its header aliases."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        items = []
+        for row in rows:
+            tc = {name: value for name, value in zip(header, row) if name and value is not None}
+            if isinstance(tc.get("Test Steps"), str):
+                tc["Test Steps"] = [step for step in tc["Test Steps"].splitlines() if step.strip()]
+            items.append(tc)
+    finally:
+        wb.close()
+    suite = TestSuite.from_dicts(items, fill_defaults=False)
+    # Only the generator's own categories carry over; exports from other tools use the column differently
+    suite.category = [c if c in ("Positive", "Negative", "Edge") else "" for c in suite.category]
+    return suite.to_dicts()
+
+
+def describe(cases: List[Dict]) -> str:
+    """Stand-in requirement text for a suite imported without one."""
+    lines = dict.fromkeys(f"{tc.get('Functionality') or ''}: {tc.get('Test Summary') or ''}" for tc in cases)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import exported test suites into the reuse index, or search it.")
+    parser.add_argument("paths", nargs="*", help="xlsx files to import (default: outputs/*.xlsx)")
+    parser.add_argument("--db", default=os.path.join(".cache", "suites.sqlite"), help="index database")
+    parser.add_argument("--search", help="print the stored suites closest to this requirement text")
+    args = parser.parse_args()
+
+    index = SuiteIndex(args.db)
+    try:
+        if args.search:
+            for match in index.search(args.search, limit=5, min_score=0.0):
+                title = match.requirement.strip().splitlines()[0][:80] if match.requirement.strip() else ""
+                print(f"#{match.id}  {match.score:.2f}  {len(match.cases)} cases  {title}")
+            return
+        stats = index.import_xlsx(args.paths or sorted(glob.glob(os.path.join("outputs", "*.xlsx"))))
+        print(f"Imported {stats['imported']} suites, skipped {stats['skipped']}, failed {stats['failed']}; "
+              f"{len(index)} in the index")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
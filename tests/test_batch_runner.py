@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+import unittest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from batch_runner import run_batch, iter_requirements
+from models import TestSuite
+
+
+class FakeGenerator:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def generate_test_cases(self, requirement_text, positive=3, negative=2, edge=1):
+        self.calls.append(requirement_text)
+        if requirement_text in self.fail:
+            return "raw text"
+        return TestSuite.from_dicts([{"Functionality": requirement_text, "Category": "Positive"}] * positive)
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.tmp.name, "reqs.jsonl")
+        self.output = os.path.join(self.tmp.name, "out.jsonl")
+        with open(self.input, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"id": "a", "requirement": "login"}) + "\n")
+            fh.write("\n")
+            fh.write(json.dumps({"text": "signup", "positive": 1}) + "\n")
+            fh.write(json.dumps({"id": "c", "body": "reset"}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reads_requirement_aliases(self):
+        records = list(iter_requirements(self.input))
+        self.assertEqual([r["id"] for r in records], ["a", "line-3", "c"])
+        self.assertEqual([r["requirement"] for r in records], ["login", "signup", "reset"])
+
+    def test_resume_skips_finished_and_retries_failures(self):
+        first = FakeGenerator(fail={"reset"})
+        stats = run_batch(self.input, self.output, workers=2, positive=2, generator=first)
+        self.assertEqual((stats["processed"], stats["failed"], stats["test_cases"]), (2, 1, 3))
+
+        second = FakeGenerator()
+        stats = run_batch(self.input, self.output, workers=2, positive=2, generator=second)
+        self.assertEqual(second.calls, ["reset"])
+        self.assertEqual((stats["processed"], stats["skipped"]), (1, 2))
+
+        with open(self.output, encoding="utf-8") as fh:
+            ids = sorted(json.loads(line)["id"] for line in fh)
+        self.assertEqual(ids, ["a", "c", "line-3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
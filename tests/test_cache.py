@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+import metrics
+from cache import ResponseCache, make_cache_key
+from generator import LLMClient, TestCaseGenerator
+from mock_server import MockOpenAIServer
+
+
+def _completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_covers_all_request_parameters(self):
+        base = make_cache_key("m", "sys", "prompt", 0.2, 4000)
+        self.assertEqual(base, make_cache_key("m", "sys", "prompt", 0.2, 4000))
+        self.assertNotEqual(base, make_cache_key("m2", "sys", "prompt", 0.2, 4000))
+        self.assertNotEqual(base, make_cache_key("m", "sys2", "prompt", 0.2, 4000))
+        self.assertNotEqual(base, make_cache_key("m", "sys", "prompt2", 0.2, 4000))
+        self.assertNotEqual(base, make_cache_key("m", "sys", "prompt", 0.3, 4000))
+        self.assertNotEqual(base, make_cache_key("m", "sys", "prompt", 0.2, 2000))
+
+    def test_persists_and_counts_hits(self):
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", "value")
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get("k"), "value")
+        stats = reopened.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 0, 1))
+        reopened.close()
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = ResponseCache(self.path, max_entries=2)
+        cache.set("a", "1")
+        time.sleep(0.01)
+        cache.set("b", "2")
+        time.sleep(0.01)
+        cache.get("a")  # "b" is now least recently used
+        time.sleep(0.01)
+        cache.set("c", "3")
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "3")
+        cache.close()
+
+    def test_eviction_by_size_and_ttl(self):
+        cache = ResponseCache(self.path, max_bytes=10)
+        cache.set("a", "12345")
+        time.sleep(0.01)
+        cache.set("b", "123456")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["bytes"], 6)
+        cache.close()
+
+        expiring = ResponseCache(os.path.join(self.tmp.name, "ttl.sqlite"), ttl_seconds=0.01)
+        expiring.set("a", "1")
+        time.sleep(0.05)
+        self.assertIsNone(expiring.get("a"))
+        expiring.close()
+
+
+class TestLLMClientCache(unittest.TestCase):
+    def test_only_valid_responses_are_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(os.path.join(tmp, "cache.sqlite"))
+            llm = LLMClient(cache=cache)
+            llm.client = MagicMock()
+            llm.client.chat.completions.create.side_effect = [_completion("bad"), _completion("[]"), _completion("unused")]
+            validate = lambda text: text.startswith("[")
+
+            self.assertEqual(llm.generate("p", validate=validate), "bad")
+            self.assertEqual(llm.generate("p", validate=validate), "[]")
+            self.assertEqual(llm.generate("p", validate=validate), "[]")
+            self.assertEqual(llm.client.chat.completions.create.call_count, 2)
+            self.assertEqual(cache.stats()["hits"], 1)
+            cache.close()
+
+    def test_new_replies_are_parsed_once(self):
+        with tempfile.TemporaryDirectory() as tmp, MockOpenAIServer() as server:
+            with patch.dict(os.environ, {"OPENAI_BASE_URL": server.base_url}):
+                llm = LLMClient(cache=ResponseCache(os.path.join(tmp, "cache.sqlite")))
+            gen = TestCaseGenerator(max_workers=1, llm=llm, dedupe_threshold=None)
+            previews = []
+            for emit in (None, previews.append):
+                # A fresh reply is parsed when it is cached and used; a cache hit when it is used
+                for counter in ("llm.calls", "llm.cache_hits"):
+                    with metrics.run() as report:
+                        gen.generate_test_cases(f"login {emit is None}", positive=2, negative=1, edge=0, emit=emit)
+                    snap = report.snapshot()
+                    self.assertGreater(snap["counters"][counter], 0)
+                    self.assertEqual(snap["spans"]["parse"]["count"], snap["counters"][counter])
+            self.assertTrue(previews)
+            llm.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from chunking import allocate_counts, estimate_tokens, split_sections
+from generator import TestCaseGenerator
+
+
+def _document(sections=6, paragraphs=4):
+    parts = []
+    for s in range(sections):
+        parts.append(f"{s + 1}. Feature {s + 1}")
+        for p in range(paragraphs):
+            parts.append(f"The system shall support behaviour {s}.{p}. " * 12)
+    return "\n\n".join(parts)
+
+
+class TestSplitSections(unittest.TestCase):
+    def test_short_text_is_one_section(self):
+        sections = split_sections("Login with email and password", max_tokens=100)
+        self.assertEqual(len(sections), 1)
+        self.assertEqual(sections[0].text, "Login with email and password")
+
+    def test_sections_stay_within_budget_and_keep_all_text(self):
+        text = _document()
+        sections = split_sections(text, max_tokens=400)
+        self.assertGreater(len(sections), 1)
+        self.assertTrue(all(s.tokens <= 400 for s in sections))
+        joined = " ".join(" ".join(s.text.split()) for s in sections)
+        for s in range(6):
+            self.assertIn(f"Feature {s + 1}", joined)
+        self.assertEqual(len(joined.split()), len(text.split()))
+
+    def test_sections_start_at_headings(self):
+        sections = split_sections(_document(), max_tokens=700)
+        self.assertTrue(any(s.title.startswith("2. Feature") for s in sections))
+
+    def test_oversized_paragraph_is_split(self):
+        text = "word " * 2000
+        sections = split_sections(text, max_tokens=200)
+        self.assertTrue(all(s.tokens <= 200 for s in sections))
+        self.assertEqual(sum(len(s.text.split()) for s in sections), 2000)
+
+    def test_allocate_counts(self):
+        self.assertEqual(allocate_counts(10, [1, 1]), [5, 5])
+        self.assertEqual(sum(allocate_counts(7, [3, 2, 1])), 7)
+        self.assertEqual(allocate_counts(2, [10, 1, 1]), [2, 0, 0])
+        self.assertEqual(allocate_counts(0, [1, 2]), [0, 0])
+
+
+class TestSectionedGeneration(unittest.TestCase):
+    def test_prompts_are_bounded_and_counts_preserved(self):
+        gen = TestCaseGenerator(max_workers=4, max_section_tokens=400, dedupe_threshold=None)
+        prompts = []
+
+        def fake(prompt, **kwargs):
+            prompts.append(prompt)
+            count = int(prompt.split("exactly ", 1)[1].split(" ", 1)[0])
+            return json.dumps([{"Functionality": "F"}] * count)
+
+        with patch('generator.LLMClient.generate', side_effect=fake):
+            result = gen.generate_test_cases(_document(), positive=12, negative=6, edge=2)
+
+        self.assertEqual(len(result), 20)
+        self.assertEqual(result.category, ["Positive"] * 12 + ["Negative"] * 6 + ["Edge"] * 2)
+        self.assertTrue(all("[Section " in p for p in prompts))
+        self.assertTrue(all(estimate_tokens(p) < 400 + 200 for p in prompts))
+
+
+if __name__ == '__main__':
+    unittest.main()
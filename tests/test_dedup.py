@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import time
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from dedup import Deduplicator
+from generator import TestCaseGenerator
+from mock_server import synthetic_test_cases
+
+INVALID_PASSWORD = {"Test Summary": "Verify login fails with invalid password", "Category": "Negative",
+                    "Test Steps": ["Open login page", "Enter valid email", "Enter wrong password", "Click login"]}
+LOCKOUT = {"Test Summary": "Verify account locks after three failed attempts", "Category": "Negative",
+           "Test Steps": ["Open login page", "Enter wrong password three times"]}
+
+
+class TestDeduplicator(unittest.TestCase):
+    def test_near_duplicates_are_dropped_within_category(self):
+        dedup = Deduplicator(threshold=0.75)
+        reworded = dict(INVALID_PASSWORD, **{"Test Summary": "Verify login fails with an invalid password"})
+        kept, dropped = dedup.filter([INVALID_PASSWORD, reworded, LOCKOUT, dict(INVALID_PASSWORD, Category="Edge")])
+        self.assertEqual(kept, [INVALID_PASSWORD, LOCKOUT, dict(INVALID_PASSWORD, Category="Edge")])
+        self.assertEqual(dropped, [reworded])
+        self.assertEqual(dedup.stats()["duplicates"], 1)
+        self.assertAlmostEqual(dedup.stats()["duplicate_rate"], 0.25)
+
+    def test_distinct_cases_survive_at_scale(self):
+        cases = synthetic_test_cases(2000, seed=3)
+        dedup = Deduplicator(threshold=0.95)
+        start = time.perf_counter()
+        kept, _ = dedup.filter(cases + cases[:100])
+        elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(len(kept), 1900)
+        self.assertLessEqual(len(kept), 2000)
+        self.assertLess(elapsed, 5)
+
+
+class TestGeneratorDedup(unittest.TestCase):
+    def test_duplicates_are_replaced_with_distinct_cases(self):
+        gen = TestCaseGenerator(max_workers=1)
+        first = json.dumps([INVALID_PASSWORD, dict(INVALID_PASSWORD), LOCKOUT])
+        replacement = json.dumps([{"Test Summary": "Verify error for unregistered email", "Test Steps": ["Enter unknown email"]}])
+
+        with patch('generator.LLMClient.generate', side_effect=[first, replacement]) as mocked:
+            result = gen.generate_test_cases("login", positive=0, negative=3, edge=0)
+
+        self.assertEqual(result.summary, [INVALID_PASSWORD["Test Summary"], LOCKOUT["Test Summary"],
+                                                                 "Verify error for unregistered email"])
+        follow_up = mocked.call_args_list[1].args[0]
+        self.assertIn("exactly 1 Negative", follow_up)
+        self.assertIn(LOCKOUT["Test Summary"], follow_up)
+        self.assertEqual(gen.last_run_stats["duplicates"], 1)
+        self.assertEqual(gen.last_run_stats["replacements"], 1)
+
+    def test_streaming_drops_duplicates(self):
+        gen = TestCaseGenerator(max_workers=1)
+        gen.dedupe_rounds = 0
+        text = json.dumps([INVALID_PASSWORD, dict(INVALID_PASSWORD), LOCKOUT])
+        with patch('generator.LLMClient.stream', side_effect=lambda prompt, **kw: iter([text])):
+            result = list(gen.iter_test_cases("login", positive=0, negative=3, edge=0))
+        self.assertEqual(len(result), 2)
+        self.assertEqual(gen.last_run_stats["duplicates"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import io
+import sys
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import extractors
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+
+def make_pdf(pages):
+    """Build a minimal PDF with one line of text per page (None for a blank page)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1") if text else b""
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("latin-1")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+class TestExtractionCache(unittest.TestCase):
+    def test_lru_bounded_by_size(self):
+        cache = extractors.ExtractionCache(max_bytes=10)
+        cache.set("a", "12345")
+        cache.set("b", "12345")
+        cache.get("a")
+        cache.set("c", "12345")
+        self.assertEqual(cache.get("a"), "12345")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "12345")
+
+
+@unittest.skipIf(pdfplumber is None, "pdfplumber not installed")
+class TestPdfExtraction(unittest.TestCase):
+    def setUp(self):
+        extractors._cache.clear()
+
+    def test_blank_pages_do_not_crash(self):
+        data = make_pdf(["First page", None, "Third page"])
+        text = extractors.extract_text_from_pdf(io.BytesIO(data))
+        self.assertEqual(text.split("\n"), ["First page", "Third page"])
+
+    def test_parallel_pages_keep_order(self):
+        pages = [f"Page {i}" for i in range(20)]
+        data = make_pdf(pages)
+        result = list(extractors.iter_pdf_pages(data, workers=2))
+        self.assertEqual(result, pages)
+
+    def test_workers_are_not_forked(self):
+        # Forking the app's multi-threaded process can deadlock the children
+        with extractors._process_pool(1) as pool:
+            self.assertNotEqual(pool._mp_context.get_start_method(), "fork")
+
+    def test_same_content_is_parsed_once(self):
+        data = make_pdf(["Only page"])
+        with patch('extractors._pdf_text', wraps=extractors._pdf_text) as parse:
+            first = extractors.extract_text_from_document(type("Upload", (), {"name": "a.pdf", "getvalue": lambda self: data})())
+            second = extractors.extract_text_from_pdf(data)
+        self.assertEqual(first, second)
+        self.assertEqual(parse.call_count, 1)
+
+
+class TestDocumentDispatch(unittest.TestCase):
+    def test_plain_text_upload(self):
+        upload = io.BytesIO("Login requirement".encode("utf-8"))
+        upload.name = "req.txt"
+        self.assertEqual(extractors.extract_text_from_document(upload), "Login requirement")
+        self.assertEqual(upload.tell(), 0)
+
+
+@unittest.skipIf(extractors.Image is None, "Pillow/pytesseract not installed")
+class TestOcrPipeline(unittest.TestCase):
+    def setUp(self):
+        extractors._cache.clear()
+
+    def _screenshot(self, width=800, lines=12, gap=300):
+        from PIL import Image, ImageDraw
+        image = Image.new("RGB", (width, lines * gap), "white")
+        draw = ImageDraw.Draw(image)
+        for i in range(lines):
+            draw.rectangle((20, i * gap + 20, 400, i * gap + 60), fill=(40, 40, 40))
+        return image
+
+    def _png(self, image):
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", dpi=(300, 300))
+        return buf.getvalue()
+
+    def test_preprocess_binarizes_and_caps_width(self):
+        image = self._screenshot(width=4000, lines=1)
+        out = extractors.preprocess_image(image, max_width=2000)
+        self.assertEqual(out.width, 2000)
+        histogram = out.histogram()
+        self.assertEqual(histogram[0] + histogram[255], out.width * out.height)
+
+    def test_preprocess_only_upscales_on_request(self):
+        image = self._screenshot(width=800, lines=1)
+        self.assertEqual(extractors.preprocess_image(image).size, image.size)
+        self.assertEqual(extractors.preprocess_image(image, upscale=True).width, 2000)
+
+    def test_tiles_cut_on_blank_rows(self):
+        image = extractors.preprocess_image(self._screenshot(lines=12, gap=300))
+        tiles = extractors.split_tiles(image, tile_height=1000)
+        self.assertGreater(len(tiles), 1)
+        self.assertEqual(sum(t.height for t in tiles), image.height)
+        # No tile boundary falls inside a dark bar
+        for tile in tiles:
+            top_row = [tile.getpixel((x, 0)) for x in range(0, 400, 10)]
+            self.assertTrue(all(p == 255 for p in top_row))
+
+    def test_many_images_are_ocred_in_order_and_cached(self):
+        first, second = self._png(self._screenshot(lines=12)), self._png(self._screenshot(lines=2))
+        with patch.object(extractors, "OCR_TILE_HEIGHT", 1000), \
+                patch('extractors.pytesseract.image_to_string', side_effect=lambda img, config=None: f"h{img.height}") as ocr:
+            texts = extractors.extract_text_from_images([first, second], workers=1)
+            again = extractors.extract_text_from_images([second, first], workers=1)
+        self.assertGreater(ocr.call_count, 2)
+        self.assertEqual(len(texts[0].split("\n")), ocr.call_count - 1)
+        self.assertEqual(texts[1].count("\n"), 0)
+        self.assertEqual(again, [texts[1], texts[0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,36 +2,61 @@ import os
 import sys
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 try:
-    from generator import generate_data, TestCaseGenerator
+    from generator import TestCaseGenerator
+    from mock_server import MockOpenAIServer
+    from models import TestSuite
 except ImportError as e:
     print(f"Import Error: {e}")
     print(f"Python path: {sys.path}")
     raise
 
 class TestGenerator(unittest.TestCase):
-    
+    """End-to-end runs against the offline chat completions stand-in."""
+
     def setUp(self):
         """Set up test fixtures"""
+        self.server = MockOpenAIServer().start()
+        self.env = patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "OPENAI_BASE_URL": self.server.base_url,
+                                           "LLM_CACHE": "0"})
+        self.env.start()
         self.generator = TestCaseGenerator()
 
-    def test_generate_data(self):
-        """Test the generate_data function"""
-        result = generate_data()
-        self.assertIsNotNone(result)
-        self.assertIsInstance(result, str)
-        
+    def tearDown(self):
+        self.env.stop()
+        self.server.stop()
+
     def test_test_case_generator(self):
         """Test the TestCaseGenerator class"""
         requirement = "User login functionality"
         result = self.generator.generate_test_cases(requirement)
         self.assertIsNotNone(result)
-        self.assertIsInstance(result, str)
+        self.assertIsInstance(result, TestSuite)
+        self.assertEqual(len(result), 6)
+        self.assertEqual(result.category, ["Positive"] * 3 + ["Negative"] * 2 + ["Edge"])
+        # The three categories of a short requirement share one packed request
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_streaming_generator(self):
+        """Test that iter_test_cases streams every case through the server"""
+        self.server.chunk_size = 16
+        result = list(self.generator.iter_test_cases("User login functionality", positive=4, negative=1, edge=0))
+        self.assertEqual(len(result), 5)
+        self.assertTrue(all(self.server.requests[i].get("stream") for i in range(2)))
+
+    def test_server_errors_are_retried(self):
+        """Test that a batch recovers when the first reply is unusable"""
+        self.server.responses = ["not json at all", '[{"Functionality": "Login"}]']
+        result = self.generator.generate_test_cases("User login functionality", positive=1, negative=0, edge=0)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].functionality, "Login")
+        self.assertEqual(self.server.request_count, 2)
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from generator import TestCaseGenerator
+
+
+def _batch_response(prompt, **kwargs):
+    # Echo the category and count back so the order of results can be checked
+    count = int(prompt.split("exactly ", 1)[1].split(" ", 1)[0])
+    category = prompt.split("exactly ", 1)[1].split(" ")[1]
+    # Later categories answer first to shake up completion order
+    time.sleep({"Positive": 0.2, "Negative": 0.1, "Edge": 0.0}[category])
+    return json.dumps([{"Functionality": f"{category} {i}", "Test Summary": "S"} for i in range(count)])
+
+
+class TestGeneratorConcurrency(unittest.TestCase):
+    def test_batches_run_concurrently_in_stable_order(self):
+        gen = TestCaseGenerator(max_workers=8, dedupe_threshold=None)
+        gen.pack_categories = False
+
+        start = time.perf_counter()
+        with patch('generator.LLMClient.generate', side_effect=_batch_response) as mocked:
+            result = gen.generate_test_cases("req", positive=10, negative=5, edge=3)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(mocked.call_count, 4)
+        self.assertEqual(result.category, ["Positive"] * 10 + ["Negative"] * 5 + ["Edge"] * 3)
+        self.assertEqual(result[0].functionality, "Positive 0")
+        self.assertEqual(result[5].functionality, "Positive 0")
+        # Close to the slowest batch (0.2s), far below the serial sum (0.5s)
+        self.assertLess(elapsed, 0.45)
+
+    def test_each_batch_retries_independently(self):
+        gen = TestCaseGenerator(max_workers=4, dedupe_threshold=None)
+        gen.pack_categories = False
+        calls = {}
+        lock = threading.Lock()
+
+        def flaky(prompt, **kwargs):
+            category = prompt.split("exactly ", 1)[1].split(" ")[1]
+            with lock:
+                calls[category] = calls.get(category, 0) + 1
+                first = calls[category] == 1
+            if category == "Negative" and first:
+                return "not json"
+            return _batch_response(prompt)
+
+        with patch('generator.LLMClient.generate', side_effect=flaky):
+            result = gen.generate_test_cases("req", positive=2, negative=2, edge=0)
+
+        self.assertEqual(calls, {"Positive": 1, "Negative": 2})
+        self.assertEqual(result.category, ["Positive", "Positive", "Negative", "Negative"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
+import os
 import sys
+import threading
 from pathlib import Path
 import unittest
 from unittest.mock import patch
@@ -7,12 +9,17 @@ from unittest.mock import patch
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
 from generator import TestCaseGenerator
+from models import TestCase, TestSuite
 
 
 class TestGeneratorRetry(unittest.TestCase):
     def test_retry_succeeds_on_second_attempt(self):
         gen = TestCaseGenerator()
+        gen.pack_categories = False
 
         # First call returns non-JSON, second returns valid JSON array
         bad = "I am not JSON"
@@ -22,13 +29,14 @@ class TestGeneratorRetry(unittest.TestCase):
             result = gen.generate_test_cases("some requirement", positive=1, negative=0, edge=0)
 
         # Expect parsed list from the second (good) response
-        self.assertIsInstance(result, list)
+        self.assertIsInstance(result, TestSuite)
         self.assertEqual(len(result), 1)
-        self.assertIsInstance(result[0], dict)
-        self.assertEqual(result[0].get('Functionality'), 'F1')
+        self.assertIsInstance(result[0], TestCase)
+        self.assertEqual(result[0].functionality, 'F1')
 
     def test_retry_fails_returns_raw(self):
         gen = TestCaseGenerator()
+        gen.pack_categories = False
 
         bad1 = "no json here"
         bad2 = "still not json"
@@ -41,6 +49,81 @@ class TestGeneratorRetry(unittest.TestCase):
         self.assertIsInstance(result, str)
         self.assertEqual(result, bad3)
 
+    def test_truncated_reply_is_salvaged_and_only_the_rest_requested(self):
+        gen = TestCaseGenerator()
+        gen.pack_categories = False
+
+        truncated = ('[{"Functionality": "F1", "Test Summary": "S1"}, {"Functionality": "F2", "Test Summary": "S2"}, '
+                     '{"Functionality": "F3", "Test Sum')
+        rest = '[{"Functionality": "F3", "Test Summary": "S3"}, {"Functionality": "F4", "Test Summary": "S4"}]'
+
+        with patch('generator.LLMClient.generate', side_effect=[truncated, rest]) as mocked:
+            result = gen.generate_test_cases("req", positive=4, negative=0, edge=0)
+
+        self.assertEqual(result.functionality, ["F1", "F2", "F3", "F4"])
+        follow_up = mocked.call_args_list[1].args[0]
+        self.assertIn("exactly 2 Positive", follow_up)
+        self.assertIn("  - S1", follow_up)
+        self.assertIn("  - S2", follow_up)
+        # A single truncated reply leaves later batches alone
+        self.assertEqual(gen.batch_sizes["Positive"], 5)
+
+    def test_repeated_truncation_halves_batches_until_clean_replies_restore_them(self):
+        gen = TestCaseGenerator(max_workers=1, dedupe_threshold=None)
+        gen.pack_categories = False
+
+        first = '[{"Functionality": "F1"}, {"Functionality": "F2"}, {"Functionality": "F'
+        second = '[{"Functionality": "F3"}, {"Functionality": "F'
+        rest = '[{"Functionality": "F4"}]'
+
+        with patch('generator.LLMClient.generate', side_effect=[first, second, rest]):
+            result = gen.generate_test_cases("req", positive=4, negative=0, edge=0)
+
+        self.assertEqual(result.functionality, ["F1", "F2", "F3", "F4"])
+        self.assertEqual(gen.batch_sizes["Positive"], 2)
+
+        # Clean replies at the lowered size grow it back one case at a time, never past the original
+        full = '[{"Functionality": "A"}, {"Functionality": "B"}]'
+        with patch('generator.LLMClient.generate', return_value=full):
+            for _ in range(3):
+                gen.generate_test_cases("req", positive=2, negative=0, edge=0)
+        self.assertEqual(gen.batch_sizes["Positive"], 3)
+        # Replies without cases neither shrink nor restore it
+        with patch('generator.LLMClient.generate', return_value="Sorry, I can't help with that."):
+            for _ in range(3):
+                gen.generate_test_cases("req", positive=3, negative=0, edge=0)
+        self.assertEqual(gen.batch_sizes["Positive"], 3)
+        for _ in range(20):
+            gen._note_reply("Positive", 5, truncated=False)
+        self.assertEqual(gen.batch_sizes["Positive"], 5)
+
+    def test_truncation_notes_from_many_threads(self):
+        gen = TestCaseGenerator()
+        gen.pack_categories = False
+        gen.batch_sizes["Positive"] = 32
+        threads = [threading.Thread(target=gen._note_reply, args=("Positive", 5, True)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Eight truncations in pairs: exactly four halvings
+        self.assertEqual(gen.batch_sizes["Positive"], 2)
+        self.assertEqual(gen._reply_streaks["Positive"], (0, 0))
+
+    def test_malformed_object_keeps_the_rest(self):
+        gen = TestCaseGenerator()
+        gen.pack_categories = False
+
+        broken = '[{"Functionality": "F1"}, {"Functionality": oops}, {"Functionality": "F3"}]'
+        fill = '[{"Functionality": "F2"}]'
+
+        with patch('generator.LLMClient.generate', side_effect=[broken, fill]) as mocked:
+            result = gen.generate_test_cases("req", positive=3, negative=0, edge=0)
+
+        self.assertEqual(result.functionality, ["F1", "F3", "F2"])
+        self.assertEqual(mocked.call_count, 2)
+        self.assertEqual(gen.batch_sizes["Positive"], 5)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from generator import LLMClient, TestCaseGenerator
+from incremental import IncrementalGenerator, SectionStore
+from mock_server import MockOpenAIServer
+
+
+def spec(*paragraphs):
+    return "\n\n".join(f"{title.upper()}\n" + " ".join([body] * 12) for title, body in paragraphs)
+
+
+LOGIN = ("Login", "Users sign in with email and password and are locked out after five failed attempts.")
+SIGNUP = ("Signup", "New users register with a unique email address and a password of at least eight characters.")
+RESET = ("Password reset", "Users request a reset link by email and the link expires after thirty minutes.")
+
+
+class TestIncrementalGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = MockOpenAIServer().start()
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": self.server.base_url}):
+            llm = LLMClient(cache=None)
+        self.store = SectionStore(os.path.join(self.tmp.name, "sections.sqlite"))
+        self.gen = IncrementalGenerator(TestCaseGenerator(llm=llm, dedupe_threshold=None), self.store,
+                                        section_tokens=400)
+
+    def tearDown(self):
+        self.store.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _run(self, text):
+        before = self.server.request_count
+        cases = self.gen.generate_test_cases(text, positive=6, negative=3, edge=0, doc_id="spec")
+        return cases, self.server.request_count - before
+
+    def test_only_changed_sections_are_regenerated(self):
+        first, calls = self._run(spec(LOGIN, SIGNUP, RESET))
+        self.assertEqual(self.gen.last_run_stats["sections"], 3)
+        self.assertEqual(len(first), 9)
+        self.assertEqual(calls, 6)
+
+        edited = (SIGNUP[0], SIGNUP[1].replace("eight", "ten"))
+        second, calls = self._run(spec(LOGIN, edited, RESET))
+        self.assertEqual(self.gen.last_run_stats["regenerated"], 1)
+        self.assertEqual(calls, 2)
+        self.assertEqual(len(second), 9)
+        # Cases from the untouched sections come back unchanged
+        kept = [tc for tc in first if tc in second]
+        self.assertEqual(len(kept), 6)
+
+        _, calls = self._run(spec(LOGIN, edited, RESET))
+        self.assertEqual(calls, 0)
+
+    def test_removed_sections_are_dropped(self):
+        first, _ = self._run(spec(LOGIN, SIGNUP, RESET))
+        second, calls = self._run(spec(LOGIN, RESET))
+        self.assertEqual(self.gen.last_run_stats["removed"], 1)
+        # Remaining sections keep their cases; nothing new is generated
+        self.assertEqual(calls, 0)
+        self.assertTrue(all(tc in first for tc in second))
+        self.assertEqual(len(second), 6)
+
+    def test_whitespace_edits_are_free(self):
+        self._run(spec(LOGIN, SIGNUP))
+        _, calls = self._run(spec(LOGIN, SIGNUP).replace(". ", ".  "))
+        self.assertEqual(calls, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
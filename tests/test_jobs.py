@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+import unittest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from generator import GenerationCancelled
+from jobs import JobQueue, QUEUED, RUNNING, DONE, FAILED, CANCELLED, FINISHED
+
+
+class FakeGenerator:
+    """Reports one batch per case and can be held open to test cancellation."""
+
+    def __init__(self, release=None, raw=False):
+        self.release = release
+        self.raw = raw
+
+    def generate_test_cases(self, requirement_text, positive=3, negative=2, edge=1, progress=None, should_cancel=None,
+                            emit=None):
+        total = positive + negative + edge
+        cases = []
+        for i in range(total):
+            while self.release is not None and not self.release.wait(0.01):
+                if should_cancel and should_cancel():
+                    raise GenerationCancelled()
+            cases.append({"Test Summary": f"{requirement_text} {i}"})
+            if emit:
+                emit(cases[-1])
+            if progress:
+                progress(i + 1, total)
+        return "not json" if self.raw else cases
+
+
+def wait_for(queue, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {queue.get(job_id)['status']}")
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "jobs.sqlite")
+        self.queues = []
+
+    def tearDown(self):
+        for queue in self.queues:
+            queue.stop()
+        self.tmp.cleanup()
+
+    def _queue(self, factory, workers=1):
+        queue = JobQueue(self.path, workers=workers, generator_factory=factory, poll_interval=0.01)
+        self.queues.append(queue)
+        return queue
+
+    def test_job_reports_progress_and_result(self):
+        queue = self._queue(FakeGenerator).start()
+        job_id = queue.submit("login", positive=2, negative=1, edge=1)
+        job = wait_for(queue, job_id, FINISHED)
+        self.assertEqual(job["status"], DONE)
+        self.assertEqual((job["done"], job["total"]), (4, 4))
+        self.assertEqual([tc["Test Summary"] for tc in job["result"]], ["login 0", "login 1", "login 2", "login 3"])
+
+    def test_raw_output_is_kept_on_failure(self):
+        queue = self._queue(lambda: FakeGenerator(raw=True)).start()
+        job = wait_for(queue, queue.submit("login"), FINISHED)
+        self.assertEqual(job["status"], FAILED)
+        self.assertEqual(job["result"], "not json")
+
+    def test_cases_are_previewed_while_running(self):
+        release = threading.Event()
+
+        class HalfwayGenerator(FakeGenerator):
+            def generate_test_cases(self, requirement_text, emit=None, **kwargs):
+                emit({"Test Summary": "first"})
+                release.wait(5)
+                return super().generate_test_cases(requirement_text, emit=emit, **kwargs)
+
+        queue = self._queue(HalfwayGenerator).start()
+        job_id = queue.submit("login", positive=2, negative=0, edge=0)
+        wait_for(queue, job_id, (RUNNING,))
+        for _ in range(500):
+            if queue.cases(job_id):
+                break
+            time.sleep(0.01)
+        self.assertEqual(queue.cases(job_id), [{"Test Summary": "first"}])
+        self.assertEqual(queue.cases(job_id, start=1), [])
+        release.set()
+        job = wait_for(queue, job_id, FINISHED)
+        self.assertEqual(job["status"], DONE)
+        # The stored result replaces the preview
+        self.assertEqual(queue.cases(job_id), [])
+
+    def test_cancel_running_and_queued_jobs(self):
+        release = threading.Event()
+        queue = self._queue(lambda: FakeGenerator(release)).start()
+        running = queue.submit("login")
+        queued = queue.submit("signup")
+        wait_for(queue, running, (RUNNING,))
+        self.assertTrue(queue.cancel(queued))
+        self.assertTrue(queue.cancel(running))
+        self.assertEqual(wait_for(queue, running, FINISHED)["status"], CANCELLED)
+        self.assertEqual(queue.get(queued)["status"], CANCELLED)
+        self.assertFalse(queue.cancel(running))
+
+    def test_results_survive_restart_and_orphans_are_requeued(self):
+        release = threading.Event()
+        first = self._queue(lambda: FakeGenerator(release)).start()
+        job_id = first.submit("login")
+        wait_for(first, job_id, (RUNNING,))
+        first.stop()
+        # Shutting down is not a cancel: the job goes back in the queue
+        self.assertEqual(first.get(job_id)["status"], QUEUED)
+
+        second = self._queue(FakeGenerator).start()
+        job = wait_for(second, job_id, FINISHED)
+        self.assertEqual(job["status"], DONE)
+        self.assertEqual(len(job["result"]), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
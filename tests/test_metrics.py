@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import pstats
+import tempfile
+import threading
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+import metrics
+import save_excel
+from generator import LLMClient, TestCaseGenerator
+from jobs import DONE, JobQueue
+from mock_server import MockOpenAIServer
+from transport import Transport
+
+
+class TestMetrics(unittest.TestCase):
+    def test_spans_and_counters_reach_run_and_registry(self):
+        before = metrics.REGISTRY.counters.get("test.events", 0)
+        with metrics.run() as report:
+            metrics.count("test.events", 2)
+            with metrics.span("test.step"):
+                pass
+            with metrics.span("test.step"):
+                pass
+        metrics.count("test.events")
+        self.assertEqual(report.counters["test.events"], 2)
+        self.assertEqual(metrics.REGISTRY.counters["test.events"], before + 3)
+        snap = report.snapshot()
+        self.assertEqual(snap["spans"]["test.step"]["count"], 2)
+        self.assertEqual(json.loads(report.to_json())["counters"], {"test.events": 2})
+        prom = report.to_prometheus()
+        self.assertIn("testgen_test_events_total 2", prom)
+        self.assertIn('testgen_span_seconds_count{span="test.step"} 2', prom)
+
+    def test_bind_carries_the_run_into_threads(self):
+        with metrics.run() as report:
+            task = metrics.bind(lambda: metrics.count("test.threaded"))
+        thread = threading.Thread(target=task)
+        thread.start()
+        thread.join()
+        unbound = threading.Thread(target=lambda: metrics.count("test.threaded"))
+        with metrics.run() as other:
+            unbound.start()
+            unbound.join()
+        self.assertEqual(report.counters, {"test.threaded": 1})
+        self.assertEqual(other.counters, {})
+
+    def test_unknown_profile_mode(self):
+        with self.assertRaises(ValueError):
+            with metrics.run("gpu"):
+                pass
+        # The job queue refuses the setting up front instead of failing every job
+        with self.assertRaises(ValueError):
+            JobQueue(":memory:", profile="gpu")
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def setUp(self):
+        self.server = MockOpenAIServer().start()
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": self.server.base_url}):
+            self.llm = LLMClient(cache=None)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_generation_report(self):
+        gen = TestCaseGenerator(llm=self.llm, dedupe_threshold=None)
+        with metrics.run() as report:
+            cases = gen.generate_test_cases("User can log in", positive=6, negative=2, edge=1)
+            save_excel.test_cases_to_bytes(cases, "csv")
+        snap = report.snapshot()
+        self.assertEqual(snap["counters"]["llm.calls"], self.server.request_count)
+        self.assertGreater(snap["counters"]["llm.completion_tokens"], 0)
+        self.assertEqual(len(snap["calls"]), self.server.request_count)
+        self.assertGreater(snap["calls"][0]["prompt_tokens"], 0)
+        for name in ("llm.generate", "llm.request", "parse", "normalize", "export.csv"):
+            self.assertIn(name, snap["spans"])
+
+    def test_streamed_replies_time_the_body(self):
+        with MockOpenAIServer(chunk_size=20, chunk_delay=0.005) as server:
+            with patch.dict(os.environ, {"OPENAI_BASE_URL": server.base_url}):
+                llm = LLMClient(cache=None)
+            gen = TestCaseGenerator(llm=llm, dedupe_threshold=None)
+            with metrics.run() as report:
+                gen.generate_test_cases("User can log in", positive=2, negative=1, edge=0, emit=lambda tc: None)
+        spans = report.snapshot()["spans"]
+        self.assertEqual(spans["llm.stream"]["count"], report.counters["llm.calls"])
+        # Opening the stream is quick; reading the chunks is where the time goes
+        self.assertGreater(spans["llm.stream"]["total_seconds"], spans["llm.request"]["total_seconds"])
+
+    def test_concurrent_runs_are_kept_apart(self):
+        reports = {}
+
+        def work(name, positive):
+            gen = TestCaseGenerator(llm=self.llm, dedupe_threshold=None)
+            with metrics.run() as report:
+                gen.generate_test_cases(f"Requirement {name}", positive=positive, negative=0, edge=0)
+            reports[name] = report
+
+        threads = [threading.Thread(target=work, args=("a", 5)), threading.Thread(target=work, args=("b", 15))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Packed requests of at most 12 cases each
+        self.assertEqual((reports["a"].counters["llm.calls"], reports["b"].counters["llm.calls"]), (1, 2))
+
+    def test_format_fallback_is_one_generate_span_per_request(self):
+        with MockOpenAIServer(reject_response_format={"json_schema"}) as server:
+            with patch.dict(os.environ, {"OPENAI_BASE_URL": server.base_url}):
+                llm = LLMClient(cache=None)
+            gen = TestCaseGenerator(llm=llm, dedupe_threshold=None, structured_output=True)
+            with metrics.run() as report:
+                gen.generate_test_cases("User can log in", positive=2, negative=0, edge=0)
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(report.snapshot()["spans"]["llm.generate"]["count"], 2)
+        self.assertNotIn("parse.failures", report.counters)
+
+    def test_retries_and_parse_failures_are_counted(self):
+        with MockOpenAIServer(rate_limit_rate=0.3, retry_after=0.01, seed=4) as server:
+            with patch.dict(os.environ, {"OPENAI_BASE_URL": server.base_url}):
+                llm = LLMClient(cache=None, transport=Transport(backoff_base=0.01))
+            with metrics.run() as report:
+                for _ in range(5):
+                    llm.generate("Generate exactly 2 Positive test cases")
+        self.assertEqual(report.counters["llm.retries"], server.request_count - 5)
+        self.assertGreater(report.counters["llm.retries"], 0)
+
+        gen = TestCaseGenerator(max_workers=1, llm=self.llm, dedupe_threshold=None)
+        with patch.object(self.llm, "generate", return_value="no json here"), metrics.run() as report:
+            gen.generate_test_cases("User can log in", positive=1, negative=0, edge=0)
+        self.assertEqual(report.counters["parse.failures"], 3)
+
+    def test_profile_covers_worker_threads(self):
+        gen = TestCaseGenerator(llm=self.llm, dedupe_threshold=None)
+        with metrics.run("cpu,memory") as report:
+            gen.generate_test_cases("User can log in", positive=10, negative=5, edge=0)
+        profile = report.snapshot()["profile"]
+        self.assertLessEqual(len(profile["cpu"]), 25)
+        self.assertGreater(profile["memory"]["peak_bytes"], 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.prof")
+            report.profiler.dump(path)
+            self.assertGreater(os.path.getsize(path), 0)
+            stats = pstats.Stats(path)
+        # _run_pack only runs on pool threads
+        self.assertTrue(any(func == "_run_pack" for _, _, func in stats.stats))
+
+    def test_jobs_store_their_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = JobQueue(os.path.join(tmp, "jobs.sqlite"), workers=1, poll_interval=0.01,
+                             generator_factory=lambda: TestCaseGenerator(llm=self.llm, dedupe_threshold=None)).start()
+            try:
+                job_id = queue.submit("User can log in", positive=2, negative=1, edge=0)
+                for _ in range(500):
+                    job = queue.get(job_id)
+                    if job["status"] == DONE:
+                        break
+                    threading.Event().wait(0.01)
+            finally:
+                queue.stop()
+        self.assertEqual(job["status"], DONE)
+        self.assertEqual(job["metrics"]["counters"]["llm.calls"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import sys
+import csv
+import io
+import tracemalloc
+from pathlib import Path
+import unittest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import save_excel
+from models import COLUMNS, TestCase, TestSuite, normalize
+
+
+class TestNormalize(unittest.TestCase):
+    def test_aliases_and_flattening(self):
+        case = normalize({"Summary": " Valid login ", "Preconditions": "User exists",
+                          "TestData": {"user": "a", "pin": 1234}, "Steps": "Open page", "Expected": "Home page",
+                          "Category": "Positive"})
+        self.assertEqual(case.summary, "Valid login")
+        self.assertEqual(case.pre_condition, "User exists")
+        self.assertEqual(case.test_data, "user: a, pin: 1234")
+        self.assertEqual(case.steps, ("Open page",))
+        self.assertEqual(case.row()[4], "Open page")
+
+    def test_defaults_use_position(self):
+        case = normalize({"Test Steps": ["a", "b"]}, index=2)
+        self.assertEqual(case.functionality, "Test Case 3")
+        self.assertEqual(case.summary, "Verify Test Case 3")
+        self.assertTrue(case.expected)
+        self.assertEqual(normalize({}, fill_defaults=False), TestCase())
+
+    def test_round_trip(self):
+        case = normalize({"Functionality": "Login", "Test Steps": ["a", "b"], "Category": "Edge"})
+        self.assertEqual(normalize(case.to_dict()), case)
+        self.assertEqual(TestCase.from_dict(case.to_dict()), case)
+
+
+class TestTestSuite(unittest.TestCase):
+    def setUp(self):
+        self.items = [{"Functionality": f"F{i}", "Test Steps": ["one", "two"], "Category": "Positive"}
+                      for i in range(3)]
+
+    def test_columns_rows_and_indexing(self):
+        suite = TestSuite.from_dicts(self.items + ["not a case"])
+        self.assertEqual(len(suite), 3)
+        self.assertEqual(list(suite.columns()), COLUMNS)
+        self.assertEqual(suite.columns(["Functionality"]), {"Functionality": ["F0", "F1", "F2"]})
+        self.assertEqual(next(suite.rows()), suite[0].row())
+        self.assertEqual([tc.functionality for tc in suite], ["F0", "F1", "F2"])
+        self.assertEqual(suite.to_dicts()[1]["Test Steps"], ["one", "two"])
+
+    def test_load_reads_stored_suites_back(self):
+        suite = TestSuite.from_dicts(self.items)
+        self.assertEqual(TestSuite.load(suite.to_dicts()), suite)
+        self.assertNotEqual(TestSuite.load(suite.to_dicts()[:2]), suite)
+
+    def test_empty_cases_skipped_without_defaults(self):
+        suite = TestSuite.from_dicts([{}, {"Summary": "x"}], fill_defaults=False)
+        self.assertEqual(suite.summary, ["x"])
+
+    def test_exports_read_suite_directly(self):
+        suite = TestSuite.from_dicts(self.items)
+        rows = list(csv.reader(io.StringIO(save_excel.test_cases_to_bytes(suite, "csv").decode("utf-8"))))
+        self.assertEqual(rows[0], COLUMNS)
+        self.assertEqual(rows[1][:1] + rows[1][4:5], ["F0", "one\ntwo"])
+
+    def test_smaller_than_dicts(self):
+        items = [{"Functionality": f"Feature {i}", "Test Summary": f"Verify feature {i}",
+                  "Pre Condition": "", "Test Data": f"id: {i}", "Test Steps": ["Open", "Submit"],
+                  "Expected Result": "Saved", "Category": "Positive"} for i in range(5000)]
+
+        def measure(build):
+            tracemalloc.start()
+            result = build()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return result, size
+
+        _, dict_size = measure(lambda: [case.to_dict() for case in TestSuite.from_dicts(items)])
+        _, suite_size = measure(lambda: TestSuite.from_dicts(items))
+        self.assertLess(suite_size, dict_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from batch_runner import run_batch
+from generator import LLMClient, TestCaseGenerator
+from mock_server import MockOpenAIServer
+from packing import create_packed_prompt, plan_packs, split_reply
+
+
+class TestPlanPacks(unittest.TestCase):
+    def test_categories_and_requirements_share_packs(self):
+        reqs = [("a", "login"), ("b", "signup"), ("c", "reset")]
+        packs = plan_packs(reqs, {key: (3, 2, 1) for key, _ in reqs}, max_cases=12)
+        self.assertEqual([pack.cases for pack in packs], [12, 6])
+        self.assertEqual(list(packs[0].requirements), ["a", "b"])
+        self.assertEqual(packs[1].items, [("c", "Positive", 3), ("c", "Negative", 2), ("c", "Edge", 1)])
+
+    def test_large_items_are_split_across_packs(self):
+        packs = plan_packs([("a", "login")], {"a": (20, 0, 5)}, max_cases=12)
+        self.assertEqual([pack.items for pack in packs],
+                         [[("a", "Positive", 12)], [("a", "Positive", 8), ("a", "Edge", 4)], [("a", "Edge", 1)]])
+
+    def test_token_budget_starts_a_new_pack(self):
+        reqs = [("a", "word " * 400), ("b", "word " * 400)]
+        packs = plan_packs(reqs, {"a": (1, 0, 0), "b": (1, 0, 0)}, max_prompt_tokens=600)
+        self.assertEqual([list(pack.requirements) for pack in packs], [["a"], ["b"]])
+
+    def test_split_reply_by_tag_and_category(self):
+        pack = plan_packs([("a", "login"), ("b", "signup")], {"a": (1, 1, 0), "b": (2, 0, 0)})[0]
+        self.assertIn("R2: 2 Positive", create_packed_prompt(pack))
+        reply = [{"Requirement": "R1", "Category": "Positive", "Test Summary": "a1"},
+                 {"Requirement": "R2", "Category": "positive", "Test Summary": "b1"},
+                 {"Requirement": "R1", "Category": "Positive", "Test Summary": "extra"},
+                 {"Requirement": "R9", "Category": "Positive", "Test Summary": "stray"},
+                 {"Requirement": "[R2]", "Category": "Positive", "Test Summary": "b2"}]
+        buckets = split_reply(pack, reply)
+        summaries = {item: [tc["Test Summary"] for tc in cases] for item, cases in buckets.items()}
+        self.assertEqual(summaries, {("a", "Positive"): ["a1"], ("a", "Negative"): [], ("b", "Positive"): ["b1", "b2"]})
+        self.assertNotIn("Requirement", buckets[("b", "Positive")][0])
+
+
+class TestPackedGeneration(unittest.TestCase):
+    def setUp(self):
+        self.server = MockOpenAIServer().start()
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": self.server.base_url}):
+            self.llm = LLMClient(cache=None)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_many_small_requirements_use_few_requests(self):
+        gen = TestCaseGenerator(llm=self.llm)
+        requirements = {f"r{i}": f"Requirement {i}: user can update field {i}" for i in range(8)}
+        results = gen.generate_packed(requirements, positive=3, negative=2, edge=1)
+        self.assertEqual(list(results), list(requirements))
+        for cases in results.values():
+            self.assertEqual(cases.category, ["Positive"] * 3 + ["Negative"] * 2 + ["Edge"])
+        # 48 cases at 12 per request, instead of 3 requests per requirement
+        self.assertEqual(self.server.request_count, 4)
+
+    def test_single_requirement_shares_requests_across_categories(self):
+        gen = TestCaseGenerator(llm=self.llm, dedupe_threshold=None)
+        progress = []
+        cases = gen.generate_test_cases("User can log in", positive=20, negative=20, edge=5,
+                                        progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(cases.category, ["Positive"] * 20 + ["Negative"] * 20 + ["Edge"] * 5)
+        # 45 cases at 12 per request, instead of ten per-category batches
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual(progress[-1], (4, 4))
+        # Longer requirements are split into sections by the batch path instead
+        gen.max_section_tokens = 2
+        gen.generate_test_cases("User can log in with email and password", positive=5, negative=0, edge=0)
+        self.assertNotIn("tagged requirements", self.server.requests[-1]["messages"][-1]["content"])
+
+    def test_missing_cases_are_requested_per_category(self):
+        gen = TestCaseGenerator(max_workers=1, llm=self.llm, dedupe_threshold=None)
+        partial = json.dumps([{"Requirement": "R1", "Category": "Positive", "Test Summary": "Valid login"}])
+        original = self.llm.generate
+        reply = lambda prompt, **kw: partial if "tagged requirements" in prompt else original(prompt, **kw)
+        with patch.object(self.llm, "generate", side_effect=reply) as generate:
+            results = gen.generate_packed({"a": "login"}, positive=2, negative=1, edge=0)
+        self.assertEqual(results["a"].category, ["Positive", "Positive", "Negative"])
+        self.assertEqual(results["a"][0].summary, "Valid login")
+        follow_ups = [c.args[0] for c in generate.call_args_list[1:]]
+        self.assertEqual(len(follow_ups), 2)
+        self.assertIn("Valid login", follow_ups[0])
+
+    def test_batch_runner_packs_records(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source, output = os.path.join(tmp, "reqs.jsonl"), os.path.join(tmp, "out.jsonl")
+            with open(source, "w", encoding="utf-8") as fh:
+                for i in range(6):
+                    fh.write(json.dumps({"id": f"r{i}", "requirement": f"feature {i}"}) + "\n")
+            gen = TestCaseGenerator(llm=self.llm)
+            stats = run_batch(source, output, workers=2, positive=1, negative=1, edge=0, generator=gen, pack_size=3)
+        self.assertEqual((stats["processed"], stats["test_cases"]), (6, 12))
+        self.assertEqual(self.server.request_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import io
+import csv
+import tempfile
+from pathlib import Path
+import unittest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import save_excel
+
+
+def _cases(n):
+    for i in range(n):
+        yield {"Functionality": f"F{i}", "Test Summary": "S", "Test Data": {"user": "a"},
+               "Test Steps": ["one", "two"], "Expected Result": "ok"}
+
+
+class TestStreamingExport(unittest.TestCase):
+    def test_xlsx_from_generator_to_file(self):
+        from openpyxl import load_workbook
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_excel.test_cases_to_excel(_cases(3), os.path.join(tmp, "sub", "out.xlsx"))
+            rows = list(load_workbook(path).active.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), save_excel.COLUMNS)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][3:5], ("user: a", "one\ntwo"))
+
+    def test_csv_to_buffer(self):
+        data = save_excel.test_cases_to_bytes(_cases(2), "csv")
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+        self.assertEqual(rows[0], save_excel.COLUMNS)
+        self.assertEqual(rows[2][0], "F1")
+
+    def test_parquet_row_groups(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        data = save_excel.test_cases_to_bytes(_cases(save_excel.PARQUET_BATCH_ROWS + 5), "parquet")
+        parquet = pq.ParquetFile(io.BytesIO(data))
+        self.assertEqual(parquet.metadata.num_rows, save_excel.PARQUET_BATCH_ROWS + 5)
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            save_excel.test_cases_to_bytes([], "pdf")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from stream_parser import JSONArrayStreamParser, iter_objects
+from generator import TestCaseGenerator
+
+
+CASES = [
+    {"Functionality": "Login", "Test Summary": "Valid {login}", "Test Steps": ["open [page]", "say \"hi\""]},
+    {"Functionality": "Logout", "Test Data": {"user": "a}b"}, "Test Steps": []},
+]
+
+
+class TestJSONArrayStreamParser(unittest.TestCase):
+    def test_emits_each_object_when_its_brace_closes(self):
+        text = "```json\n" + json.dumps(CASES) + "\n```"
+        parser = JSONArrayStreamParser()
+        seen = []
+        first_at = None
+        for i, ch in enumerate(text):
+            got = parser.feed(ch)
+            if got and first_at is None:
+                first_at = i
+            seen.extend(got)
+        self.assertEqual(seen, CASES)
+        self.assertTrue(parser.finished)
+        # The first object is available long before the stream ends
+        self.assertLess(first_at, text.index('"Logout"'))
+
+    def test_truncated_stream_keeps_complete_objects(self):
+        text = json.dumps(CASES)
+        parser = JSONArrayStreamParser()
+        out = parser.feed(text[:-20])
+        self.assertEqual(out, CASES[:1])
+        self.assertTrue(parser.truncated)
+
+    def test_malformed_object_is_skipped(self):
+        text = '[{"a": 1}, {"b": oops}, {"c": 3}]'
+        parser = JSONArrayStreamParser()
+        self.assertEqual(parser.feed(text), [{"a": 1}, {"c": 3}])
+        self.assertEqual(parser.failed, 1)
+
+    def test_iter_objects_over_chunks(self):
+        text = json.dumps(CASES)
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        self.assertEqual(list(iter_objects(chunks)), CASES)
+
+
+class TestIterTestCases(unittest.TestCase):
+    def test_streams_normalized_cases(self):
+        gen = TestCaseGenerator(max_workers=2)
+
+        def fake_stream(prompt, **kwargs):
+            text = json.dumps(CASES)
+            for i in range(0, len(text), 5):
+                yield text[i:i + 5]
+
+        with patch('generator.LLMClient.stream', side_effect=fake_stream):
+            result = list(gen.iter_test_cases("req", positive=2, negative=2, edge=0))
+
+        self.assertEqual(len(result), 4)
+        self.assertEqual(sorted(tc.category for tc in result), ["Negative", "Negative", "Positive", "Positive"])
+        self.assertTrue(all(tc.expected for tc in result))
+
+    def test_generate_previews_streamed_cases(self):
+        gen = TestCaseGenerator(max_workers=1, dedupe_threshold=None)
+        tagged = [dict(tc, Requirement="R1", Category="Positive") for tc in CASES]
+
+        def fake_stream(prompt, **kwargs):
+            text = json.dumps(tagged)
+            for i in range(0, len(text), 5):
+                yield text[i:i + 5]
+
+        # A packed request for all categories, then one request per category batch
+        for pack in (True, False):
+            gen.pack_categories = pack
+            previews = []
+            with patch('generator.LLMClient.stream', side_effect=fake_stream) as stream, \
+                    patch('generator.LLMClient.generate') as generate:
+                result = gen.generate_test_cases("req", positive=2, negative=0, edge=0, emit=previews.append)
+
+            generate.assert_not_called()
+            self.assertEqual(stream.call_count, 1)
+            self.assertEqual([tc['Functionality'] for tc in previews], result.functionality)
+            self.assertEqual([tc['Category'] for tc in previews], ["Positive", "Positive"])
+            self.assertFalse(any("Requirement" in tc for tc in previews))
+
+    def test_unparseable_stream_keeps_last_raw(self):
+        gen = TestCaseGenerator(max_workers=1)
+        with patch('generator.LLMClient.stream', side_effect=lambda prompt, **kw: iter(["no json"])) as mocked:
+            result = list(gen.iter_test_cases("req", positive=1, negative=0, edge=0))
+        self.assertEqual(result, [])
+        self.assertEqual(mocked.call_count, 3)
+        self.assertEqual(gen.last_raw, "no json")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from generator import LLMClient, LLMRequestFailed, ResponseFormatRejected, TestCaseGenerator
+from mock_server import MockOpenAIServer
+from structured import FIELDS, RESPONSE_FORMAT, parse_structured
+
+CASE = {field: "x" for field in FIELDS}
+CASE["Test Steps"] = ["Open login page"]
+
+
+class TestParseStructured(unittest.TestCase):
+    def test_accepts_schema_reply(self):
+        self.assertEqual(parse_structured(json.dumps({"test_cases": [CASE]})), [CASE])
+
+    def test_rejects_anything_else(self):
+        missing = {k: v for k, v in CASE.items() if k != "Expected Result"}
+        for text in (None, "", "[]", "not json", json.dumps([CASE]), json.dumps({"test_cases": [missing]}),
+                     json.dumps({"test_cases": [dict(CASE, **{"Test Steps": "one step"})]})):
+            self.assertIsNone(parse_structured(text), text)
+
+
+class TestStructuredGeneration(unittest.TestCase):
+    def _generator(self, server):
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": server.base_url}):
+            llm = LLMClient(cache=None)
+        gen = TestCaseGenerator(max_workers=1, llm=llm, structured_output=True)
+        # One request per category batch, so each prompt follows the format it is sent with
+        gen.pack_categories = False
+        return gen
+
+    def test_one_request_per_batch(self):
+        with MockOpenAIServer() as server:
+            gen = self._generator(server)
+            result = gen.generate_test_cases("login", positive=5, negative=5, edge=3)
+        self.assertEqual(len(result), 13)
+        self.assertEqual(server.request_count, 3)
+        self.assertTrue(all(r["response_format"]["type"] == "json_schema" for r in server.requests))
+        self.assertNotIn("JSON array", server.requests[0]["messages"][-1]["content"])
+
+    def test_falls_back_to_json_mode_when_model_rejects_schema(self):
+        with MockOpenAIServer(reject_response_format={"json_schema"}) as server:
+            gen = self._generator(server)
+            result = gen.generate_test_cases("login", positive=5, negative=5, edge=3)
+        self.assertEqual(len(result), 13)
+        self.assertFalse(gen.llm.supports_response_format)
+        # One rejected request, then JSON mode requests with a prompt that describes the object
+        self.assertEqual(server.request_count, 4)
+        self.assertEqual([r["response_format"]["type"] for r in server.requests],
+                         ["json_schema"] + ["json_object"] * 3)
+        self.assertIn('{"test_cases": [...]}', server.requests[1]["messages"][-1]["content"])
+
+    def test_falls_back_to_text_when_model_rejects_both(self):
+        with MockOpenAIServer(reject_response_format=True) as server:
+            gen = self._generator(server)
+            result = gen.generate_test_cases("login", positive=5, negative=5, edge=3)
+        self.assertEqual(len(result), 13)
+        self.assertEqual(gen.llm.rejected_formats, {"json_schema", "json_object"})
+        # Two rejected requests, then plain text requests whose prompt asks for the bare array
+        self.assertEqual(server.request_count, 5)
+        self.assertEqual(sum(1 for r in server.requests if "response_format" in r), 2)
+        for request in server.requests[2:]:
+            self.assertIn("Output ONLY a JSON array", request["messages"][-1]["content"])
+
+    def test_other_bad_requests_keep_structured_output(self):
+        with MockOpenAIServer(max_prompt_chars=10) as server:
+            gen = self._generator(server)
+            with self.assertRaises(LLMRequestFailed) as failed:
+                gen.llm.generate("a prompt that is too long", response_format=RESPONSE_FORMAT)
+        self.assertTrue(failed.exception.request_specific)
+        self.assertTrue(gen.llm.supports_response_format)
+        self.assertEqual(gen.llm.rejected_formats, set())
+
+    def test_rejected_format_is_reported_to_the_caller(self):
+        with MockOpenAIServer(reject_response_format=True) as server:
+            gen = self._generator(server)
+            with self.assertRaises(ResponseFormatRejected):
+                gen.llm.generate("Generate exactly 2 Positive test cases", response_format=RESPONSE_FORMAT)
+            # Known to be unsupported: refused without another request
+            with self.assertRaises(ResponseFormatRejected):
+                list(gen.llm.stream("Generate exactly 2 Positive test cases", response_format=RESPONSE_FORMAT))
+        self.assertEqual(server.request_count, 1)
+
+    def test_model_from_environment(self):
+        with patch.dict(os.environ, {"OPENAI_MODEL": "gpt-4o-mini"}):
+            self.assertEqual(LLMClient(cache=None).model, "gpt-4o-mini")
+        self.assertEqual(LLMClient(model="gpt-4o", cache=None).model, "gpt-4o")
+
+    def test_streaming_reads_wrapped_array(self):
+        with MockOpenAIServer(chunk_size=7) as server:
+            gen = self._generator(server)
+            result = list(gen.iter_test_cases("login", positive=3, negative=0, edge=0))
+        self.assertEqual(len(result), 3)
+        self.assertEqual(server.request_count, 1)
+
+    def test_streaming_rebuilds_prompt_after_rejection(self):
+        with MockOpenAIServer(chunk_size=7, reject_response_format=True) as server:
+            gen = self._generator(server)
+            result = list(gen.iter_test_cases("login", positive=3, negative=0, edge=0))
+        self.assertEqual(len(result), 3)
+        self.assertEqual(server.request_count, 3)
+        self.assertNotIn("response_format", server.requests[-1])
+        self.assertIn("Output ONLY a JSON array", server.requests[-1]["messages"][-1]["content"])
+
+
+if __name__ == '__main__':
+    unittest.main()
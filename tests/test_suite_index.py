@@ -0,0 +1,158 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+import save_excel
+from generator import LLMClient, TestCaseGenerator
+from incremental import IncrementalGenerator, SectionStore
+from mock_server import MockOpenAIServer
+from suite_index import SuiteIndex, similarity
+
+LOGIN = "Users log in with email and password. The account is locked after three failed attempts."
+LOGIN_AGAIN = "Users log in with their email and password; the account is locked after three failed attempts."
+SIGNUP = "New customers register with a unique email address and a password of at least eight characters."
+
+
+def _case(summary, category=""):
+    return {"Functionality": "Login", "Test Summary": summary, "Test Steps": ["Open page"],
+            "Expected Result": "ok", "Category": category}
+
+
+class TestSuiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = SuiteIndex(os.path.join(self.tmp.name, "suites.sqlite"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_search_ranks_similar_requirements(self):
+        login = self.index.add(LOGIN, [_case("Valid login", "Positive")], (1, 0, 0))
+        self.index.add(SIGNUP, [_case("Valid signup", "Positive")], (1, 0, 0))
+        matches = self.index.search(LOGIN_AGAIN)
+        self.assertEqual([m.id for m in matches], [login])
+        self.assertGreater(matches[0].score, 0.9)
+        self.assertEqual(matches[0].counts, (1, 0, 0))
+        self.assertEqual(self.index.search("completely unrelated payroll export"), [])
+        self.assertEqual(similarity(LOGIN, LOGIN), 1.0)
+
+    def test_same_requirement_replaces_suite(self):
+        first = self.index.add(LOGIN, [_case("a")], (1, 0, 0))
+        second = self.index.add(" " + LOGIN + "\n", [_case("b")], (1, 0, 0), source="x.xlsx")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.get(first).cases[0]["Test Summary"], "b")
+        self.index.add(LOGIN, [_case("c")], (2, 0, 0))
+        self.assertEqual(len(self.index), 2)
+
+    def test_rejects_anything_but_case_dicts(self):
+        for cases in ("| Functionality | Test Summary |", ["raw"], {"Test Summary": "x"}):
+            with self.assertRaises(TypeError):
+                self.index.add(LOGIN, cases)
+        self.assertEqual(len(self.index), 0)
+
+    def test_bulk_import_of_exports(self):
+        paths = []
+        for name, summaries in [("login", ["Valid login", "Locked after failed attempts"]), ("signup", ["Register"])]:
+            path = os.path.join(self.tmp.name, f"{name}.xlsx")
+            save_excel.test_cases_to_excel([_case(s, "Negative") for s in summaries], path)
+            paths.append(path)
+        broken = os.path.join(self.tmp.name, "broken.xlsx")
+        with open(broken, "w") as fh:
+            fh.write("{}")
+        stats = self.index.import_xlsx(paths + [broken])
+        self.assertEqual(stats, {"imported": 2, "skipped": 0, "failed": 1})
+        self.assertEqual(self.index.import_xlsx(paths)["skipped"], 2)
+        match = self.index.search("login locked after failed attempts")[0]
+        self.assertEqual(match.source, os.path.abspath(paths[0]))
+        self.assertEqual(match.cases[1]["Test Steps"], ["Open page"])
+        # Exports carry the Category column, so imported suites keep their categories
+        self.assertEqual(match.cases[1]["Category"], "Negative")
+
+
+class TestGeneratorReuse(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = MockOpenAIServer().start()
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": self.server.base_url}):
+            llm = LLMClient(cache=None)
+        self.index = SuiteIndex(os.path.join(self.tmp.name, "suites.sqlite"))
+        self.gen = TestCaseGenerator(llm=llm, dedupe_threshold=None, index=self.index)
+
+    def tearDown(self):
+        self.index.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _calls(self, fn, *args, **kwargs):
+        before = self.server.request_count
+        result = fn(*args, **kwargs)
+        return result, self.server.request_count - before
+
+    def test_close_match_is_reused_without_calls(self):
+        first, calls = self._calls(self.gen.generate_test_cases, LOGIN, positive=3, negative=2, edge=1)
+        self.assertEqual(calls, 1)
+        second, calls = self._calls(self.gen.generate_test_cases, LOGIN_AGAIN, positive=3, negative=2, edge=1)
+        self.assertEqual(calls, 0)
+        self.assertEqual(second, first)
+        self.assertEqual(len(self.index), 2)
+
+    def test_only_missing_cases_are_generated(self):
+        self.gen.generate_test_cases(LOGIN, positive=3, negative=2, edge=0)
+        more, calls = self._calls(self.gen.generate_test_cases, LOGIN_AGAIN, positive=5, negative=2, edge=1)
+        self.assertEqual(more.category, ["Positive"] * 5 + ["Negative"] * 2 + ["Edge"])
+        self.assertEqual(calls, 2)
+
+    def test_uncategorized_imports_are_classified_once(self):
+        self.index.add(LOGIN, [_case(f"case {i}") for i in range(4)])
+        self.gen.reuse_threshold = None
+        self.assertIsNone(self.gen.prior_match(LOGIN))
+        suite_id = self.gen.find_prior(LOGIN)[0].id
+        original = self.gen.llm.generate
+        labels = '["Negative", "Positive", "positive", "unsure"]'
+        reply = lambda prompt, **kw: labels if prompt.startswith("Classify") else original(prompt, **kw)
+        with patch.object(self.gen.llm, "generate", side_effect=reply) as generate:
+            cases = self.gen.generate_test_cases(LOGIN, positive=2, negative=1, edge=0, reuse=suite_id)
+            self.assertEqual(generate.call_count, 1)
+            self.assertEqual(list(zip(cases.summary, cases.category)),
+                             [("case 1", "Positive"), ("case 2", "Positive"), ("case 0", "Negative")])
+            # The labels are stored with the suite, so the next reuse needs no request
+            self.assertEqual([tc["Category"] for tc in self.index.get(suite_id).cases],
+                             ["Negative", "Positive", "Positive", ""])
+            self.gen.generate_test_cases(LOGIN, positive=2, negative=1, edge=0, reuse=suite_id)
+            self.assertEqual(generate.call_count, 1)
+
+    def test_unclassified_imports_are_not_reused(self):
+        self.index.add(SIGNUP, [_case(f"case {i}") for i in range(3)])
+        suite_id = self.gen.find_prior(SIGNUP)[0].id
+        # The mock answers with test cases, not one label per case
+        cases, calls = self._calls(self.gen.generate_test_cases, SIGNUP, positive=2, negative=1, edge=0, reuse=suite_id)
+        self.assertEqual(calls, 3)
+        self.assertEqual(cases.category, ["Positive", "Positive", "Negative"])
+        self.assertFalse(set(cases.summary) & {"case 0", "case 1", "case 2"})
+
+    def test_incremental_uses_index_only_for_new_documents(self):
+        store = SectionStore(os.path.join(self.tmp.name, "sections.sqlite"))
+        try:
+            gen = IncrementalGenerator(self.gen, store)
+            _, calls = self._calls(gen.generate_test_cases, LOGIN, positive=2, negative=1, edge=0)
+            self.assertEqual(calls, 2)
+            _, calls = self._calls(gen.generate_test_cases, LOGIN_AGAIN, positive=2, negative=1, edge=0)
+            self.assertEqual((calls, gen.last_run_stats["prior_suite"]), (0, 1))
+        finally:
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import sys
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LLM_CACHE", "0")
+
+from generator import LLMClient, TestCaseGenerator
+from mock_server import MockOpenAIServer
+from transport import RateLimiter, Transport
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_per_minute_is_never_exceeded(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, clock=clock, sleep=clock.sleep)
+        for _ in range(130):
+            limiter.acquire()
+        # 10 seconds of burst, then one request per second
+        self.assertAlmostEqual(clock.now, 120, delta=1)
+
+    def test_tokens_are_settled_from_usage(self):
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=6000, clock=clock, sleep=clock.sleep)
+        limiter.acquire(1000)
+        limiter.settle(1000, 100)
+        limiter.acquire(900)
+        self.assertEqual(clock.now, 0)
+        limiter.acquire(1000)
+        self.assertGreater(clock.now, 0)
+
+    def test_pause_holds_back_every_caller(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        limiter.pause(2.5)
+        self.assertEqual(limiter.acquire(), 2.5)
+
+
+class TestTransport(unittest.TestCase):
+    def _client(self, server, **options):
+        transport = Transport(backoff_base=0.01, **options)
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": server.base_url}):
+            return LLMClient(cache=None, transport=transport), transport
+
+    def test_transient_errors_are_retried(self):
+        with MockOpenAIServer(rate_limit_rate=0.2, error_rate=0.1, retry_after=0.01, seed=4) as server:
+            llm, transport = self._client(server)
+            replies = [llm.generate("Generate exactly 2 Positive test cases") for _ in range(10)]
+        self.assertTrue(all(replies))
+        self.assertGreater(transport.retries, 0)
+        self.assertEqual(server.request_count, 10 + transport.retries)
+
+    def test_permanent_errors_are_not_retried(self):
+        transport = Transport(backoff_base=0.01)
+        calls = []
+
+        def request(status):
+            calls.append(status)
+            raise StatusError(status)
+
+        with self.assertRaises(StatusError):
+            transport.call(lambda: request(400))
+        self.assertEqual(calls, [400])
+        with self.assertRaises(StatusError):
+            transport.call(lambda: request(503))
+        self.assertEqual(calls, [400] + [503] * 6)
+
+    def test_permanent_failure_stops_the_run(self):
+        with MockOpenAIServer(api_key="another-key") as server:
+            llm, _ = self._client(server)
+            gen = TestCaseGenerator(max_workers=1, llm=llm)
+            self.assertIsNone(gen.generate_test_cases("login", positive=20, negative=20, edge=5))
+        # Every other batch would fail the same way, so none of them is sent
+        self.assertEqual(server.request_count, 1)
+        self.assertIn("AuthenticationError", str(gen.last_error))
+        self.assertFalse(gen.last_error.request_specific)
+
+    def test_exhausted_retries_are_not_retried_again(self):
+        with MockOpenAIServer(error_rate=1.0) as server:
+            llm, _ = self._client(server, max_retries=2)
+            gen = TestCaseGenerator(max_workers=1, llm=llm)
+            self.assertIsNone(gen.generate_test_cases("login", positive=5, negative=5, edge=3))
+        self.assertEqual(server.request_count, 3)
+
+    def test_request_specific_failure_only_ends_its_batch(self):
+        with MockOpenAIServer(max_prompt_chars=10) as server:
+            llm, _ = self._client(server)
+            gen = TestCaseGenerator(max_workers=1, llm=llm)
+            gen.pack_categories = False
+            self.assertIsNone(gen.generate_test_cases("login", positive=5, negative=5, edge=3))
+        self.assertEqual(server.request_count, 3)
+        self.assertTrue(gen.last_error.request_specific)
+
+    def test_clients_share_one_connection_pool(self):
+        transport = Transport()
+        first = transport.client("key-a", "http://127.0.0.1:1/v1")
+        second = transport.client("key-b", "http://127.0.0.1:1/v1")
+        self.assertIs(first._client, second._client)
+        self.assertIs(transport.client("key-a", "http://127.0.0.1:1/v1"), first)
+
+    def test_streamed_usage_settles_tokens(self):
+        with MockOpenAIServer() as server:
+            llm, transport = self._client(server, limiter=RateLimiter(tokens_per_minute=60000))
+            text = "".join(llm.stream("Generate exactly 1 Edge test cases", max_tokens=5000))
+        self.assertTrue(text.startswith("["))
+        # The unused part of the 5000-token reservation went back into the bucket
+        self.assertGreater(transport.limiter._tokens, 8000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+# transport.py
+"""Process-wide OpenAI transport: pooled HTTP, rate limiting and retries.
+
+All LLMClient instances share one keep-alive HTTP connection pool and one
+RateLimiter, so concurrent generators (batch workers, Streamlit sessions,
+background jobs) stay under the account's requests/min and tokens/min
+limits together instead of each discovering them through 429s.
+"""
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import openai
+from openai import DefaultHttpxClient, OpenAI, Timeout
+
+import metrics
+
+# Buckets hold at most this many seconds' worth of quota, so a cold start
+# cannot fire a whole minute of requests at once
+BURST_SECONDS = 10.0
+MAX_RETRY_AFTER = 60.0
+
+
+class RateLimiter:
+    """Token buckets for requests/min and tokens/min (0 means unlimited).
+
+    ``acquire`` reserves one request plus an estimate of the tokens it will
+    use; ``settle`` corrects the estimate with ``response.usage``. ``pause``
+    holds every caller back, e.g. for a Retry-After.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.set_limits(requests_per_minute, tokens_per_minute)
+
+    def set_limits(self, requests_per_minute: float, tokens_per_minute: float) -> None:
+        with self._lock:
+            self.requests_per_minute = float(requests_per_minute or 0)
+            self.tokens_per_minute = float(tokens_per_minute or 0)
+            self._requests = self._capacity(self.requests_per_minute)
+            self._tokens = self._capacity(self.tokens_per_minute)
+            self._updated = self._clock()
+
+    @staticmethod
+    def _capacity(per_minute: float) -> float:
+        return max(1.0, per_minute * BURST_SECONDS / 60.0) if per_minute else 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self._capacity(self.requests_per_minute),
+                                 self._requests + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._tokens = min(self._capacity(self.tokens_per_minute),
+                               self._tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        wait = self._paused_until - now
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # A request bigger than the bucket only waits for a full bucket, then overdraws it
+            needed = min(tokens, self._capacity(self.tokens_per_minute))
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60.0 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request of ``tokens`` fits; return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return waited
+            self._sleep(wait)
+            waited += wait
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Give back (or charge) the difference between a reservation and actual usage."""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._tokens = min(self._capacity(self.tokens_per_minute), self._tokens + reserved - used)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def is_transient(exc: Exception) -> bool:
+    """True for errors worth retrying: timeouts, connection drops, 408/409/429 and 5xx."""
+    if isinstance(exc, openai.RateLimitError):
+        # Out of credit is also a 429, but waiting will not fix it
+        return getattr(exc, "code", None) != "insufficient_quota"
+    if isinstance(exc, openai.APIConnectionError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+def retry_after(exc: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After(-ms) headers."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return min(MAX_RETRY_AFTER, max(0.0, float(value) * scale))
+        except ValueError:
+            continue
+    return None
+
+
+def _header_limits(exc: Exception) -> Tuple[float, float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return (float(headers.get("x-ratelimit-limit-requests") or 0),
+                float(headers.get("x-ratelimit-limit-tokens") or 0))
+    except ValueError:
+        return 0.0, 0.0
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class Transport:
+    """Shared HTTP pool, rate limiter and retry policy for chat completion calls."""
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, max_retries: int = 5, timeout: float = 60.0,
+                 backoff_base: float = 0.5, sleep: Callable[[float], None] = time.sleep):
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._sleep = sleep
+        # Keep-alive pool with the SDK's default connection limits
+        self.http_client = DefaultHttpxClient(timeout=Timeout(timeout, connect=10.0))
+        self._clients: Dict[Tuple, OpenAI] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def client(self, api_key: str, base_url: Optional[str] = None) -> OpenAI:
+        """One OpenAI client per credentials, all on the shared connection pool.
+
+        The SDK's own retries are off; ``call`` retries under the shared limiter.
+        """
+        key = (api_key, base_url)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = OpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                            http_client=self.http_client)
+            return self._clients[key]
+
+    def call(self, request: Callable[[], object], estimated_tokens: int = 0):
+        """Run ``request`` under the rate limiter, retrying transient failures.
+
+        The caller settles the token reservation with ``settle`` once the
+        response's usage is known. Permanent errors and the last transient
+        one are re-raised.
+        """
+        attempt = 0
+        while True:
+            with metrics.span("llm.rate_limit_wait"):
+                self.limiter.acquire(estimated_tokens)
+            try:
+                with metrics.span("llm.request"):
+                    return request()
+            except Exception as e:
+                self.limiter.settle(estimated_tokens, 0)
+                if not is_transient(e) or attempt >= self.max_retries:
+                    metrics.count("llm.errors")
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base)
+                wait = retry_after(e)
+                if wait is not None:
+                    # The whole process backs off, not just this thread
+                    self.limiter.pause(wait)
+                    delay = wait + delay / 4
+                if isinstance(e, openai.RateLimitError) and not self.limiter.requests_per_minute:
+                    rpm, tpm = _header_limits(e)
+                    if rpm or tpm:
+                        self.limiter.set_limits(rpm, tpm)
+                attempt += 1
+                self.retries += 1
+                metrics.count("llm.retries")
+                print(f"Transient API error ({e.__class__.__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                with metrics.span("llm.backoff"):
+                    self._sleep(delay)
+
+    def settle(self, estimated_tokens: int, usage) -> None:
+        used = getattr(usage, "total_tokens", None)
+        if used is not None:
+            self.limiter.settle(estimated_tokens, used)
+
+
+_default: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> Transport:
+    """The process-wide transport, configured from the environment on first use.
+
+    LLM_RPM / LLM_TPM set the account limits (0 or unset: learn them from
+    the first 429). LLM_MAX_RETRIES and LLM_TIMEOUT tune retries and the
+    per-request timeout.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Transport(
+                RateLimiter(float(os.getenv("LLM_RPM", "0")), float(os.getenv("LLM_TPM", "0"))),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+                timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+            )
+        return _default